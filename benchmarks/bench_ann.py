@@ -0,0 +1,83 @@
+# benchmarks/bench_ann.py
+"""
+Recall@k vs exact search, latency and index memory for the FAISS index types the builder can write
+(flat, IVF-Flat, IVF-PQ, HNSW), sweeping nprobe / efSearch.
+
+    python benchmarks/bench_ann.py --n 10k,100k,1m --dim 384 --queries 200 --k 6 --out ann.json
+
+1M × 384 float32 is ~1.5 GB before any index is built; pass a smaller --dim to fit tighter machines.
+"""
+from __future__ import annotations
+
+import argparse
+
+import faiss
+import numpy as np
+
+from common import Timer, emit, exact_topk, make_corpus, make_queries, parse_sizes, percentiles, recall_at_k
+from fitapp_core.rag.build import INDEX_TYPES, make_faiss_index
+
+def _params(index_type: str, effort: int):
+    if index_type in ("ivf", "ivfpq"):
+        return faiss.SearchParametersIVF(nprobe=effort), {"nprobe": effort}
+    if index_type == "hnsw":
+        return faiss.SearchParametersHNSW(efSearch=effort), {"ef_search": effort}
+    return None, {}
+
+def _efforts(index_type: str, nprobes: list, efs: list) -> list:
+    if index_type in ("ivf", "ivfpq"):
+        return nprobes
+    if index_type == "hnsw":
+        return efs
+    return [0]
+
+def run(n: int, dim: int, queries: int, k: int, types: list, nprobes: list, efs: list) -> dict:
+    corpus = make_corpus(n, dim)
+    qv = make_queries(corpus, queries)
+    truth = exact_topk(corpus, qv, k)
+    results = []
+    for index_type in types:
+        with Timer() as t:
+            index = make_faiss_index(corpus, index_type)
+        build_ms = t.ms
+        index_bytes = int(faiss.serialize_index(index).nbytes)
+        for effort in _efforts(index_type, nprobes, efs):
+            params, knobs = _params(index_type, effort)
+            index.search(qv[:1], k, params=params)  # warm up
+            lat = []
+            got = []
+            for row in qv:
+                with Timer() as t:
+                    _, idx = index.search(row[None, :], k, params=params)
+                lat.append(t.ms)
+                got.append(idx[0])
+            results.append({
+                "index_type": index_type,
+                "faiss_class": type(index).__name__,
+                **knobs,
+                "build_ms": round(build_ms, 1),
+                "index_bytes": index_bytes,
+                f"recall@{k}": round(recall_at_k(truth, np.stack(got)), 4),
+                **percentiles(lat),
+            })
+        del index
+    return {"n": n, "dim": dim, "queries": queries, "k": k, "results": results}
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", default="10k,100k,1m", help="corpus sizes, comma-separated")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=6)
+    ap.add_argument("--types", default=",".join(INDEX_TYPES))
+    ap.add_argument("--nprobe", default="1,4,16,64", help="IVF nprobe values to sweep")
+    ap.add_argument("--ef-search", default="16,64,256", help="HNSW efSearch values to sweep")
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+    types = [t.strip() for t in args.types.split(",") if t.strip()]
+    nprobes = [int(x) for x in args.nprobe.split(",")]
+    efs = [int(x) for x in args.ef_search.split(",")]
+    emit({"runs": [run(n, args.dim, args.queries, args.k, types, nprobes, efs) for n in parse_sizes(args.n)]}, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_import.py
+"""
+Import-time budget for fitapp_core, measured with `python -X importtime` in fresh interpreters.
+
+    python benchmarks/bench_import.py --out import.json
+    python benchmarks/bench_import.py --modules fitapp_core.rag.llm --budget-ms 100 --top 10
+
+For each module: median cumulative import time over --runs, the slowest transitive imports, and
+whether any --forbid module (SDKs that should only load on first use) was pulled in.
+Exits 1 when a median exceeds --budget-ms (default IMPORT_BUDGET_MS, 1000: about twice
+fitapp_core.plan_v11 today) or a forbidden module is imported; CI runs it on every push.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from common import emit
+
+DEFAULT_MODULES = "fitapp_core.plan_v11,fitapp_core.rag.llm,fitapp_core.rag.retriever"
+DEFAULT_FORBID = "openai,httpx,dotenv"
+# Per-module budget in ms; 0 only reports
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1000"))
+
+def measure(module: str, forbid: list) -> dict:
+    code = f"import sys, {module}; print(','.join(m for m in {forbid!r} if m in sys.modules))"
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}  # imports must not need a key
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {proc.stderr.strip().splitlines()[-1:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        head, cum_us, name = line.split("|")
+        rows.append((name.strip(), int(head.split(":")[1]), int(cum_us)))  # (module, self us, cumulative us)
+    total = next(cum for name, _, cum in reversed(rows) if name == module)
+    return {"total_us": total, "rows": rows, "forbidden": [m for m in proc.stdout.strip().split(",") if m]}
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--modules", default=DEFAULT_MODULES)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="fail when a module's median exceeds this (0: report only)")
+    ap.add_argument("--forbid", default=DEFAULT_FORBID, help="modules that must not be imported (empty: no check)")
+    ap.add_argument("--top", type=int, default=8)
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+    forbid = [m.strip() for m in args.forbid.split(",") if m.strip()]
+
+    results, failures = [], []
+    for module in [m.strip() for m in args.modules.split(",") if m.strip()]:
+        runs = [measure(module, forbid) for _ in range(args.runs)]
+        median_ms = statistics.median(r["total_us"] for r in runs) / 1000
+        slowest = sorted(runs[-1]["rows"], key=lambda r: -r[1])[: args.top]
+        forbidden = sorted({m for r in runs for m in r["forbidden"]})
+        results.append({
+            "module": module,
+            "median_ms": round(median_ms, 1),
+            "runs_ms": [round(r["total_us"] / 1000, 1) for r in runs],
+            "slowest_self_ms": {name: round(self_us / 1000, 1) for name, self_us, _ in slowest},
+            "forbidden_imported": forbidden,
+        })
+        if args.budget_ms > 0 and median_ms > args.budget_ms:
+            failures.append(f"{module}: {median_ms:.0f} ms > {args.budget_ms:.0f} ms budget")
+        if forbidden:
+            failures.append(f"{module}: imports {', '.join(forbidden)}")
+    emit({"budget_ms": args.budget_ms, "results": results, "failures": failures}, args.out)
+    if failures:
+        print("\n".join(f"[bench] FAIL {f}" for f in failures), file=sys.stderr)
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
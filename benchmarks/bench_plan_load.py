@@ -0,0 +1,171 @@
+# benchmarks/bench_plan_load.py
+"""
+Load driver for the LLM path: end-to-end generate_plan_v11 (PLAN_V11_USE_LLM_JSON=true) or
+assess_tweak throughput and latency under N concurrent callers, against the local stub server.
+
+    python benchmarks/bench_plan_load.py --concurrency 1,4,16 --requests 64 --latency lognormal:2,0.5 --out plan_load.json
+    python benchmarks/bench_plan_load.py --target tweak --malformed-rate 0.3 --tail-rate 0.05 --tail-latency fixed:30
+    python benchmarks/bench_plan_load.py --base-url http://127.0.0.1:8089   # an already running stub_llm_server.py
+
+Unless --base-url is given, a stub (stub_llm_server.py, same latency/malformed/error options) runs
+in-process. Each request uses distinct inputs so the LLM cache (off unless --llm-cache) and request
+coalescing don't hide load; --same-inputs sends identical requests instead. Per level it reports
+throughput, latency percentiles, the share of plans whose rows came from the LLM, and deltas of
+llm_stats() (hedges, timeouts, breaker) and of the stub's counters. LLM_* env knobs apply as usual.
+Per-call events land in --telemetry-dir for `python -m fitapp_core.rag.telemetry report`.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from common import Timer, emit, percentiles
+from stub_llm_server import add_stub_args, config_from_args, serve_in_thread
+
+GOALS = ("hypertrophy", "strength", "fat_loss", "endurance")
+TWEAKS = (
+    "swap barbell bench press for dumbbells, my shoulder hurts",
+    "bodyweight squats instead of barbell squats",
+    "add a second cardio day",
+    "train 6 days instead of 4",
+)
+
+def _inputs(i: int, same: bool) -> dict:
+    i = 0 if same else i
+    return {
+        "age": 20 + i % 45,
+        "sex": "male" if i % 2 else "female",
+        "height_cm": 160 + i % 35,
+        "weight_kg": 55 + i % 50,
+        "pal_code": ("sedentary", "active", "vigorous")[i % 3],
+        "goal": GOALS[i % len(GOALS)],
+        "equipment": ["barbell", "dumbbell", "cable"],
+        "days_per_week": 3 + i % 4,
+    }
+
+def _stub_stats(base_url: str) -> dict:
+    try:
+        with urllib.request.urlopen(base_url.rstrip("/") + "/stats", timeout=5) as resp:
+            return json.loads(resp.read())
+    except Exception:
+        return {}
+
+def _delta(after: dict, before: dict) -> dict:
+    out = {}
+    for k, v in after.items():
+        if isinstance(v, dict):
+            out[k] = _delta(v, before.get(k) or {})
+        elif isinstance(v, (int, float)) and not isinstance(v, bool) and k not in ("in_flight", "max_in_flight", "max_concurrency", "latency_p95_ms", "hedge_after_s"):
+            out[k] = v - (before.get(k) or 0)
+        else:
+            out[k] = v
+    return out
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--target", choices=("plan", "tweak"), default="plan")
+    ap.add_argument("--concurrency", default="1,4,16", help="concurrent callers per level")
+    ap.add_argument("--requests", type=int, default=32, help="requests per level")
+    ap.add_argument("--base-url", default="", help="use this OpenAI-compatible endpoint instead of an in-process stub")
+    ap.add_argument("--llm-max-concurrency", type=int, default=0, help="LLM_MAX_CONCURRENCY (0: env/default)")
+    ap.add_argument("--rag", choices=("lexical", "index", "off"), default="lexical",
+                    help="retrieval: BM25 over the local index (no model download), the configured mode, or disabled (no index, no processed corpus; checked per request)")
+    ap.add_argument("--same-inputs", action="store_true")
+    ap.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache on")
+    ap.add_argument("--telemetry-dir", default="", help="where LLM/plan events are written (default: a temp dir)")
+    ap.add_argument("--out", default="")
+    add_stub_args(ap)
+    args = ap.parse_args()
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    base_url, server = args.base_url, None
+    if not base_url:
+        server = serve_in_thread(config_from_args(args))
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Read at import time by fitapp_core, so set before importing it
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("PERPLEXITY_API_KEY", "stub")
+    os.environ["PLAN_V11_USE_LLM_JSON"] = "true"
+    # LLM events go to JSONL (not stdout, which carries the result): python -m fitapp_core.rag.telemetry report DIR/*.jsonl
+    os.environ["TELEMETRY_DIR"] = args.telemetry_dir or tempfile.mkdtemp(prefix="plan_load_logs_")
+    if not args.llm_cache:
+        os.environ["LLM_CACHE_PATH"] = ""
+    if args.llm_max_concurrency > 0:
+        os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_max_concurrency)
+    if args.rag == "lexical":
+        os.environ["RAG_RETRIEVAL_MODE"] = "lexical"
+    elif args.rag == "off":
+        # No index and no chunks.jsonl: otherwise BM25 over the processed corpus still answers
+        empty = tempfile.mkdtemp(prefix="no_rag_")
+        os.environ["RAG_INDEX_DIR"] = empty
+        os.environ["RAG_PROCESSED_DIR"] = empty
+
+    from fitapp_core.models_v11 import InputsV11
+    from fitapp_core.plan_v11 import assess_tweak, generate_plan_v11
+    from fitapp_core.rag.llm import llm_stats
+    from fitapp_core.rag.telemetry import get_telemetry
+
+    def one(i: int) -> tuple:
+        # (latency ms, answered by the LLM, error)
+        with Timer() as t:
+            try:
+                if args.target == "plan":
+                    plan = generate_plan_v11(InputsV11(**_inputs(i, args.same_inputs)))
+                    ok = bool(plan.extra.get("used_llm_for_rows"))
+                    sources = plan.extra.get("snippets_count") or 0
+                else:
+                    inp = _inputs(i, args.same_inputs)
+                    out = assess_tweak(inp["goal"], TWEAKS[0 if args.same_inputs else i % len(TWEAKS)])
+                    ok = out.get("verdict") in ("ok", "warn", "block")
+                    sources = len(out.get("sources") or [])
+                if args.rag == "off" and sources:
+                    raise RuntimeError(f"--rag off but {sources} snippets were retrieved")
+                err = None
+            except Exception as e:
+                ok, err = False, f"{type(e).__name__}: {e}"
+        return t.ms, ok, err
+
+    print(f"[bench] {args.target} load against {base_url}", file=sys.stderr)
+    results = []
+    offset = 0
+    # Diagnostics ("[LLM] ...") go to stderr so stdout stays the JSON result
+    with contextlib.redirect_stdout(sys.stderr):
+        _, _, err = one(10_000)  # warm-up: store load, client construction
+        if err and args.rag == "off" and "--rag off" in err:
+            raise SystemExit(f"[bench] {err}")
+        for c in levels:
+            llm_before, stub_before = llm_stats(), _stub_stats(base_url)
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=c) as pool:
+                outcomes = list(pool.map(one, range(offset, offset + args.requests)))
+            wall = time.perf_counter() - t0
+            offset += args.requests
+            errors = [e for _, _, e in outcomes if e]
+            results.append({
+                "concurrency": c,
+                "requests": args.requests,
+                "wall_s": round(wall, 3),
+                "throughput_rps": round(args.requests / wall, 3),
+                "latency": percentiles(ms for ms, _, _ in outcomes),
+                "llm_answer_rate": round(sum(ok for _, ok, _ in outcomes) / max(1, len(outcomes)), 4),
+                "errors": len(errors),
+                "first_error": errors[0] if errors else None,
+                "llm": _delta(llm_stats(), llm_before),
+                "stub": _delta(_stub_stats(base_url), stub_before),
+            })
+            print(f"[bench] c={c}: {results[-1]['throughput_rps']} req/s, p95 {results[-1]['latency']['p95_ms']:.0f} ms", file=sys.stderr)
+    if server is not None:
+        server.shutdown()
+    get_telemetry().flush()
+    emit({"target": args.target, "base_url": base_url, "telemetry_dir": os.environ["TELEMETRY_DIR"], "args": vars(args), "levels": results}, args.out)
+
+if __name__ == "__main__":
+    main()
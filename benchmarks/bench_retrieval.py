@@ -0,0 +1,162 @@
+# benchmarks/bench_retrieval.py
+"""
+End-to-end retrieval benchmark / load test over RAGStore and retrieve_snippets.
+
+    python benchmarks/bench_retrieval.py --n 20k --queries 300 --threads 1,4,16 --out retrieval.json
+
+Builds synthetic chunk corpora with the real index builder and a deterministic stub encoder,
+then measures each backend in a fresh child process: cold start (store load), first-query and
+steady-state latency percentiles, cached retrieve_snippets latency, throughput under N threads,
+and peak RSS. Runs fully offline; identical arguments give identical corpora and queries.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from common import StubEncoder, Timer, emit, make_chunks, make_text_queries, parse_sizes, percentiles
+
+# name -> (build kwargs, store settings)
+BACKENDS = {
+    "numpy-f32": ({"dtypes": ("float32",), "write_faiss": False}, {"faiss": False, "emb_dtype": "float32"}),
+    "numpy-int8": ({"dtypes": ("int8",), "write_faiss": False}, {"faiss": False, "emb_dtype": "int8"}),
+    "faiss-flat": ({"index_type": "flat"}, {"faiss": True}),
+    "faiss-ivf": ({"index_type": "ivf"}, {"faiss": True}),
+    "faiss-hnsw": ({"index_type": "hnsw"}, {"faiss": True}),
+    "bm25": ({"dtypes": ("float32",), "write_faiss": False}, {"faiss": False, "mode": "lexical"}),
+    "hybrid": ({"dtypes": ("float32",), "write_faiss": False}, {"faiss": False, "mode": "hybrid"}),
+    "sharded-domain": ({"dtypes": ("float32",), "write_faiss": False, "shard_by": "domain"}, {"faiss": False}),
+}
+
+def _rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+def build_corpora(root: Path, n: int, dim: int, backends: list) -> dict:
+    from fitapp_core.rag.build import build_index
+
+    proc = root / "processed"
+    proc.mkdir(parents=True, exist_ok=True)
+    with open(proc / "chunks.jsonl", "w", encoding="utf-8") as f:
+        for rec in make_chunks(n):
+            f.write(json.dumps(rec) + "\n")
+    encoder = StubEncoder(dim)
+    dirs = {}
+    for name in backends:
+        build_kwargs, _ = BACKENDS[name]
+        with Timer() as t:
+            dirs[name] = str(build_index(proc, root / "index", version=name, encode=encoder, **build_kwargs))
+        print(f"[bench] built {name} in {t.ms:.0f} ms", file=sys.stderr)
+    return {"processed": str(proc), "dirs": dirs}
+
+def run_child(name: str, index_dir: str, processed: str, dim: int, queries: int, threads: list) -> dict:
+    """Runs inside a fresh interpreter so cold start and peak RSS belong to this backend alone."""
+    from fitapp_core.rag import result_cache
+    from fitapp_core.rag import retriever as rmod
+
+    _, settings = BACKENDS[name]
+    if not settings.get("faiss"):
+        rmod.faiss = None
+    if settings.get("emb_dtype"):
+        rmod.EMB_DTYPE = settings["emb_dtype"]
+    encoder = StubEncoder(dim)
+    rmod.RAGStore._encode = lambda self, texts: encoder(texts)
+    mode = settings.get("mode")
+    texts = make_text_queries(queries)
+    rss_before = _rss_bytes()
+
+    with Timer() as cold:
+        store = rmod.open_store(Path(index_dir), Path(processed))
+    req = lambda q: {"query": q, "mode": mode} if mode else {"query": q}
+    with Timer() as first:
+        store.query(req(texts[0]), top_k=6)
+
+    lat = []
+    for q in texts:
+        with Timer() as t:
+            store.query(req(q), top_k=6)
+        lat.append(t.ms)
+
+    # retrieve_snippets through the shared registry: misses then result-cache hits
+    rmod.INDEX_DIR, rmod.PROC_DIR = Path(index_dir), Path(processed)
+    result_cache._CACHE = result_cache.ResultCache(capacity=len(texts) + 1)
+    miss, hit = [], []
+    for q in texts[:100]:
+        with Timer() as t:
+            rmod.retrieve_snippets({**req(q), "top_k": 6})
+        miss.append(t.ms)
+    for q in texts[:100]:
+        with Timer() as t:
+            rmod.retrieve_snippets({**req(q), "top_k": 6})
+        hit.append(t.ms)
+
+    throughput = {}
+    for n_threads in threads:
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            t0 = time.perf_counter()
+            list(pool.map(lambda q: store.query(req(q), top_k=6), texts))
+            elapsed = time.perf_counter() - t0
+        throughput[str(n_threads)] = round(len(texts) / elapsed, 1)
+
+    return {
+        "backend": name,
+        "store": store.backend,
+        "cold_start_ms": round(cold.ms, 3),
+        "first_query_ms": round(first.ms, 3),
+        "query": percentiles(lat),
+        "retrieve_snippets_miss": percentiles(miss),
+        "retrieve_snippets_hit": percentiles(hit),
+        "throughput_qps": throughput,
+        "peak_rss_bytes": _rss_bytes(),
+        "rss_before_load_bytes": rss_before,
+        "store_resident_bytes": store.resident_bytes(),
+    }
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", default="20k", help="corpus sizes, comma-separated")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("--threads", default="1,4,16")
+    ap.add_argument("--backends", default=",".join(BACKENDS))
+    ap.add_argument("--out", default="")
+    ap.add_argument("--child", nargs=3, metavar=("BACKEND", "INDEX_DIR", "PROCESSED"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    threads = [int(x) for x in args.threads.split(",")]
+
+    if args.child:
+        name, index_dir, processed = args.child
+        print(json.dumps(run_child(name, index_dir, processed, args.dim, args.queries, threads)))
+        return
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = sorted(set(backends) - set(BACKENDS))
+    if unknown:
+        raise SystemExit(f"unknown backends: {unknown}")
+    runs = []
+    for n in parse_sizes(args.n):
+        with tempfile.TemporaryDirectory() as tmp:
+            corpora = build_corpora(Path(tmp), n, args.dim, backends)
+            results = []
+            for name in backends:
+                cmd = [sys.executable, __file__, "--child", name, corpora["dirs"][name], corpora["processed"],
+                       "--dim", str(args.dim), "--queries", str(args.queries), "--threads", args.threads]
+                proc = subprocess.run(cmd, capture_output=True, text=True, env={**os.environ, "RAG_RELOAD_CHECK_S": "-1"})
+                if proc.returncode != 0:
+                    results.append({"backend": name, "error": proc.stderr.strip().splitlines()[-1:]})
+                    continue
+                results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        runs.append({"n": n, "dim": args.dim, "queries": args.queries, "results": results})
+    emit({"runs": runs}, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_vectors.py
+"""
+Recall@k and latency of the NumPy backend's embedding formats:
+legacy embeddings.npy (normalized in memory) vs pre-normalized mmap float32 / float16 / int8.
+
+    python benchmarks/bench_vectors.py --n 100k --dim 384 --queries 200 --k 6 --out vectors.json
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from common import Timer, emit, exact_topk, make_corpus, make_queries, parse_sizes, percentiles, recall_at_k
+from fitapp_core.rag.vectors import VECTOR_FILES, load_legacy, load_vectors, write_vectors
+
+def _topk(mat, qv: np.ndarray, k: int) -> np.ndarray:
+    sims = mat.scores(qv)
+    part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(sims, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+def run(n: int, dim: int, queries: int, k: int) -> dict:
+    corpus = make_corpus(n, dim)
+    qv = make_queries(corpus, queries)
+    truth = exact_topk(corpus, qv, k)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        np.save(tmp / "embeddings.npy", corpus)
+        with Timer() as t:
+            legacy = load_legacy(tmp / "embeddings.npy")
+        variants = [("legacy_float32", legacy, t.ms, (tmp / "embeddings.npy").stat().st_size)]
+        for dtype in ("float32", "float16", "int8"):
+            write_vectors(corpus, tmp, dtype=dtype, normalized=True)
+            with Timer() as t:
+                mat = load_vectors(tmp, dtype)
+            variants.append((f"mmap_{dtype}", mat, t.ms, (tmp / VECTOR_FILES[dtype]).stat().st_size))
+        for name, mat, load_ms, file_bytes in variants:
+            _topk(mat, qv[:1], k)  # warm page cache
+            lat = []
+            got = []
+            for row in qv:
+                with Timer() as t:
+                    got.append(_topk(mat, row[None, :], k)[0])
+                lat.append(t.ms)
+            results.append({
+                "variant": name,
+                "load_ms": round(load_ms, 3),
+                "file_bytes": file_bytes,
+                "resident_bytes": mat.resident_bytes(),
+                f"recall@{k}": round(recall_at_k(truth, np.stack(got)), 4),
+                **percentiles(lat),
+            })
+            del mat
+    return {"n": n, "dim": dim, "queries": queries, "k": k, "results": results}
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", default="100k", help="corpus sizes, comma-separated (e.g. 10k,100k)")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=6)
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+    emit({"runs": [run(n, args.dim, args.queries, args.k) for n in parse_sizes(args.n)]}, args.out)
+
+if __name__ == "__main__":
+    main()
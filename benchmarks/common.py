@@ -0,0 +1,123 @@
+# benchmarks/common.py
+# Shared helpers for the offline benchmarks: synthetic corpora, timing and recall.
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+def make_corpus(n: int, dim: int = 384, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to real sentence embeddings than pure Gaussian noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    out = np.empty((n, dim), dtype=np.float32)
+    step = 65536
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        labels = rng.integers(0, clusters, stop - start)
+        out[start:stop] = centers[labels] + 0.6 * rng.standard_normal((stop - start, dim)).astype(np.float32)
+    out /= np.linalg.norm(out, axis=1, keepdims=True)
+    return out
+
+def make_queries(corpus: np.ndarray, q: int, noise: float = 0.3, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, corpus.shape[0], q)
+    qv = corpus[picks] + noise * rng.standard_normal((q, corpus.shape[1])).astype(np.float32) / np.sqrt(corpus.shape[1])
+    qv /= np.linalg.norm(qv, axis=1, keepdims=True)
+    return qv.astype(np.float32)
+
+def exact_topk(corpus: np.ndarray, qv: np.ndarray, k: int) -> np.ndarray:
+    sims = qv @ corpus.T
+    part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(sims, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+def recall_at_k(truth: np.ndarray, got: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(t.tolist()) & set(g[:k].tolist())) for t, g in zip(truth, got))
+    return hits / float(truth.size)
+
+def percentiles(samples_ms: Iterable[float]) -> Dict[str, float]:
+    arr = np.asarray(list(samples_ms), dtype=np.float64)
+    if arr.size == 0:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 4),
+        "p95_ms": round(float(np.percentile(arr, 95)), 4),
+        "p99_ms": round(float(np.percentile(arr, 99)), 4),
+        "mean_ms": round(float(arr.mean()), 4),
+    }
+
+class Timer:
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.t0) * 1000
+
+def emit(result: Dict, out_path: str = "") -> None:
+    text = json.dumps(result, indent=2)
+    print(text)
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+def parse_sizes(text: str) -> List[int]:
+    mult = {"k": 1_000, "m": 1_000_000}
+    out = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        out.append(int(float(part[:-1]) * mult[part[-1]]) if part[-1] in mult else int(part))
+    return out
+
+# ----- Synthetic chunk corpora for end-to-end retrieval benchmarks -----
+
+DOMAINS = ("strength", "hypertrophy", "endurance", "mobility")
+_WORDS = (
+    "squat bench deadlift press row pull chin lunge hinge carry sprint tempo interval zone cardio "
+    "volume intensity frequency load reps sets rest deload taper progression overload failure rir rpe "
+    "protein sleep recovery mobility stretch warmup cooldown hypertrophy strength endurance power "
+    "beginner novice intermediate advanced weekly session split upper lower full body push legs"
+).split()
+
+def make_chunks(n: int, seed: int = 0) -> list:
+    """Deterministic chunks.jsonl records: short word salads with one domain: tag each."""
+    rng = np.random.default_rng(seed)
+    words = np.asarray(_WORDS)
+    out = []
+    for i in range(n):
+        domain = DOMAINS[i % len(DOMAINS)]
+        text = " ".join(words[rng.integers(0, len(words), 40)].tolist() + [domain])
+        out.append({"id": f"c{i}", "doc_id": f"d{i // 8}", "text": text, "tags": ["evidence:evidence", f"domain:{domain}"]})
+    return out
+
+def make_text_queries(q: int, seed: int = 1) -> list:
+    rng = np.random.default_rng(seed)
+    words = np.asarray(_WORDS)
+    return [" ".join(words[rng.integers(0, len(words), 6)].tolist()) for _ in range(q)]
+
+class StubEncoder:
+    """Deterministic bag-of-token-vectors encoder: shared words -> similar vectors, no model download."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self._token_vecs: Dict[str, np.ndarray] = {}
+
+    def _token(self, tok: str) -> np.ndarray:
+        vec = self._token_vecs.get(tok)
+        if vec is None:
+            seed = int(hashlib.sha1(tok.encode("utf-8")).hexdigest()[:16], 16)
+            vec = self._token_vecs[tok] = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vec
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for tok in text.lower().split():
+                out[i] += self._token(tok)
+        out /= np.linalg.norm(out, axis=1, keepdims=True) + 1e-12
+        return out
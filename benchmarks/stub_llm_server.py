@@ -0,0 +1,313 @@
+# benchmarks/stub_llm_server.py
+"""
+Local OpenAI-compatible stub for load and latency tests: serves the POST /chat/completions subset
+fitapp_core.rag.llm uses (plain and stream=true SSE), so plans and tweak assessments run without
+the hosted API.
+
+    python benchmarks/stub_llm_server.py --port 8089 --latency lognormal:5,0.5 --malformed-rate 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8089 PERPLEXITY_API_KEY=stub PLAN_V11_USE_LLM_JSON=true python app.py
+
+Latency specs (seconds, per response): fixed:S, uniform:LO,HI, normal:MEAN,SD, lognormal:MEDIAN,SIGMA.
+--tail-rate/--tail-latency mix in a slow mode (e.g. 5% at fixed:45) to exercise deadlines and hedging.
+Streamed responses spread the sampled latency over their chunks.
+Plan prompts get a canned canonical_week payload (--payloads: a JSON list or JSONL of objects, trimmed
+to the prompt's days_per_week); tweak-assessor prompts get a verdict object.
+A --malformed-rate share of replies is wrapped in code fences, surrounded by prose, given trailing
+commas or truncated (--malformed-kinds); --error-rate answers HTTP 500. GET /stats returns counters.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+MALFORMED_KINDS = ("fences", "prose", "trailing_commas", "truncated")
+
+def _item(movement: str, sets: int, reps: int, **extra: Any) -> Dict[str, Any]:
+    return {"movement": movement, "sets": sets, "reps": reps, "tempo_or_rest": "60-90s", "notes": "", **extra}
+
+def default_payloads() -> List[Dict[str, Any]]:
+    """Two 7-day canonical weeks (trimmed per request to days_per_week)."""
+    names = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    mains = ["Back Squat", "Barbell Bench Press", "Romanian Deadlift", "Overhead Press", "Pull-up", "Front Squat", "Incline Dumbbell Press"]
+    accessories = ["Leg Press", "Dumbbell Row", "Lateral Raise", "Cable Curl", "Triceps Pushdown", "Walking Lunge", "Face Pull"]
+    payloads = []
+    for variant, (sets, reps, cue) in enumerate(((4, 10, "RPE 8"), (5, 5, "80% 1RM"))):
+        days = []
+        for d in range(7):
+            days.append({
+                "day": d + 1,
+                "day_name": names[d],
+                "main": [_item(mains[(d + variant) % 7], sets, reps, main_focus="Compound", intensity_cue=cue)],
+                "accessory": [_item(accessories[(d + k) % 7], 3, 12) for k in range(3 - variant)],
+                "prehab": [],
+                "cardio_notes": [{"movement": "Zone 2 Cardio", "duration": "20 min", "tempo_or_rest": "Zone 2", "notes": ""}] if d % 3 == 2 else [],
+            })
+        payloads.append({
+            "canonical_week": {"days": days},
+            "progression": [{"week": 2, "note": "+1 rep per set"}, {"week": 3, "note": "+2.5–5% load"}, {"week": 4, "note": "deload 15–25%"}],
+        })
+    return payloads
+
+def load_payloads(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+        items = data if isinstance(data, list) else [data]
+    except ValueError:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    payloads = [p for p in items if isinstance(p, dict) and (p.get("canonical_week") or {}).get("days")]
+    if not payloads:
+        raise ValueError(f"{path}: no objects with canonical_week.days")
+    return payloads
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Sampler (seconds, >= 0) for fixed:S, uniform:LO,HI, normal:MEAN,SD or lognormal:MEDIAN,SIGMA."""
+    kind, _, args = spec.partition(":")
+    try:
+        vals = [float(v) for v in args.split(",") if v.strip()]
+    except ValueError:
+        vals = []
+    arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+    if kind not in arity or len(vals) != arity[kind]:
+        raise ValueError(f"bad latency spec {spec!r} (fixed:S, uniform:LO,HI, normal:MEAN,SD, lognormal:MEDIAN,SIGMA)")
+    if kind == "fixed":
+        return lambda rng: max(0.0, vals[0])
+    if kind == "uniform":
+        return lambda rng: max(0.0, rng.uniform(vals[0], vals[1]))
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(vals[0], vals[1]))
+    mu = math.log(max(vals[0], 1e-6))
+    return lambda rng: rng.lognormvariate(mu, vals[1])
+
+def malform(text: str, kind: str) -> str:
+    if kind == "fences":
+        return "```json\n" + text + "\n```"
+    if kind == "prose":
+        return "Here is the plan you asked for:\n" + text + "\nLet me know if you want any changes."
+    if kind == "trailing_commas":
+        return re.sub(r"(\S)\n(\s*[}\]])", r"\1,\n\2", text)
+    if kind == "truncated":
+        return text[: len(text) * 2 // 3]
+    raise ValueError(f"unknown malformed kind {kind!r}")
+
+@dataclass
+class StubConfig:
+    latency: str = "lognormal:1,0.5"
+    tail_rate: float = 0.0
+    tail_latency: str = "fixed:30"
+    malformed_rate: float = 0.0
+    malformed_kinds: tuple = ("fences", "prose", "trailing_commas")
+    error_rate: float = 0.0
+    payloads: List[Dict[str, Any]] = field(default_factory=default_payloads)
+    seed: int = 0
+
+class StubLLM:
+    """Response generation and counters, shared by the handler threads."""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self._latency = parse_latency(config.latency)
+        self._tail = parse_latency(config.tail_latency)
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"requests": 0, "streamed": 0, "errors": 0, "malformed": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def count(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + delta
+            if name == "in_flight":
+                self.counters["max_in_flight"] = max(self.counters["max_in_flight"], self.counters["in_flight"])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def draw(self) -> Dict[str, Any]:
+        """One response's fate: latency, HTTP error, malformation."""
+        cfg = self.config
+        with self._lock:
+            rng = self._rng
+            latency = self._tail(rng) if rng.random() < cfg.tail_rate else self._latency(rng)
+            error = rng.random() < cfg.error_rate
+            kind = rng.choice(cfg.malformed_kinds) if cfg.malformed_kinds and rng.random() < cfg.malformed_rate else None
+            payload = rng.choice(cfg.payloads)
+        return {"latency": latency, "error": error, "malformed": kind, "payload": payload}
+
+    @staticmethod
+    def answer(prompt: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if "verdict" in prompt:
+            n = len(re.findall(r"^\[\d+\]", prompt, flags=re.M))
+            return {"verdict": "ok", "rationale": "Stub assessment: consistent with the evidence provided.", "citations": [1] if n else []}
+        m = re.search(r"days_per_week=(\d+)", prompt)
+        days = payload["canonical_week"]["days"]
+        if m:
+            days = days[: max(1, int(m.group(1)))]
+        return {**payload, "canonical_week": {**payload["canonical_week"], "days": days}}
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "StubLLM/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def stub(self) -> StubLLM:
+        return self.server.stub  # type: ignore[attr-defined]
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        pass  # one line per request would dominate a load test's output
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") in ("/stats", "/v1/stats"):
+            self._send_json(200, self.stub.stats())
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.rstrip("/") not in ("/chat/completions", "/v1/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        try:
+            req = json.loads(body or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+        stub = self.stub
+        stub.count("requests")
+        stub.count("in_flight")
+        try:
+            self._complete(req, stub)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client stopped reading (streamed early stop or a cancelled hedge)
+        finally:
+            stub.count("in_flight", -1)
+
+    def _complete(self, req: Dict[str, Any], stub: StubLLM) -> None:
+        fate = stub.draw()
+        prompt = "\n".join(str(m.get("content") or "") for m in req.get("messages") or [])
+        if fate["error"]:
+            time.sleep(fate["latency"])
+            stub.count("errors")
+            self._send_json(500, {"error": {"message": "stub: injected server error", "type": "server_error"}})
+            return
+        text = json.dumps(stub.answer(prompt, fate["payload"]), ensure_ascii=False, indent=2)
+        if fate["malformed"]:
+            stub.count("malformed")
+            text = malform(text, fate["malformed"])
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "created": int(time.time()), "model": req.get("model") or "stub"}
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4, "total_tokens": (len(prompt) + len(text)) // 4}
+        if req.get("stream"):
+            stub.count("streamed")
+            include_usage = bool((req.get("stream_options") or {}).get("include_usage"))
+            self._stream(base, text, fate["latency"], usage if include_usage else None)
+            return
+        time.sleep(fate["latency"])
+        self._send_json(200, {
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _stream(self, base: Dict[str, Any], text: str, latency: float, usage: Optional[Dict[str, int]] = None) -> None:
+        pieces = [text[i : i + 64] for i in range(0, len(text), 64)] or [""]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta: Dict[str, Any], finish: Optional[str] = None) -> None:
+            chunk = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            self.wfile.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for piece in pieces:
+            time.sleep(latency / len(pieces))
+            event({"content": piece})
+        event({}, "stop")
+        if usage is not None:
+            # stream_options.include_usage: a last chunk with no choices carries the token counts
+            chunk = {**base, "object": "chat.completion.chunk", "choices": [], "usage": usage}
+            self.wfile.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+def make_server(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Bound (not yet serving) stub server; port 0 picks a free port (server.server_address)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.stub = StubLLM(config)  # type: ignore[attr-defined]
+    return server
+
+def serve_in_thread(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start a stub in a daemon thread; use f"http://{host}:{server.server_address[1]}" as OPENAI_BASE_URL."""
+    server = make_server(config, host, port)
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server
+
+def add_stub_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--latency", default="lognormal:1,0.5", help="per-response latency spec (seconds)")
+    ap.add_argument("--tail-rate", type=float, default=0.0, help="share of responses drawn from --tail-latency")
+    ap.add_argument("--tail-latency", default="fixed:30")
+    ap.add_argument("--malformed-rate", type=float, default=0.0)
+    ap.add_argument("--malformed-kinds", default="fences,prose,trailing_commas", help=f"subset of {','.join(MALFORMED_KINDS)}")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    ap.add_argument("--payloads", default="", help="JSON list / JSONL of canned canonical_week objects")
+    ap.add_argument("--seed", type=int, default=0)
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    kinds = tuple(k.strip() for k in args.malformed_kinds.split(",") if k.strip())
+    unknown = [k for k in kinds if k not in MALFORMED_KINDS]
+    if unknown:
+        raise SystemExit(f"unknown --malformed-kinds: {', '.join(unknown)}")
+    for spec in (args.latency, args.tail_latency):
+        parse_latency(spec)  # fail on a bad spec before serving
+    return StubConfig(
+        latency=args.latency,
+        tail_rate=args.tail_rate,
+        tail_latency=args.tail_latency,
+        malformed_rate=args.malformed_rate,
+        malformed_kinds=kinds,
+        error_rate=args.error_rate,
+        payloads=load_payloads(args.payloads) if args.payloads else default_payloads(),
+        seed=args.seed,
+    )
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    add_stub_args(ap)
+    args = ap.parse_args()
+    server = make_server(config_from_args(args), args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"[stub] OpenAI-compatible stub on http://{host}:{port} (POST /chat/completions, GET /stats)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
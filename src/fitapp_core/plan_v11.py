@@ -3,7 +3,8 @@ from __future__ import annotations
 
 import os
 import re
-from typing import Optional, List, Dict, Any
+import time
+from typing import Optional, List, Dict, Any, Callable
 
 from pydantic import ValidationError
 
@@ -18,8 +19,10 @@ from .rag.prompts import (
     TWEAK_ASSESSOR_SYSTEM,
     TWEAK_ASSESSOR_USER,
     render_numbered_snippets,
+    pack_snippets,
 )
 from .rag.llm import call_llm_json_object_with_log
+from .rag.telemetry import emit as emit_telemetry
 
 # Feature flag: do not rely on LLM JSON for plan rows by default (safe dual path)
 USE_LLM_JSON = os.getenv("PLAN_V11_USE_LLM_JSON", "false").strip().lower() in ("1", "true", "yes")
@@ -223,8 +226,9 @@ def _apply_tweak_rules(days: List[Dict[str, Any]], tweak_note: Optional[str]) ->
 def assess_tweak(goal: str, tweak_text: str) -> Dict[str, Any]:
     if not tweak_text or not tweak_text.strip():
         return {"verdict": "ok", "rationale": "No tweak provided.", "citations": [], "sources": []}
-    hits = retrieve_snippets({"query": f"{goal}. Consider tweak: {tweak_text}", "evidence": "evidence", "top_k": 6})
-    numbered = render_numbered_snippets([h.get("text", "") for h in hits])
+    retrieved = retrieve_snippets({"query": f"{goal}. Consider tweak: {tweak_text}", "evidence": "evidence", "top_k": 6})
+    hits = pack_snippets(retrieved)  # citations are numbered against the packed list
+    numbered = render_numbered_snippets([h["text"] for h in hits], max_chars=None)
     user = TWEAK_ASSESSOR_USER.format(goal=goal, tweak=tweak_text, snippets=numbered)
     schema = {
         "type": "object",
@@ -242,12 +246,20 @@ def assess_tweak(goal: str, tweak_text: str) -> Dict[str, Any]:
         "tweak": tweak_text,
         "snippet_ids": [h.get("id") for h in hits],
         "prompt_chars": len(user),
+        "snippet_chars": len(numbered),
+        "snippet_chars_raw": sum(len(h.get("text", "")) for h in retrieved),
     }
     out = call_llm_json_object_with_log(f"{TWEAK_ASSESSOR_SYSTEM}\n\n{user}", schema, context) or {}
     out["sources"] = [{"n": i + 1, "chunk_id": h.get("id"), "doc_id": h.get("doc_id")} for i, h in enumerate(hits)]
     return out
 
-def generate_plan_v11(inputs: InputsV11, tweak_note: Optional[str] = None) -> PlanV11:
+def generate_plan_v11(
+    inputs: InputsV11,
+    tweak_note: Optional[str] = None,
+    on_day: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> PlanV11:
+    # on_day: progress hook, called with each LLM canonical_week day as it streams in
+    t0 = time.perf_counter()
     pal_value = PALMAP[inputs.pal_code]
     bmr = bmr_mifflin_st_jeor(inputs.sex, inputs.weight_kg, inputs.height_cm, inputs.age)
     tdee = tdee_from_bmr(bmr, pal_value)
@@ -259,10 +271,9 @@ def generate_plan_v11(inputs: InputsV11, tweak_note: Optional[str] = None) -> Pl
     except Exception as e:
         print(f"[Plan] RAG disabled or failed: {e}")
         snippet_hits = []
-    if snippet_hits:
-        for i, s in enumerate(snippet_hits, 1):
-            print(f"[Sources] [{i}] doc {s.get('doc_id')} · chunk {s.get('id')}")
-    snippets_text = render_snippets_for_v11([s.get("text", "") for s in snippet_hits]) if snippet_hits else "- none"
+    retrieval_ms = (time.perf_counter() - t0) * 1000
+    packed_hits = pack_snippets(snippet_hits)
+    snippets_text = render_snippets_for_v11([s["text"] for s in packed_hits], max_chars=None) if packed_hits else "- none"
 
     # Prompt for canonical week + progression (advisory only; plan rows are deterministic)
     user_prompt = USER_TEMPLATE_V11.format(
@@ -280,14 +291,16 @@ def generate_plan_v11(inputs: InputsV11, tweak_note: Optional[str] = None) -> Pl
         "goal": inputs.goal,
         "days_per_week": getattr(inputs, "days_per_week", None) or 5,
         "retrieval_query": retrieval_query,
-        "snippet_ids": [s.get("id") for s in (snippet_hits or [])],
+        "snippet_ids": [s.get("id") for s in packed_hits],
         "prompt_chars": len(user_prompt),
+        "snippet_chars": len(snippets_text),
+        "snippet_chars_raw": sum(len(s.get("text", "")) for s in snippet_hits),
     }
 
     compact = {}
     if USE_LLM_JSON:
         # Best-effort parse; never required for plan rows
-        compact = call_llm_json_object_with_log(prompt, schema, context) or {}
+        compact = call_llm_json_object_with_log(prompt, schema, context, on_day=on_day) or {}
 
     # Always build deterministically; optionally seed from LLM if available
     canon_days = ((compact.get("canonical_week") or {}).get("days")) or _default_canonical_week(inputs)
@@ -320,6 +333,15 @@ def generate_plan_v11(inputs: InputsV11, tweak_note: Optional[str] = None) -> Pl
         "retrieval_query": retrieval_query,
         "used_llm_for_rows": bool(USE_LLM_JSON and (compact.get("canonical_week") or {}).get("days")),
     }
+    # Sources and timings go to telemetry (plan_{date}.jsonl), not the console
+    emit_telemetry("plan", {
+        "event": "plan_generate",
+        "goal": inputs.goal,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2),
+        "retrieval_ms": round(retrieval_ms, 2),
+        "sources": [{"doc_id": s.get("doc_id"), "chunk_id": s.get("id")} for s in packed_hits],
+        "used_llm_for_rows": plan.extra["used_llm_for_rows"],
+    })
     return plan
 
 # Helpers reused from earlier implementation
@@ -0,0 +1,129 @@
+# src/fitapp_core/rag/bm25.py
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Small English stoplist; the corpus is short technical prose so aggressive filtering isn't needed
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the to was were will with".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    # Single letters carry no signal, single digits do ("5 days/week")
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if (len(t) > 1 or t.isdigit()) and t not in STOPWORDS]
+
+class BM25Index:
+    """
+    In-process Okapi BM25 over a fixed corpus.
+    Postings are CSR arrays (term -> doc ids, precomputed BM25 weights), so scoring a query
+    is one fancy-indexed add per query term into a dense score vector.
+    """
+
+    def __init__(self, texts: Iterable[str], k1: float = 1.2, b: float = 0.75):
+        vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        lengths: List[int] = []
+        for d, text in enumerate(texts):
+            toks = tokenize(text)
+            lengths.append(len(toks))
+            for term, tf in Counter(toks).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(d)
+                tfs.append(tf)
+        self.vocab = vocab
+        self.k1, self.b = k1, b
+        self.n_docs = len(lengths)
+        self.doc_len = np.asarray(lengths, dtype=np.float32)
+
+        t = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(t, kind="stable")
+        self.post_docs = np.asarray(doc_ids, dtype=np.int32)[order]
+        self.post_tf = np.asarray(tfs, dtype=np.float32)[order]
+        self.df = np.bincount(t, minlength=len(vocab)).astype(np.float32)
+        self.post_ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(self.df.astype(np.int64), out=self.post_ptr[1:])
+        self.reweight()
+
+    def corpus_stats(self) -> Tuple[int, float, Dict[str, int]]:
+        """(docs, total tokens, term -> document frequency), to combine with other shards' stats."""
+        return self.n_docs, float(self.doc_len.sum()), dict(zip(self.vocab, self.df.astype(np.int64).tolist()))
+
+    def reweight(self, n_docs: Optional[int] = None, avgdl: Optional[float] = None, df: Optional[Dict[str, int]] = None) -> None:
+        """
+        Compute posting weights from this corpus' statistics, or from corpus-wide ones when this index
+        is one shard of a larger corpus, so scores are comparable across shards.
+        """
+        n = self.n_docs if n_docs is None else n_docs
+        if avgdl is None:
+            avgdl = float(self.doc_len.mean()) if self.n_docs and self.doc_len.sum() > 0 else 1.0
+        term_df = self.df if df is None else np.asarray([df.get(term, 0) for term in self.vocab], dtype=np.float32)
+        idf = np.log1p((n - term_df + 0.5) / (term_df + 0.5)).astype(np.float32)
+        post_idf = np.repeat(idf, self.df.astype(np.int64))
+        norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[self.post_docs] / max(avgdl, 1e-6))
+        self.post_w = (post_idf * self.post_tf * (self.k1 + 1.0) / (self.post_tf + norm)).astype(np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.post_docs.nbytes + self.post_w.nbytes + self.post_tf.nbytes + self.post_ptr.nbytes)
+
+    def scores(self, query: str) -> np.ndarray:
+        out = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            t = self.vocab.get(term)
+            if t is None:
+                continue
+            lo, hi = self.post_ptr[t], self.post_ptr[t + 1]
+            out[self.post_docs[lo:hi]] += self.post_w[lo:hi]  # doc ids are unique within a posting list
+        return out
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, doc ids) among docs matching at least one query term (and `allowed`, if given)."""
+        s = self.scores(query)
+        cand = np.flatnonzero(s)
+        if allowed is not None:
+            cand = np.intersect1d(cand, allowed, assume_unique=True)
+        if cand.size == 0 or k <= 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        cs = s[cand]
+        if k < cand.size:
+            part = np.argpartition(-cs, k - 1)[:k]
+        else:
+            part = np.arange(cand.size)
+        order = part[np.argsort(-cs[part], kind="stable")]
+        return cs[order], cand[order].astype(np.int64)
+
+def rrf_fuse(rankings: List[np.ndarray], k: int, c: float = 60.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Reciprocal rank fusion of ranked id lists -> (fused scores, ids), best first."""
+    fused: Dict[int, float] = {}
+    for ids in rankings:
+        for rank, i in enumerate(ids.tolist()):
+            if i >= 0:
+                fused[i] = fused.get(i, 0.0) + 1.0 / (c + rank + 1)
+    best = sorted(fused.items(), key=lambda kv: -kv[1])[:k]
+    return np.asarray([s for _, s in best], dtype=np.float32), np.asarray([i for i, _ in best], dtype=np.int64)
+
+def weighted_fuse(
+    dense: Tuple[np.ndarray, np.ndarray], lexical: Tuple[np.ndarray, np.ndarray], k: int, alpha: float = 0.5
+) -> Tuple[np.ndarray, np.ndarray]:
+    """alpha * minmax(dense) + (1 - alpha) * minmax(lexical); ids missing from one side score 0 there."""
+    def _minmax(scores: np.ndarray) -> np.ndarray:
+        if scores.size == 0:
+            return scores
+        lo, hi = float(scores.min()), float(scores.max())
+        return np.ones_like(scores) if hi - lo < 1e-12 else (scores - lo) / (hi - lo)
+
+    fused: Dict[int, float] = {}
+    for weight, (scores, ids) in ((alpha, dense), (1.0 - alpha, lexical)):
+        for s, i in zip(_minmax(np.asarray(scores, dtype=np.float32)).tolist(), ids.tolist()):
+            if i >= 0:
+                fused[i] = fused.get(i, 0.0) + weight * s
+    best = sorted(fused.items(), key=lambda kv: -kv[1])[:k]
+    return np.asarray([s for _, s in best], dtype=np.float32), np.asarray([i for i, _ in best], dtype=np.int64)
@@ -0,0 +1,59 @@
+# src/fitapp_core/rag/breaker.py
+from __future__ import annotations
+
+import time
+from typing import Any, Dict
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker: after `failures` failed calls in a row it opens and allow() is False
+    for `cooldown_s`; then one trial call is let through (half-open), which closes it on success
+    or re-opens it for another cool-down on failure. failures <= 0 disables the breaker.
+    """
+
+    def __init__(self, failures: int = 3, cooldown_s: float = 60.0):
+        self.failures = int(failures)
+        self.cooldown_s = float(cooldown_s)
+        self.consecutive = 0
+        self.opened_at: float = 0.0
+        self.trial = False  # a half-open trial call is in flight
+        self.opens = 0
+        self.skipped = 0
+
+    @property
+    def state(self) -> str:
+        if self.failures <= 0 or self.consecutive < self.failures:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown_s:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial:
+            self.trial = True
+            return True
+        self.skipped += 1
+        return False
+
+    def record(self, ok: bool) -> None:
+        self.trial = False
+        if ok:
+            self.consecutive = 0
+            return
+        was_open = self.state == "open"
+        self.consecutive += 1
+        if self.failures > 0 and self.consecutive >= self.failures:
+            if not was_open:
+                self.opens += 1
+            self.opened_at = time.monotonic()  # (re)start the cool-down
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive,
+            "opens": self.opens,
+            "skipped": self.skipped,
+        }
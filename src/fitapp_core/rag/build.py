@@ -0,0 +1,355 @@
+# src/fitapp_core/rag/build.py
+"""
+Incremental index builder: data/processed/chunks.jsonl -> data/index/vN
+
+    python -m fitapp_core.rag.build [--processed data/processed] [--index-root data/index]
+
+Streams chunks.jsonl, hashes each chunk's text and re-embeds only chunks whose hash
+is not in the base version (default: latest vN), in batches. The new version is
+written to a temp dir and renamed into place, so readers never see a partial index.
+
+--shard-by domain writes one shard per domain: tag, --shard-by doc --shards N splits
+doc_ids into N contiguous ranges; each shard is a full index under vN/shards/<name>.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .vectors import SHARDS_FILE, VECTOR_FILES, normalize_rows, write_vectors
+from .versions import latest_version_dir, list_versions, set_current, write_manifest
+
+try:
+    import faiss  # type: ignore
+except ImportError:
+    faiss = None
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+def iter_chunks(chunks_path: Path) -> Iterator[Dict]:
+    with open(chunks_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def _load_base(base_dir: Optional[Path]) -> Dict[str, np.ndarray]:
+    """text_hash -> stored unit vector from a previous build (empty if unusable)."""
+    if base_dir is None:
+        return {}
+    if (base_dir / SHARDS_FILE).exists():
+        known: Dict[str, np.ndarray] = {}
+        for shard in json.loads((base_dir / SHARDS_FILE).read_text(encoding="utf-8"))["shards"]:
+            known.update(_load_base(base_dir / shard["dir"]))
+        return known
+    meta_path = base_dir / "meta.parquet"
+    emb_path = base_dir / VECTOR_FILES["float32"]
+    if not emb_path.exists():
+        emb_path = base_dir / "embeddings.npy"
+    if not meta_path.exists() or not emb_path.exists():
+        return {}
+    try:
+        meta = pd.read_parquet(meta_path)
+        hashes = meta["text_hash"].tolist() if "text_hash" in meta.columns else [text_hash(t) for t in meta["text"].tolist()]
+        emb = np.load(emb_path, mmap_mode="r")
+        if emb.shape[0] != len(hashes):
+            print(f"[RAG-BUILD] base {base_dir} row mismatch; ignoring", file=sys.stderr)
+            return {}
+        return {h: emb[i] for i, h in enumerate(hashes)}
+    except Exception as e:
+        print(f"[RAG-BUILD] base {base_dir} unreadable ({e}); full re-embed", file=sys.stderr)
+        return {}
+
+def _pq_m(dim: int) -> int:
+    # ~8 dims per sub-quantizer, and m must divide dim
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+def make_faiss_index(
+    emb: np.ndarray,
+    index_type: str = "flat",
+    nlist: Optional[int] = None,
+    pq_m: Optional[int] = None,
+    hnsw_m: int = 32,
+    ef_construction: int = 80,
+):
+    """
+    Inner-product FAISS index over unit vectors.
+    flat: exact. ivf / ivfpq: k-means coarse quantizer (nlist ≈ 4·√N), PQ with 8-bit codes.
+    hnsw: graph index, no training. IVF types fall back to flat when N is too small to train.
+    """
+    if faiss is None:
+        raise ImportError("faiss is required for FAISS index construction")
+    n, dim = emb.shape
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"unknown index type: {index_type}")
+    if index_type in ("ivf", "ivfpq"):
+        # k-means wants ~39 training points per centroid (PQ: 256 centroids per sub-quantizer)
+        nlist = min(nlist or int(4 * np.sqrt(n)), n // 39)
+        if nlist < 2 or (index_type == "ivfpq" and n < 39 * 256):
+            print(f"[RAG-BUILD] {n} rows too few to train {index_type}; using flat", file=sys.stderr)
+            index_type = "flat"
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+    else:
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m or _pq_m(dim), 8, faiss.METRIC_INNER_PRODUCT)
+        index.train(emb)
+    index.add(emb)
+    return index
+
+def _shard_name(name: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", name) or "_"
+
+def shard_rows(doc_ids: List[str], tags: List[List[str]], shard_by: str, n_shards: int = 4) -> Dict[str, List[int]]:
+    """
+    Row indices per shard. domain: by a row's first domain: tag (untagged rows go to "_default");
+    doc: doc_ids sorted and cut into n_shards contiguous ranges, so a document never spans shards.
+    """
+    groups: Dict[str, List[int]] = {}
+    if shard_by == "domain":
+        for r, row_tags in enumerate(tags):
+            domain = next((t.split(":", 1)[1] for t in row_tags if str(t).startswith("domain:")), "_default")
+            groups.setdefault(_shard_name(domain), []).append(r)
+    elif shard_by == "doc":
+        docs = sorted({str(d) for d in doc_ids})
+        per = max(1, -(-len(docs) // max(1, n_shards)))
+        shard_of = {d: f"docs-{i // per:03d}" for i, d in enumerate(docs)}
+        for r, d in enumerate(doc_ids):
+            groups.setdefault(shard_of[str(d)], []).append(r)
+    else:
+        raise ValueError(f"unknown shard_by: {shard_by}")
+    return groups
+
+def _tag_values(tags: List[List[str]], prefix: str) -> List[str]:
+    return sorted({str(t).split(":", 1)[1] for row in tags for t in row if str(t).startswith(prefix)})
+
+def _write_index_dir(
+    out_dir: Path,
+    frame: pd.DataFrame,
+    emb: np.ndarray,
+    dtypes: Sequence[str],
+    write_faiss: bool,
+    faiss_opts: Dict,
+) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    frame.to_parquet(out_dir / "meta.parquet")
+    np.save(out_dir / "embeddings.npy", emb)
+    for dtype in dtypes:
+        write_vectors(emb, out_dir, dtype=dtype, normalized=True)
+    if write_faiss and faiss is not None:
+        faiss.write_index(make_faiss_index(emb, **faiss_opts), str(out_dir / "faiss.index"))
+
+def default_encoder(model_name: Optional[str] = None, embedder: Optional[str] = None) -> Encoder:
+    """Encoder for the given embedder kind (default RAG_EMBEDDER); model_name picks the SentenceTransformer."""
+    from .retriever import EMBEDDER, _load_embedder, get_embedder
+
+    kind = embedder or EMBEDDER
+    model = _load_embedder(model_name) if model_name and kind == "sentence-transformers" else get_embedder(kind)
+    return lambda texts: np.asarray(model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+def default_embedder_id(model_name: Optional[str] = None, embedder: Optional[str] = None) -> str:
+    from .retriever import EMBEDDER, embedder_id
+
+    kind = embedder or EMBEDDER
+    return model_name if model_name and kind == "sentence-transformers" else embedder_id(kind)
+
+def build_index(
+    processed_dir: Path,
+    index_root: Path,
+    base_dir: Optional[Path] = None,
+    version: Optional[str] = None,
+    encode: Optional[Encoder] = None,
+    batch_size: int = 256,
+    dtypes: Sequence[str] = ("float32",),
+    write_faiss: bool = True,
+    index_type: str = "flat",
+    nlist: Optional[int] = None,
+    pq_m: Optional[int] = None,
+    hnsw_m: int = 32,
+    shard_by: Optional[str] = None,
+    n_shards: int = 4,
+    embedder_id: Optional[str] = None,
+) -> Path:
+    processed_dir, index_root = Path(processed_dir), Path(index_root)
+    index_root.mkdir(parents=True, exist_ok=True)
+    if base_dir is None:
+        base_dir = latest_version_dir(index_root)
+    if version is None:
+        versions = list_versions(index_root)
+        version = f"v{(versions[-1] + 1) if versions else 1}"
+    out_dir = index_root / version
+    if out_dir.exists():
+        raise FileExistsError(f"{out_dir} already exists")
+
+    t0 = time.perf_counter()
+    if encode is None:
+        encode, embedder_id = default_encoder(), embedder_id or default_embedder_id()
+    known = _load_base(base_dir)
+    if known and embedder_id is not None:
+        # Vectors from another embedder can't be mixed in; indexes without a record predate RAG_EMBEDDER
+        from .retriever import _EMBED_MODEL_NAME
+
+        base_info = json.loads((base_dir / "build.json").read_text(encoding="utf-8")) if (base_dir / "build.json").exists() else {}
+        base_embedder = base_info.get("embedder") or _EMBED_MODEL_NAME
+        if base_embedder != embedder_id:
+            print(f"[RAG-BUILD] base {base_dir.name} built with {base_embedder}; full re-embed with {embedder_id}", file=sys.stderr)
+            known = {}
+
+    ids: List[str] = []
+    doc_ids: List[str] = []
+    texts: List[str] = []
+    tags: List[List[str]] = []
+    hashes: List[str] = []
+    rows: List[Optional[np.ndarray]] = []
+    pending: Dict[str, List[int]] = {}  # hash -> rows waiting for this text's vector
+    pending_texts: List[str] = []
+    embedded = 0
+
+    def flush() -> None:
+        nonlocal embedded
+        if not pending_texts:
+            return
+        vecs = normalize_rows(encode(pending_texts))
+        for text, vec in zip(pending_texts, vecs):
+            h = text_hash(text)
+            known[h] = vec
+            for r in pending.pop(h):
+                rows[r] = vec
+        embedded += len(pending_texts)
+        pending_texts.clear()
+
+    for chunk in iter_chunks(processed_dir / "chunks.jsonl"):
+        text = chunk.get("text") or ""
+        h = text_hash(text)
+        ids.append(chunk.get("id"))
+        doc_ids.append(chunk.get("doc_id"))
+        texts.append(text)
+        tags.append(list(chunk.get("tags") or []))
+        hashes.append(h)
+        rows.append(known.get(h))
+        if rows[-1] is None:
+            if h not in pending:
+                pending[h] = []
+                pending_texts.append(text)
+            pending[h].append(len(rows) - 1)
+            if len(pending_texts) >= batch_size:
+                flush()
+    flush()
+
+    if not rows:
+        raise ValueError(f"no chunks in {processed_dir / 'chunks.jsonl'}")
+    emb = np.stack(rows).astype(np.float32)
+
+    tmp_dir = index_root / f".{version}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    try:
+        frame = pd.DataFrame({"id": ids, "doc_id": doc_ids, "text": texts, "tags": tags, "text_hash": hashes})
+        faiss_opts = {"index_type": index_type, "nlist": nlist, "pq_m": pq_m, "hnsw_m": hnsw_m}
+        shards: List[Dict] = []
+        if shard_by:
+            for name, members in sorted(shard_rows(doc_ids, tags, shard_by, n_shards).items()):
+                shard_tags = [tags[r] for r in members]
+                _write_index_dir(tmp_dir / "shards" / name, frame.iloc[members].reset_index(drop=True),
+                                 emb[members], dtypes, write_faiss, faiss_opts)
+                shards.append({
+                    "name": name,
+                    "dir": f"shards/{name}",
+                    "rows": len(members),
+                    "domains": _tag_values(shard_tags, "domain:"),
+                    "evidence": _tag_values(shard_tags, "evidence:"),
+                })
+            with open(tmp_dir / SHARDS_FILE, "w", encoding="utf-8") as f:
+                json.dump({"shard_by": shard_by, "shards": shards}, f, indent=2)
+        else:
+            _write_index_dir(tmp_dir, frame, emb, dtypes, write_faiss, faiss_opts)
+        info = {
+            "version": version,
+            "base": base_dir.name if base_dir is not None else None,
+            "rows": len(rows),
+            "dim": int(emb.shape[1]),
+            "embedder": embedder_id,
+            "index_type": index_type if write_faiss and faiss is not None else None,
+            "shards": len(shards) or None,
+            "reused": len(rows) - embedded,
+            "embedded": embedded,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "elapsed_ms": int((time.perf_counter() - t0) * 1000),
+        }
+        with open(tmp_dir / "build.json", "w", encoding="utf-8") as f:
+            json.dump(info, f, indent=2)
+        write_manifest(tmp_dir, version, len(rows))  # last: checksums cover every file above
+        os.rename(tmp_dir, out_dir)  # atomic on the same filesystem
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    print(f"[RAG-BUILD] {out_dir}: {info['rows']} rows, {embedded} embedded, {info['reused']} reused", file=sys.stderr)
+    return out_dir
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--processed", type=Path, default=Path("data/processed"))
+    ap.add_argument("--index-root", type=Path, default=Path("data/index"))
+    ap.add_argument("--base", type=Path, default=None, help="version dir to reuse vectors from (default: latest)")
+    ap.add_argument("--version", default=None, help="output version name (default: next vN)")
+    ap.add_argument("--batch-size", type=int, default=256)
+    ap.add_argument("--model", default=None, help="SentenceTransformer model name")
+    ap.add_argument("--embedder", default=None, help="embedder kind (default: RAG_EMBEDDER, e.g. sentence-transformers, hashing)")
+    ap.add_argument("--dtype", action="append", choices=sorted(VECTOR_FILES), help="pre-normalized vector files to write (default: float32)")
+    ap.add_argument("--no-faiss", action="store_true")
+    ap.add_argument("--index-type", choices=INDEX_TYPES, default="flat", help="FAISS index: exact flat, IVF-Flat, IVF-PQ or HNSW")
+    ap.add_argument("--nlist", type=int, default=None, help="IVF lists (default ≈ 4·√N)")
+    ap.add_argument("--pq-m", type=int, default=None, help="IVF-PQ sub-quantizers (must divide dim)")
+    ap.add_argument("--hnsw-m", type=int, default=32)
+    ap.add_argument("--shard-by", choices=("domain", "doc"), default=None, help="write a sharded index")
+    ap.add_argument("--shards", type=int, default=4, help="shard count for --shard-by doc")
+    ap.add_argument("--promote", action="store_true", help="point index-root/current at the new version")
+    args = ap.parse_args(argv)
+    out_dir = build_index(
+        args.processed,
+        args.index_root,
+        base_dir=args.base,
+        version=args.version,
+        encode=default_encoder(args.model, args.embedder),
+        embedder_id=default_embedder_id(args.model, args.embedder),
+        batch_size=args.batch_size,
+        dtypes=args.dtype or ["float32"],
+        write_faiss=not args.no_faiss,
+        index_type=args.index_type,
+        nlist=args.nlist,
+        pq_m=args.pq_m,
+        hnsw_m=args.hnsw_m,
+        shard_by=args.shard_by,
+        n_shards=args.shards,
+    )
+    if args.promote:
+        set_current(args.index_root, out_dir.name)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+# src/fitapp_core/rag/columns.py
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+def _as_list(v: Any) -> List[Any]:
+    # parquet round-trips list columns as ndarrays; jsonl gives lists; missing values are None/NaN
+    if v is None or isinstance(v, float):
+        return []
+    return list(v)
+
+class ChunkColumns:
+    """
+    Chunk metadata held as flat columns instead of a DataFrame:
+    ids / doc_ids as object arrays, all texts in one string with an offset table,
+    and tags as CSR codes (tag_ptr, tag_codes) into tag_names.
+    Hit assembly is fancy indexing; text is only sliced out for the rows actually returned.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        doc_ids: np.ndarray,
+        text_blob: str,
+        text_offsets: np.ndarray,
+        tag_names: List[str],
+        tag_ptr: np.ndarray,
+        tag_codes: np.ndarray,
+    ):
+        self.ids = ids
+        self.doc_ids = doc_ids
+        self.text_blob = text_blob
+        self.text_offsets = text_offsets
+        self.tag_names = tag_names
+        self.tag_ptr = tag_ptr
+        self.tag_codes = tag_codes
+        self._nbytes: Optional[int] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ChunkColumns":
+        n = len(df)
+        none = np.full(n, None, dtype=object)
+        ids = df["id"].to_numpy(dtype=object) if "id" in df.columns else none
+        doc_ids = df["doc_id"].to_numpy(dtype=object) if "doc_id" in df.columns else none.copy()
+        texts = [t if isinstance(t, str) else "" for t in (df["text"] if "text" in df.columns else [""] * n)]
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in texts], out=offsets[1:])
+        vocab: Dict[str, int] = {}
+        counts = np.zeros(n, dtype=np.int64)
+        codes: List[int] = []
+        for r, tags in enumerate(df["tags"] if "tags" in df.columns else [None] * n):
+            row = _as_list(tags)
+            counts[r] = len(row)
+            codes.extend(vocab.setdefault(str(t), len(vocab)) for t in row)
+        ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=ptr[1:])
+        return cls(ids, doc_ids, "".join(texts), offsets, list(vocab), ptr, np.asarray(codes, dtype=np.int32))
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def tag_vocab(self) -> Dict[str, int]:
+        return {t: i for i, t in enumerate(self.tag_names)}
+
+    def tag_matrix(self) -> np.ndarray:
+        """Boolean (rows × tags) matrix, column-major so per-tag columns are contiguous."""
+        n = len(self)
+        matrix = np.zeros((n, len(self.tag_names)), dtype=bool, order="F")
+        rows = np.repeat(np.arange(n), np.diff(self.tag_ptr))
+        matrix[rows, self.tag_codes] = True
+        return matrix
+
+    def text(self, i: int) -> str:
+        return self.text_blob[self.text_offsets[i]:self.text_offsets[i + 1]]
+
+    def tags(self, i: int) -> List[str]:
+        return [self.tag_names[c] for c in self.tag_codes[self.tag_ptr[i]:self.tag_ptr[i + 1]].tolist()]
+
+    def records(self, rows: np.ndarray, scores: Sequence[float]) -> List[Dict[str, Any]]:
+        rows = np.asarray(rows, dtype=np.int64)
+        ids = self.ids[rows].tolist()
+        doc_ids = self.doc_ids[rows].tolist()
+        return [
+            {"id": ids[j], "doc_id": doc_ids[j], "text": self.text(i), "tags": self.tags(i), "score": float(scores[j])}
+            for j, i in enumerate(rows.tolist())
+        ]
+
+    def nbytes(self) -> int:
+        if self._nbytes is None:
+            objs = sum(sys.getsizeof(x) for x in self.ids.tolist()) + sum(sys.getsizeof(x) for x in self.doc_ids.tolist())
+            arrays = self.ids.nbytes + self.doc_ids.nbytes + self.text_offsets.nbytes + self.tag_ptr.nbytes + self.tag_codes.nbytes
+            self._nbytes = int(objs + arrays + sys.getsizeof(self.text_blob))
+        return self._nbytes
@@ -0,0 +1,128 @@
+# src/fitapp_core/rag/embed_cache.py
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Max query vectors kept in memory; 0 disables the cache
+QUERY_CACHE_SIZE = int(os.getenv("RAG_QUERY_CACHE_SIZE", "1024"))
+# Optional SQLite sidecar (e.g. data/index/query_cache.sqlite); unset keeps the cache in-memory only
+QUERY_CACHE_PATH = os.getenv("RAG_QUERY_CACHE_PATH") or None
+
+def normalize_query(text: str) -> str:
+    return " ".join((text or "").split())
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU of query vectors keyed on (model name, normalized query text).
+    With a path, vectors are also written to SQLite and the most recent ones warm the LRU on startup.
+    Cached arrays are read-only so callers can't mutate shared entries.
+    """
+
+    def __init__(self, capacity: int = QUERY_CACHE_SIZE, path: Optional[str] = QUERY_CACHE_PATH):
+        self.capacity = max(0, int(capacity))
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.warmed = 0
+        if self.path is not None and self.capacity > 0:
+            self._open_db()
+
+    def _open_db(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS qvec ("
+                " model TEXT NOT NULL, text TEXT NOT NULL, dim INTEGER NOT NULL,"
+                " vec BLOB NOT NULL, ts REAL DEFAULT (julianday('now')),"
+                " PRIMARY KEY (model, text))"
+            )
+            db.commit()
+            self._db = db
+            rows = db.execute(
+                "SELECT model, text, dim, vec FROM qvec ORDER BY ts DESC LIMIT ?", (self.capacity,)
+            ).fetchall()
+            for model, text, dim, blob in reversed(rows):
+                vec = np.frombuffer(blob, dtype=np.float32)
+                if vec.size == dim:
+                    self._lru[(model, text)] = vec  # frombuffer arrays are already read-only
+            self.warmed = len(rows)
+            print(f"[RAG] Query cache warmed with {self.warmed} vectors from {self.path}", file=sys.stderr)
+        except Exception as e:
+            print(f"[RAG] Query cache persistence disabled ({e})", file=sys.stderr)
+            self._db = None
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        if self.capacity == 0:
+            return None
+        key = (model, normalize_query(text))
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, model: str, text: str, vec: np.ndarray) -> np.ndarray:
+        vec = np.array(vec, dtype=np.float32).ravel()
+        vec.setflags(write=False)
+        if self.capacity == 0:
+            return vec
+        key = (model, normalize_query(text))
+        with self._lock:
+            self._lru[key] = vec
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.capacity:
+                self._lru.popitem(last=False)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO qvec (model, text, dim, vec) VALUES (?, ?, ?, ?)",
+                        (key[0], key[1], int(vec.size), vec.tobytes()),
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    print(f"[RAG] Query cache write failed: {e}", file=sys.stderr)
+        return vec
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._lru),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "warmed": self.warmed,
+            "path": str(self.path) if self._db is not None else None,
+        }
+
+_CACHE: Optional[QueryEmbeddingCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def get_query_cache() -> QueryEmbeddingCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = QueryEmbeddingCache()
+    return _CACHE
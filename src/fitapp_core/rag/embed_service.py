@@ -0,0 +1,441 @@
+# src/fitapp_core/rag/embed_service.py
+"""
+Shared embedding service: one process loads the SentenceTransformer, app workers send encode requests.
+
+    python -m fitapp_core.rag.embed_service            # socket in $XDG_RUNTIME_DIR/fitapp-embed/
+
+Workers use it when RAG_EMBED_SOCKET points at the socket; otherwise (or when it is unreachable)
+RAGStore loads the model in-process as before. Requests arriving within --max-wait-ms of each other
+are merged into one model.encode call of up to --max-batch texts.
+
+The socket must live in a private (0700, same owner) directory. Both sides prove knowledge of a shared
+secret (RAG_EMBED_AUTHKEY, or one the service generates into <socket>.key, mode 0600) with an HMAC
+challenge in each direction. Frames are length-prefixed JSON, vectors are .npy buffers loaded with
+allow_pickle=False: nothing received is ever unpickled.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import io
+import json
+import os
+import queue
+import secrets
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Unix socket of a running embed service; unset keeps embedding in-process
+EMBED_SOCKET = os.getenv("RAG_EMBED_SOCKET") or None
+# Shared handshake secret; when unset the service generates one into <socket>.key for same-user clients
+EMBED_AUTHKEY = os.getenv("RAG_EMBED_AUTHKEY", "")
+# Client-side wait for a reply before falling back to in-process encoding
+EMBED_TIMEOUT_S = float(os.getenv("RAG_EMBED_TIMEOUT_S", "30"))
+
+_FRAME = struct.Struct("!I")
+_MAX_FRAME = 256 * 1024 * 1024
+_NONCE_BYTES = 32
+_HANDSHAKE_TIMEOUT_S = 5.0
+
+class EmbedServiceError(RuntimeError):
+    pass
+
+def default_socket_path() -> str:
+    base = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    name = "fitapp-embed" if os.getenv("XDG_RUNTIME_DIR") else f"fitapp-embed-{os.getuid()}"
+    return os.path.join(base, name, "embed.sock")
+
+def _key_path(address: str) -> str:
+    return address + ".key"
+
+def _ensure_private_dir(address: str) -> None:
+    """Create the socket's directory 0700, or refuse one other users could write to or read."""
+    parent = os.path.dirname(os.path.abspath(address))
+    os.makedirs(parent, mode=0o700, exist_ok=True)
+    st = os.lstat(parent)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise EmbedServiceError(f"{parent} must be a directory owned by this user with mode 0700")
+
+def load_authkey(address: str) -> Optional[bytes]:
+    """RAG_EMBED_AUTHKEY, else the key the service wrote next to its socket; None if neither exists."""
+    if EMBED_AUTHKEY:
+        return EMBED_AUTHKEY.encode("utf-8")
+    try:
+        with open(_key_path(address), "rb") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def _write_authkey(address: str) -> bytes:
+    key = secrets.token_hex(32).encode("ascii")
+    path = _key_path(address)
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+def _mac(key: bytes, role: bytes, nonce: bytes) -> bytes:
+    # role-bound so a peer can't reflect the other side's challenge back
+    return hmac.new(key, role + nonce, hashlib.sha256).digest()
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise EOFError("connection closed")
+        buf += chunk
+    return bytes(buf)
+
+def _send_frame(sock: socket.socket, data: bytes) -> None:
+    sock.sendall(_FRAME.pack(len(data)) + data)
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (n,) = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    if n > _MAX_FRAME:
+        raise EmbedServiceError(f"frame of {n} bytes exceeds the {_MAX_FRAME} byte limit")
+    return _recv_exact(sock, n)
+
+def _send_json(sock: socket.socket, obj: Dict[str, Any]) -> None:
+    _send_frame(sock, json.dumps(obj).encode("utf-8"))
+
+def _recv_json(sock: socket.socket) -> Dict[str, Any]:
+    obj = json.loads(_recv_frame(sock))
+    if not isinstance(obj, dict):
+        raise EmbedServiceError("malformed message")
+    return obj
+
+def _array_bytes(arr: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, np.ascontiguousarray(arr, dtype=np.float32), allow_pickle=False)
+    return buf.getvalue()
+
+def _array_from(data: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+def _is_live(address: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        probe.settimeout(1.0)
+        try:
+            probe.connect(address)
+            return True
+        except OSError:
+            return False
+
+def _shutdown(sock: socket.socket) -> None:
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+class _Pending:
+    __slots__ = ("texts", "done", "result", "error")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+
+class EmbedServer:
+    """
+    Serves {"op": "encode", "model": ..., "texts": [...]} requests on a Unix socket.
+    One thread per connection enqueues requests; a single batcher thread drains the queue
+    into micro-batches, de-duplicates texts and runs one encode per batch.
+    authkey=None uses RAG_EMBED_AUTHKEY, or generates a key into <socket>.key.
+    """
+
+    def __init__(self, address: str, model: Any, model_name: str, authkey: Optional[bytes] = None,
+                 max_batch: int = 64, max_wait_ms: float = 5.0):
+        self.address = address
+        self.model = model
+        self.model_name = model_name
+        self.authkey = authkey
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._listener: Optional[socket.socket] = None
+        self._inode: Optional[int] = None
+        self._stop = threading.Event()
+        self._conns: "set[socket.socket]" = set()
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+
+    def start(self) -> "EmbedServer":
+        _ensure_private_dir(self.address)
+        if os.path.exists(self.address):
+            if _is_live(self.address):
+                raise EmbedServiceError(f"an embed service is already listening on {self.address}")
+            if not stat.S_ISSOCK(os.lstat(self.address).st_mode):
+                raise EmbedServiceError(f"{self.address} exists and is not a socket")
+            os.unlink(self.address)  # stale socket from a previous run
+        if self.authkey is None:
+            self.authkey = EMBED_AUTHKEY.encode("utf-8") if EMBED_AUTHKEY else _write_authkey(self.address)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.address)
+        os.chmod(self.address, 0o600)
+        listener.listen(64)
+        listener.settimeout(0.5)  # lets the accept loop notice stop()
+        self._inode = os.lstat(self.address).st_ino
+        self._listener = listener
+        threading.Thread(target=self._batch_loop, name="embed-batcher", daemon=True).start()
+        threading.Thread(target=self._accept_loop, name="embed-accept", daemon=True).start()
+        print(f"[RAG] Embed service listening on {self.address} ({self.model_name})", file=sys.stderr)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._queue.put(None)
+        if self._listener is not None:
+            try:
+                self._listener.close()
+            except OSError:
+                pass
+        for conn in list(self._conns):
+            _shutdown(conn)  # wakes the serving thread; clients see EOF and fall back
+        try:
+            if os.lstat(self.address).st_ino == self._inode:  # never remove another server's socket
+                os.unlink(self.address)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_texts": round(self.texts / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                if self._stop.is_set():
+                    return
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _handshake(self, conn: socket.socket) -> bool:
+        conn.settimeout(_HANDSHAKE_TIMEOUT_S)
+        challenge = secrets.token_bytes(_NONCE_BYTES)
+        _send_frame(conn, challenge)
+        reply = _recv_frame(conn)  # client MAC + client challenge
+        if len(reply) != 32 + _NONCE_BYTES or not hmac.compare_digest(reply[:32], _mac(self.authkey, b"client", challenge)):
+            return False
+        _send_frame(conn, _mac(self.authkey, b"server", reply[32:]))
+        conn.settimeout(None)
+        return True
+
+    def _serve(self, conn: socket.socket) -> None:
+        self._conns.add(conn)
+        try:
+            if self._handshake(conn):
+                self._serve_conn(conn)
+        except (EOFError, OSError, EmbedServiceError, ValueError):
+            pass  # failed handshake, bad frame or a client that went away
+        finally:
+            self._conns.discard(conn)
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _serve_conn(self, conn: socket.socket) -> None:
+        while not self._stop.is_set():
+            try:
+                request = _recv_json(conn)
+            except (EOFError, OSError):
+                return
+            op, model, texts = request.get("op"), request.get("model"), request.get("texts")
+            if op == "stats":
+                _send_json(conn, {"status": "ok", "stats": self.stats()})
+                continue
+            if op != "encode" or model != self.model_name or not isinstance(texts, list):
+                _send_json(conn, {"status": "error", "error": f"unsupported request {op!r} for model {model!r}"})
+                continue
+            pending = _Pending([str(t) for t in texts])
+            self._queue.put(pending)
+            pending.done.wait()
+            if pending.error:
+                _send_json(conn, {"status": "error", "error": pending.error})
+            else:
+                _send_json(conn, {"status": "ok"})
+                _send_frame(conn, _array_bytes(pending.result))
+
+    def _batch_loop(self) -> None:
+        while not self._stop.is_set():
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            size = len(first.texts)
+            deadline = time.monotonic() + self.max_wait_s
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._stop.set()
+                    break
+                batch.append(item)
+                size += len(item.texts)
+            self._run(batch)
+
+    def _run(self, batch: List[_Pending]) -> None:
+        unique: Dict[str, int] = {}
+        for p in batch:
+            for t in p.texts:
+                unique.setdefault(t, len(unique))
+        try:
+            vecs = np.asarray(self.model.encode(list(unique), normalize_embeddings=True), dtype=np.float32)
+            for p in batch:
+                p.result = vecs[[unique[t] for t in p.texts]] if p.texts else np.zeros((0, vecs.shape[1]), dtype=np.float32)
+        except Exception as e:
+            for p in batch:
+                p.error = f"{type(e).__name__}: {e}"
+        self.requests += len(batch)
+        self.batches += 1
+        self.texts += len(unique)
+        for p in batch:
+            p.done.set()
+
+class RemoteEmbedder:
+    """
+    Client with the SentenceTransformer.encode call shape used by RAGStore.
+    One connection per calling thread, so concurrent queries reach the server's batcher together.
+    The server must prove it holds the same key before any reply is read.
+    """
+
+    def __init__(self, address: str, model_name: str, authkey: Optional[bytes] = None, timeout_s: float = EMBED_TIMEOUT_S):
+        self.address = address
+        self.model_name = model_name
+        self.authkey = authkey
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        key = self.authkey or load_authkey(self.address)
+        if not key:
+            raise EmbedServiceError(f"no key for {self.address} (set RAG_EMBED_AUTHKEY)")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(_HANDSHAKE_TIMEOUT_S)
+            sock.connect(self.address)
+            challenge = _recv_frame(sock)
+            mine = secrets.token_bytes(_NONCE_BYTES)
+            _send_frame(sock, _mac(key, b"client", challenge) + mine)
+            if not hmac.compare_digest(_recv_frame(sock), _mac(key, b"server", mine)):
+                raise EmbedServiceError("server failed authentication")
+            sock.settimeout(self.timeout_s)
+            return sock
+        except Exception:
+            sock.close()
+            raise
+
+    def _conn(self) -> socket.socket:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                conn = self._connect()
+            except EmbedServiceError:
+                raise
+            except Exception as e:
+                raise EmbedServiceError(f"embed service unreachable at {self.address}: {e}") from e
+            self._local.conn = conn
+        return conn
+
+    def _drop(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _call(self, request: Dict[str, Any], array: bool = False) -> Any:
+        conn = self._conn()
+        try:
+            _send_json(conn, request)
+            reply = _recv_json(conn)
+            data = _recv_frame(conn) if array and reply.get("status") == "ok" else b""
+        except socket.timeout as e:
+            self._drop()
+            raise EmbedServiceError(f"embed service timed out after {self.timeout_s}s") from e
+        except EmbedServiceError:
+            self._drop()
+            raise
+        except (EOFError, OSError, ValueError) as e:
+            self._drop()
+            raise EmbedServiceError(f"embed service connection lost: {e}") from e
+        if reply.get("status") != "ok":
+            raise EmbedServiceError(str(reply.get("error")))  # request-level error; the connection stays usable
+        return _array_from(data) if array else reply
+
+    def encode(self, texts: List[str], normalize_embeddings: bool = True) -> np.ndarray:
+        return self._call({"op": "encode", "model": self.model_name, "texts": [str(t) for t in texts]}, array=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._call({"op": "stats"})["stats"]
+
+def connect_embedder(model_name: str, address: Optional[str] = None) -> Optional[RemoteEmbedder]:
+    """RemoteEmbedder for the configured socket, or None when no service is configured or reachable."""
+    address = address or EMBED_SOCKET
+    if not address or not os.path.exists(address):
+        return None
+    remote = RemoteEmbedder(address, model_name)
+    try:
+        remote._conn()
+    except EmbedServiceError as e:
+        print(f"[RAG] {e}; embedding in-process", file=sys.stderr)
+        return None
+    print(f"[RAG] Using embed service at {address}", file=sys.stderr)
+    return remote
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .retriever import _EMBED_MODEL_NAME, _load_embedder
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--socket", default=EMBED_SOCKET or default_socket_path(), help="path in a private (0700) directory")
+    ap.add_argument("--model", default=_EMBED_MODEL_NAME)
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = ap.parse_args(argv)
+    try:
+        server = EmbedServer(args.socket, _load_embedder(args.model), args.model,
+                             max_batch=args.max_batch, max_wait_ms=args.max_wait_ms).start()
+    except EmbedServiceError as e:
+        print(f"[RAG] Embed service not started: {e}", file=sys.stderr)
+        return 1
+    try:
+        while True:
+            time.sleep(60)
+            print(f"[RAG] Embed service stats: {server.stats()}", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+# src/fitapp_core/rag/embedders.py
+from __future__ import annotations
+
+import hashlib
+from typing import List, Protocol, Sequence
+
+import numpy as np
+
+from .bm25 import tokenize
+
+class Embedder(Protocol):
+    """What RAGStore and the index builder need from an embedder (SentenceTransformer-compatible)."""
+
+    def encode(self, texts: Sequence[str], normalize_embeddings: bool = True) -> np.ndarray: ...
+
+# Odd 64-bit multipliers: each derives one (bucket, sign) pair from a feature hash
+_MULTIPLIERS = np.array(
+    [0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93],
+    dtype=np.uint64,
+)
+
+class HashingEmbedder:
+    """
+    Model-free embedder: word unigrams, word bigrams and character trigrams are hashed
+    (blake2b) and each feature is added as a sparse signed random projection (4 ±1 entries)
+    into `dim` buckets, then the vector is L2-normalized. Needs only numpy; no download, no warm-up.
+    Vectors are only comparable with indexes built by the same (dim, seed), see `id`.
+    """
+
+    version = 1
+
+    def __init__(self, dim: int = 384, seed: int = 0, char_ngrams: int = 3, char_weight: float = 0.5):
+        self.dim = int(dim)
+        self.seed = int(seed)
+        self.char_ngrams = int(char_ngrams)
+        self.char_weight = float(char_weight)
+        self._key = self.seed.to_bytes(8, "little")
+
+    @property
+    def id(self) -> str:
+        return f"hashing-v{self.version}-d{self.dim}-s{self.seed}"
+
+    def _features(self, text: str) -> tuple:
+        words = tokenize(text)
+        feats: List[str] = [f"w:{w}" for w in words]
+        feats += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        n_word = len(feats)
+        n = self.char_ngrams
+        if n > 0:
+            for w in words:
+                padded = f"#{w}#"
+                feats += [f"c:{padded[i:i + n]}" for i in range(max(1, len(padded) - n + 1))]
+        weights = np.ones(len(feats), dtype=np.float32)
+        weights[n_word:] = self.char_weight
+        return feats, weights
+
+    def _hashes(self, feats: List[str]) -> np.ndarray:
+        return np.fromiter(
+            (int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8, key=self._key).digest(), "little") for f in feats),
+            dtype=np.uint64,
+            count=len(feats),
+        )
+
+    def encode(self, texts: Sequence[str], normalize_embeddings: bool = True) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            feats, weights = self._features(text or "")
+            if not feats:
+                continue
+            mixed = self._hashes(feats)[:, None] * _MULTIPLIERS[None, :]  # (F, 4), wraps mod 2^64
+            buckets = ((mixed >> np.uint64(32)) % np.uint64(self.dim)).astype(np.int64)
+            signs = np.where((mixed >> np.uint64(31)) & np.uint64(1), 1.0, -1.0).astype(np.float32)
+            np.add.at(out[i], buckets.ravel(), (signs * weights[:, None]).ravel())
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True) + 1e-12
+        return out
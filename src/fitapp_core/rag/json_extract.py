@@ -0,0 +1,119 @@
+# src/fitapp_core/rag/json_extract.py
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+# Next significant character outside strings, inside "...", inside '...' and inside “...”
+_OUTSIDE = re.compile(r"[{}\[\],:\"'“”]")
+_IN_DOUBLE = re.compile(r'["\\]')
+_IN_SINGLE = re.compile(r"['\"\\]")
+_IN_CURLY = re.compile(r'[“”"\\]')
+
+# Bare words models emit in place of JSON literals
+_LITERALS = {"True": "true", "False": "false", "None": "null", "NaN": "null", "undefined": "null"}
+
+# Closed spans tried per bracket kind (prose like "use {x}" can precede the real object)
+_MAX_STARTS = 4
+
+def _bare(segment: str) -> str:
+    word = segment.strip()
+    return _LITERALS.get(word, word)
+
+def _normalize_from(text: str, start: int) -> Tuple[Optional[str], int]:
+    """
+    Rewrite the bracketed value starting at text[start] as strict JSON in one left-to-right pass:
+    single- and curly-quoted strings become double-quoted, trailing commas are dropped and
+    Python-style literals mapped. Returns (json text, end offset), or (None, -1) if it never closes.
+    """
+    out: List[str] = []
+    depth = 0
+    pos = start
+    pending_comma = False
+    n = len(text)
+    while pos < n:
+        m = _OUTSIDE.search(text, pos)
+        if m is None:
+            return None, -1
+        i = m.start()
+        ch = text[i]
+        bare = _bare(text[pos:i])
+        if bare:
+            if pending_comma:
+                out.append(",")
+                pending_comma = False
+            out.append(bare)
+        pos = i + 1
+        if ch == ",":
+            pending_comma = True  # emitted only if another value follows
+            continue
+        if ch in "}]":
+            pending_comma = False
+            out.append(ch)
+            depth -= 1
+            if depth == 0:
+                return "".join(out), i
+            continue
+        if pending_comma:
+            out.append(",")
+            pending_comma = False
+        if ch in "{[":
+            depth += 1
+            out.append(ch)
+        elif ch == ":":
+            out.append(":")
+        else:
+            # String: copy its body, re-escaping for the double-quoted form
+            pattern = _IN_DOUBLE if ch == '"' else _IN_SINGLE if ch == "'" else _IN_CURLY
+            closers = '"' if ch == '"' else "'" if ch == "'" else "”“\""
+            out.append('"')
+            while True:
+                s = pattern.search(text, pos)
+                if s is None:
+                    return None, -1
+                j = s.start()
+                sc = text[j]
+                out.append(text[pos:j])
+                if sc == "\\":
+                    nxt = text[j + 1 : j + 2]
+                    # \' is not a JSON escape; everything else passes through
+                    out.append("'" if nxt == "'" else "\\" + nxt)
+                    pos = j + 2
+                elif sc in closers:
+                    out.append('"')
+                    pos = j + 1
+                    break
+                else:
+                    out.append('\\"')  # a double quote inside a single/curly-quoted string
+                    pos = j + 1
+    return None, -1
+
+def _first(text: str, open_ch: str, stop: int = -1) -> Optional[Any]:
+    # stop: ignore candidates starting at or after this offset (-1: no limit)
+    start = text.find(open_ch)
+    for _ in range(_MAX_STARTS):
+        if start == -1 or (stop != -1 and start >= stop):
+            return None
+        candidate, end = _normalize_from(text, start)
+        if candidate is None:
+            return None  # never closes (truncated): later starts are nested inside it
+        try:
+            return json.loads(candidate, strict=False)  # strict=False: raw newlines/tabs in strings
+        except ValueError:
+            start = text.find(open_ch, end + 1)  # resume after the rejected span: stays linear
+    return None
+
+def extract_json(text: str) -> Optional[Any]:
+    """
+    First complete JSON object in free-form model output (fences and prose around it are ignored),
+    else the first complete array; None if neither parses.
+    """
+    if not text:
+        return None
+    obj = _first(text, "{")
+    if isinstance(obj, dict):
+        return obj
+    # Arrays inside a failed (e.g. truncated) object are fragments, not the answer
+    arr = _first(text, "[", stop=text.find("{"))
+    return arr if isinstance(arr, list) else None
@@ -0,0 +1,138 @@
+# src/fitapp_core/rag/json_stream.py
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+# Characters that can change scanner state; everything else is skipped by the regex
+_SPECIAL = re.compile(r'[{}\[\]",\\]')
+
+class JSONObjectScanner:
+    """
+    Incremental balanced-brace scanner for a streamed completion.
+    feed() text chunks as they arrive; `done` turns True once a top-level {...} that parses as JSON
+    closes, so the caller can stop reading (prose or fences after the object are never consumed).
+    Braced prose ("Plan for {goal=x}:") is skipped. A valid object that follows prose outside a
+    ``` fence is only kept as a fallback (object_text once the stream ends): a fenced block may follow.
+    Array elements completed under `watch` (a key path, e.g. ("canonical_week", "days"))
+    are returned by feed() as parsed objects while the rest of the object is still streaming.
+    """
+
+    def __init__(self, watch: Optional[Sequence[str]] = None):
+        self.watch = tuple(watch) if watch else None
+        self._buf: List[str] = []
+        self._text = ""
+        self._pos = 0  # offset of the next unscanned character
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        self._fallback: Optional[Tuple[int, int]] = None  # (start, end) of an unfenced object after prose
+        # Frames: [kind "{" or "[", current key, expecting key, element start offset]
+        self._stack: List[list] = []
+        self._in_str = False
+        self._str_start = 0
+        self._escape_at = -1
+        self._last_str: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.end is not None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        if self._buf:
+            self._text += "".join(self._buf)
+            self._buf = []
+        return self._text
+
+    @property
+    def object_text(self) -> Optional[str]:
+        """The accepted top-level object once done, else the fallback object (if any) or None."""
+        if self.done:
+            return self.text[self.start : self.end + 1]
+        if self._fallback is not None:
+            return self.text[self._fallback[0] : self._fallback[1] + 1]
+        return None
+
+    def _accept(self, text: str, start: int, end: int) -> bool:
+        try:
+            json.loads(text[start : end + 1])
+        except ValueError:
+            return False  # braces in prose (or a malformed object: the final parse repairs it from text)
+        if text.count("```", 0, start) % 2 or not text[:start].strip():
+            return True  # inside a fence, or nothing before it
+        if self._fallback is None:
+            self._fallback = (start, end)
+        return False
+
+    def _path(self) -> Tuple[str, ...]:
+        return tuple(f[1] for f in self._stack if f[0] == "{" and f[1] is not None)
+
+    def _element_done(self, start: int, end: int, out: List[Any]) -> None:
+        parent = self._stack[-1] if self._stack else None
+        if parent is None or parent[0] != "[" or self._path() != self.watch:
+            return
+        try:
+            out.append(json.loads(self._text[start : end + 1]))
+        except ValueError:
+            pass  # malformed element: the final parse (with repair) still sees it
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Scan one chunk; returns watched elements completed by it (possibly empty)."""
+        out: List[Any] = []
+        if not chunk:
+            return out
+        if self.done:
+            self._buf.append(chunk)  # kept for `text` only; never scanned
+            return out
+        self._text += chunk
+        text = self._text
+        for m in _SPECIAL.finditer(text, self._pos):
+            i = m.start()
+            ch = text[i]
+            if self._in_str:
+                if i == self._escape_at:
+                    continue  # escaped quote or backslash
+                if ch == "\\":
+                    self._escape_at = i + 1
+                elif ch == '"':
+                    self._in_str = False
+                    self._last_str = text[self._str_start + 1 : i]
+                    frame = self._stack[-1] if self._stack else None
+                    if frame is not None and frame[0] == "{" and frame[2]:
+                        frame[1], frame[2] = self._last_str, False
+                continue
+            if self.start is None:
+                if ch == "{":
+                    self.start = i
+                    self._stack.append(["{", None, True, i])
+                continue  # prose before the object is not JSON
+            if ch == '"':
+                self._in_str = True
+                self._str_start = i
+            elif ch in "{[":
+                self._stack.append([ch, None, ch == "{", i])
+            elif ch in "}]":
+                if not self._stack:
+                    continue
+                frame = self._stack.pop()
+                if not self._stack:
+                    if not self._accept(text, self.start, i):
+                        self.start = None  # keep scanning for the next candidate
+                        continue
+                    self.end = i
+                    self._pos = i + 1
+                    tail = text[i + 1 :]
+                    self._text = text[: i + 1]
+                    self._buf = [tail] if tail else []
+                    return out
+                if self.watch is not None:
+                    self._element_done(frame[3], i, out)
+            elif ch == ",":
+                frame = self._stack[-1]
+                if frame[0] == "{":
+                    frame[1], frame[2] = None, True
+        # An escape at the chunk edge stays pending: _escape_at points into the next chunk
+        self._pos = len(text)
+        return out
@@ -1,28 +1,89 @@
 # src/fitapp_core/rag/llm.py
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import copy
 import os
 import re
 import json
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from openai import OpenAI
-from dotenv import load_dotenv
+from .breaker import CircuitBreaker
+from .json_extract import extract_json
+from .json_stream import JSONObjectScanner
+from .llm_cache import LLM_CACHE_BYPASS, cache_key, get_llm_cache
+from .telemetry import emit as emit_telemetry
 
 # -------------------------
-# Env + client
+# Env + client (lazy: importing this module loads neither .env.local nor the OpenAI SDK)
 # -------------------------
-load_dotenv(dotenv_path=".env.local")
+_settings_cache: Optional[Dict[str, Optional[str]]] = None
+_async_client: Any = None  # AsyncOpenAI, built on first use
+_client_lock = threading.Lock()
 
-BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.perplexity.ai")
-MODEL = os.getenv("PERPLEXITY_MODEL", "sonar-pro")
-API_KEY = os.getenv("PERPLEXITY_API_KEY")
+def _settings() -> Dict[str, Optional[str]]:
+    """Endpoint settings, read once (after .env.local) on the first LLM call."""
+    global _settings_cache
+    if _settings_cache is None:
+        from dotenv import load_dotenv
 
-_client = OpenAI(api_key=API_KEY, base_url=BASE_URL)
+        load_dotenv(dotenv_path=".env.local")
+        _settings_cache = {
+            "base_url": os.getenv("OPENAI_BASE_URL", "https://api.perplexity.ai"),
+            "model": os.getenv("PERPLEXITY_MODEL", "sonar-pro"),
+            "api_key": os.getenv("PERPLEXITY_API_KEY"),
+        }
+    return _settings_cache
+
+def _model() -> str:
+    return _settings()["model"]
+
+def _get_client() -> Any:
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                from openai import AsyncOpenAI  # ~0.5 s of imports (httpx, pydantic models)
+
+                cfg = _settings()
+                # A missing key raises here, on the first call, and is logged as llm_json_error
+                _async_client = AsyncOpenAI(api_key=cfg["api_key"], base_url=cfg["base_url"])
+    return _async_client
+
+# Max LLM requests in flight per process; extra callers queue
+LLM_MAX_CONCURRENCY = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "4")))
+# Stream completions and stop reading once the JSON object closes (on by default when on_day is given)
+LLM_STREAM = os.getenv("LLM_STREAM", "false").strip().lower() in ("1", "true", "yes")
+# Chunks still read after the object closes, for the final usage chunk (stream_options.include_usage); 0 stops at once
+LLM_STREAM_TAIL_CHUNKS = int(os.getenv("LLM_STREAM_TAIL_CHUNKS", "8"))
+
+# Per-call budget in seconds (cache lookup to final answer); <=0 waits indefinitely
+LLM_DEADLINE_S = float(os.getenv("LLM_DEADLINE_S", "45"))
+# Seconds before a hedged second request is fired until LLM_HEDGE_MIN_SAMPLES successful calls have been timed;
+# after that the tracked p95 latency, floored at LLM_HEDGE_MIN_S. <=0 only retries after a failure
+LLM_HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", "20"))
+LLM_HEDGE_MIN_S = float(os.getenv("LLM_HEDGE_MIN_S", "2"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# Consecutive failed calls that open the circuit breaker (<=0 disables), and its cool-down
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "60"))
+
+# Echo events to stdout as well when the telemetry sink (TELEMETRY_DIR) is on; with it off they are always printed
+LLM_LOG_STDOUT = os.getenv("LLM_LOG_STDOUT", "false").strip().lower() in ("1", "true", "yes")
+
+# Streamed elements reported to on_day as they complete
+DAYS_PATH = ("canonical_week", "days")
+DayCallback = Callable[[Dict[str, Any]], None]
+
+TEMPERATURE = 0.2
+MAX_TOKENS = 1000
 
 # -------------------------
-# JSON-safe helper + console logging
+# JSON-safe helper + event logging
 # -------------------------
 def _json_safe(v: Any) -> Any:
     if v is None or isinstance(v, (str, int, float, bool)):
@@ -50,7 +111,9 @@ def _json_safe(v: Any) -> Any:
     return str(v)
 
 def _log_event(event: Dict[str, Any]) -> None:
-    # Print a single JSON line to stdout for easy terminal inspection; no file writes
+    # Queued for the background JSONL writer (llm_{date}.jsonl); printed as one JSON line only if the sink is off or LLM_LOG_STDOUT
+    if emit_telemetry("llm", event) and not LLM_LOG_STDOUT:
+        return
     try:
         safe = {str(k): _json_safe(v) for k, v in event.items()}
         print("[LLM-LOG]", json.dumps(safe, ensure_ascii=False))
@@ -106,6 +169,21 @@ def _repair_json(s: str) -> str:
 
 def _parse_object_text(text: str) -> Dict[str, Any]:
     """
+    Parse a JSON object from arbitrary model output in one pass (see json_extract).
+    If only a top-level array is found, coerce to an object under {'items': [...]}.
+    """
+    value = extract_json(text)
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, list):
+        # Coerce to a generic object if caller expects an object
+        return {"items": value}
+    print("[LLM] Object parse failed after repair; returning empty fallback")
+    return {}
+
+def _parse_object_text_legacy(text: str) -> Dict[str, Any]:
+    """
+    Previous multi-attempt cascade, kept as the baseline for benchmarks/bench_json_extract.py.
     Attempt to parse a JSON object from arbitrary model output.
     Tries as-is, repaired, and balanced-slice extractions for both { } and [ ].
     If a top-level array is found, coerce to an object under {'items': [...]}.
@@ -174,109 +252,410 @@ def _extract_choice_text(resp: Any) -> str:
         pass
     return ""
 
+def _cache_fields(status: str) -> Dict[str, Any]:
+    # status: hit | miss | bypass | off
+    cache = get_llm_cache()
+    return {"cache": status, "cache_hits": cache.hits, "cache_misses": cache.misses}
+
+# -------------------------
+# Event loop, concurrency bound, single-flight
+# -------------------------
+# All LLM requests run on one background event loop: AsyncOpenAI's connection pool and the
+# semaphore are loop-bound, and a single loop makes both (and request coalescing) process-wide.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_semaphore: Optional[asyncio.Semaphore] = None
+_inflight: Dict[Tuple[str, bool], "asyncio.Future[Dict[str, Any]]"] = {}  # (cache key, bypass) -> shared call
+_stats = {"requests": 0, "coalesced": 0, "in_flight": 0, "max_in_flight": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0}
+_breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN_S)
+_latencies_ms: "deque[float]" = deque(maxlen=200)  # recent successful attempts
+
+def _llm_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _semaphore
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-loop", daemon=True).start()
+                _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+                _loop = loop
+    return _loop
+
+def _latency_p95_ms() -> Optional[float]:
+    if not _latencies_ms:
+        return None
+    ordered = sorted(_latencies_ms)
+    return round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 1)
+
+def _hedge_after_s() -> Optional[float]:
+    # A fixed delay hedges too late for a fast model and too often for a slow one; track p95 once it is known
+    if LLM_HEDGE_AFTER_S <= 0:
+        return None
+    if len(_latencies_ms) < max(1, LLM_HEDGE_MIN_SAMPLES):
+        return LLM_HEDGE_AFTER_S
+    return max(LLM_HEDGE_MIN_S, _latency_p95_ms() / 1000.0)
+
+def llm_stats() -> Dict[str, Any]:
+    return {
+        **_stats,
+        "max_concurrency": LLM_MAX_CONCURRENCY,
+        "latency_p95_ms": _latency_p95_ms(),
+        "hedge_after_s": _hedge_after_s(),
+        "breaker": _breaker.stats(),
+        "cache": get_llm_cache().stats(),
+    }
+
+@contextlib.asynccontextmanager
+async def _slot():
+    # One of LLM_MAX_CONCURRENCY request slots, held until the response is fully read
+    async with _semaphore:
+        _stats["in_flight"] += 1
+        _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+        try:
+            yield
+        finally:
+            _stats["in_flight"] -= 1
+
+async def _create(**kwargs: Any) -> Any:
+    async with _slot():
+        return await _get_client().chat.completions.create(**kwargs)
+
+def _emit_day(on_day: Optional[DayCallback], day: Any) -> None:
+    if on_day is None or not isinstance(day, dict):
+        return
+    try:
+        on_day(day)
+    except Exception as e:
+        print(f"[LLM] on_day callback failed: {e}")
+
+def _replay_days(on_day: Optional[DayCallback], obj: Dict[str, Any]) -> None:
+    # Cached or shared results: report their days at once so progress UIs still fill in
+    if on_day is None:
+        return
+    for day in ((obj.get("canonical_week") or {}).get("days") or []):
+        _emit_day(on_day, day)
+
+def _usage_dict(u: Any) -> Dict[str, Any]:
+    try:
+        return u.model_dump(exclude_none=True) if hasattr(u, "model_dump") else dict(u) if isinstance(u, dict) else {}
+    except Exception:
+        return {}
+
+async def _stream_text(on_day: Optional[DayCallback], **kwargs: Any) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    """
+    Streamed completion fed through JSONObjectScanner: completed canonical_week.days entries go to
+    on_day. Once the object closes, at most LLM_STREAM_TAIL_CHUNKS more chunks are read while waiting
+    for the final usage chunk, then the stream is closed.
+    Returns (text, usage, stream info); the text stops at the closing brace when one was seen.
+    """
+    scanner = JSONObjectScanner(watch=DAYS_PATH)
+    chunks, tail, usage, early_stop = 0, 0, {}, False
+    async with _slot():
+        stream = await _get_client().chat.completions.create(
+            stream=True, stream_options={"include_usage": True}, **kwargs
+        )
+        try:
+            async for chunk in stream:
+                chunks += 1
+                if getattr(chunk, "usage", None):
+                    usage = _usage_dict(chunk.usage)  # last chunk, empty choices
+                if scanner.done:
+                    tail += 1
+                else:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    for day in scanner.feed(delta or ""):
+                        _emit_day(on_day, day)
+                if scanner.done and (usage or tail >= LLM_STREAM_TAIL_CHUNKS):
+                    early_stop = not usage
+                    break
+        finally:
+            await stream.close()  # early stop: drops the rest of the response
+    info = {"stream": True, "stream_chunks": chunks, "early_stop": early_stop}
+    return scanner.object_text or scanner.text, usage, info
+
+async def _complete(
+    messages: List[Dict[str, str]], temperature: float, stream: bool, on_day: Optional[DayCallback]
+) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    # (raw text, usage, stream info)
+    if stream:
+        return await _stream_text(on_day, model=_model(), messages=messages, temperature=temperature, max_tokens=MAX_TOKENS)
+    resp = await _create(model=_model(), messages=messages, temperature=temperature, max_tokens=MAX_TOKENS)
+    return _extract_choice_text(resp), _usage_dict(getattr(resp, "usage", None) or {}), {}
+
+async def _attempt(
+    messages: List[Dict[str, str]], temperature: float, stream: bool, on_day: Optional[DayCallback]
+) -> Tuple[Dict[str, Any], str, Dict[str, Any], Dict[str, Any]]:
+    # (parsed object or {}, raw text, usage, stream info)
+    t0 = time.perf_counter()
+    raw, usage, info = await _complete(messages, temperature, stream, on_day)
+    obj = _parse_object_text(raw)
+    if obj:
+        _latencies_ms.append((time.perf_counter() - t0) * 1000)
+    return obj, raw, usage, info
+
+async def _race(
+    prompt: str,
+    messages: List[Dict[str, str]],
+    stream: bool,
+    on_day: Optional[DayCallback],
+    deadline_s: float,
+    trace: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Optional[str], Dict[str, Any]]:
+    """
+    Primary request plus a hedge (stronger JSON instruction, lower temperature) fired after
+    _hedge_after_s(), or at once if the primary fails first; the first parsed object wins and the
+    other request is cancelled. Returns (object or {}, "primary" | "hedge" | None, finished attempts);
+    raises TimeoutError past the deadline and re-raises when every attempt errored.
+    trace["hedged"] is set when the hedge fires, so it survives a raise.
+    """
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    deadline = t0 + deadline_s if deadline_s > 0 else None
+    hedge_after = _hedge_after_s()
+    hedge_at = t0 + hedge_after if hedge_after is not None else None
+    hedge_messages = [
+        {"role": "system", "content": messages[0]["content"] + " Respond with a single JSON object only."},
+        {"role": "user", "content": prompt},
+    ]
+    tasks = {asyncio.ensure_future(_attempt(messages, TEMPERATURE, stream, on_day)): "primary"}
+    finished: Dict[str, Any] = {}  # name -> (raw, usage, info) or the exception it raised
+    hedged = False
+    try:
+        while True:
+            now = loop.time()
+            if not hedged and (not tasks or (hedge_at is not None and now >= hedge_at)):
+                if deadline is None or now < deadline:
+                    hedged = trace["hedged"] = True
+                    _stats["hedged"] += 1
+                    # on_day stays with the primary stream; a winning hedge's days are replayed
+                    tasks[asyncio.ensure_future(_attempt(hedge_messages, 0.1, stream, None))] = "hedge"
+            if not tasks:
+                break
+            wake = [w for w in (deadline, None if hedged else hedge_at) if w is not None]
+            timeout = max(0.0, min(wake) - now) if wake else None
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks.pop(task)
+                try:
+                    obj, raw, usage, info = task.result()
+                except Exception as e:
+                    finished[name] = e
+                    continue
+                finished[name] = (raw, usage, info)
+                if obj:
+                    return obj, name, finished
+            if tasks and deadline is not None and loop.time() >= deadline:
+                _stats["timeouts"] += 1
+                raise TimeoutError(f"deadline of {deadline_s:g}s exceeded")
+    finally:
+        for task in tasks:
+            task.cancel()
+    errors = [v for v in finished.values() if isinstance(v, Exception)]
+    if errors and len(errors) == len(finished):
+        raise errors[0]
+    return {}, None, finished
+
+def _breaker_fields(hedged: bool = False, winner: Optional[str] = None) -> Dict[str, Any]:
+    return {"breaker": _breaker.state, "hedged": hedged, "winner": winner}
+
 # -------------------------
 # Public API (console-logged)
 # -------------------------
-def call_llm_json_object_with_log(
+async def _call_json_object(
     prompt: str,
-    schema: Dict[str, Any],
     context: Dict[str, Any],
+    messages: List[Dict[str, str]],
+    key: str,
+    bypass_cache: bool,
+    stream: bool = False,
+    on_day: Optional[DayCallback] = None,
+    deadline_s: float = LLM_DEADLINE_S,
 ) -> Dict[str, Any]:
-    """
-    Ask the model for a single JSON object; tolerate stray prose and minor JSON defects.
-    Also logs a structured line to stdout with metadata and the first ~2KB of the raw completion.
-    """
-    sys_msg = "Return ONLY a JSON object. No prose."
     t0 = time.time()
     usage: Dict[str, Any] = {}
-    raw1 = ""
-    raw2 = ""
-    try:
-        resp = _client.chat.completions.create(
-            model=MODEL,
-            messages=[
-                {"role": "system", "content": sys_msg},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=1000,
-        )
-        raw1 = _extract_choice_text(resp)
-        obj = _parse_object_text(raw1)
-        try:
-            u = getattr(resp, "usage", {}) or {}
-            usage = dict(u) if isinstance(u, dict) else {}
-        except Exception:
-            usage = {}
-
-        if obj:
+    raw = ""
+    cache = get_llm_cache()
+    if not cache.enabled:
+        cache_status = "off"
+    elif bypass_cache or LLM_CACHE_BYPASS:
+        cache_status = "bypass"
+    else:
+        # SQLite I/O runs on a worker thread so a slow disk doesn't stall every call sharing the loop
+        cached = await asyncio.to_thread(cache.get, key)
+        cache_status = "miss" if cached is None else "hit"
+        if cached is not None:
+            obj, raw = cached
             _log_event(
                 {
                     "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
                     "event": "llm_json_ok",
-                    "model": MODEL,
+                    "model": _model(),
                     "elapsed_ms": int((time.time() - t0) * 1000),
-                    "usage": usage,
+                    "usage": {},
                     "context": context,
-                    "raw_head": raw1[:2000],
+                    "raw_head": raw[:2000],
                     "parse_ok": True,
+                    **_cache_fields(cache_status),
                 }
             )
+            _replay_days(on_day, obj)
             return obj
-
-        # One gentle retry with stronger JSON instruction
-        resp2 = _client.chat.completions.create(
-            model=MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": sys_msg + " Respond with a single JSON object only.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.1,
-            max_tokens=1000,
+    if not _breaker.allow():
+        # Open breaker: callers fall back (generate_plan_v11 -> deterministic plan) without waiting
+        _log_event(
+            {
+                "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "event": "llm_json_skipped",
+                "model": _model(),
+                "elapsed_ms": int((time.time() - t0) * 1000),
+                "context": context,
+                "parse_ok": False,
+                "error": "circuit-open",
+                **_breaker_fields(),
+                **_cache_fields(cache_status),
+            }
         )
-        raw2 = _extract_choice_text(resp2)
-        obj2 = _parse_object_text(raw2)
-        try:
-            u2 = getattr(resp2, "usage", {}) or {}
-            if isinstance(u2, dict):
-                usage.update({f"retry_{k}": v for k, v in u2.items()})
-        except Exception:
-            pass
+        return {}
+    _stats["requests"] += 1
+    trace = {"hedged": False}
+    try:
+        obj, winner, finished = await _race(prompt, messages, stream, on_day, deadline_s, trace)
+        answered = {name: a for name, a in finished.items() if isinstance(a, tuple)}
+        raw, _, stream_info = answered.get(winner) or answered.get("hedge") or answered.get("primary") or ("", {}, {})
+        for name, (_, attempt_usage, _) in answered.items():
+            usage.update({(k if name == "primary" else f"retry_{k}"): v for k, v in attempt_usage.items()})
+        _breaker.record(bool(obj))
+        if obj:
+            # Stored under the original request whichever attempt won
+            await asyncio.to_thread(cache.put, key, _model(), obj, raw)
+            if winner == "hedge":
+                _stats["hedge_wins"] += 1
+                _replay_days(on_day, obj)
 
         _log_event(
             {
                 "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-                "event": "llm_json_retry" if obj2 else "llm_json_fail",
-                "model": MODEL,
+                "event": "llm_json_ok" if winner == "primary" else "llm_json_retry" if obj else "llm_json_fail",
+                "model": _model(),
                 "elapsed_ms": int((time.time() - t0) * 1000),
                 "usage": usage,
                 "context": context,
-                "raw_head": (raw2 or raw1)[:2000],
-                "parse_ok": bool(obj2),
-                "error": None if obj2 else "object-parse-failed",
+                "raw_head": raw[:2000],
+                "parse_ok": bool(obj),
+                "error": None if obj else "object-parse-failed",
+                **stream_info,
+                **_breaker_fields(trace["hedged"], winner),
+                **_cache_fields(cache_status),
             }
         )
-        return obj2 if isinstance(obj2, dict) else {}
+        return obj
     except Exception as e:
+        _breaker.record(False)
         _log_event(
             {
                 "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
                 "event": "llm_json_error",
-                "model": MODEL,
+                "model": _model(),
                 "elapsed_ms": int((time.time() - t0) * 1000),
                 "usage": usage,
                 "context": context,
-                "raw_head": (raw2 or raw1)[:2000],
+                "raw_head": raw[:2000],
                 "parse_ok": False,
-                "error": str(e),
+                "error": str(e) or type(e).__name__,
+                **_breaker_fields(trace["hedged"]),
+                **_cache_fields(cache_status),
             }
         )
         print(f"[LLM] Request error: {e}; returning empty object")
         return {}
 
+async def _snapshot(call: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+    # The shared result is a private copy nobody mutates; every caller, the first included, gets its own copy of it
+    return copy.deepcopy(await call)
+
+async def acall_llm_json_object_with_log(
+    prompt: str,
+    schema: Dict[str, Any],
+    context: Dict[str, Any],
+    bypass_cache: bool = False,
+    stream: Optional[bool] = None,
+    on_day: Optional[DayCallback] = None,
+    deadline_s: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Ask the model for a single JSON object; tolerate stray prose and minor JSON defects.
+    Also logs a structured event (telemetry JSONL, or stdout) with metadata and the first ~2KB of the raw completion.
+    Parsed objects are cached by request content (see llm_cache); bypass_cache forces a fresh call.
+    At most LLM_MAX_CONCURRENCY requests are in flight, and concurrent identical requests share one.
+    stream (default LLM_STREAM, or True when on_day is given) reads the completion incrementally,
+    stops once the object closes, and calls on_day(day) for each canonical_week.days entry as it
+    completes. on_day runs on the LLM loop thread.
+    deadline_s (default LLM_DEADLINE_S) bounds the whole call, hedged second request included;
+    while the circuit breaker is open the call returns {} immediately.
+    """
+    loop = _llm_loop()
+    if asyncio.get_running_loop() is not loop:
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(
+                acall_llm_json_object_with_log(prompt, schema, context, bypass_cache, stream, on_day, deadline_s), loop
+            )
+        )
+    if stream is None:
+        stream = LLM_STREAM or on_day is not None
+    messages = [
+        {"role": "system", "content": "Return ONLY a JSON object. No prose."},
+        {"role": "user", "content": prompt},
+    ]
+    key = cache_key(_model(), messages, TEMPERATURE, MAX_TOKENS)
+    # A bypassing caller must not join a call that may be answered from the cache
+    flight = (key, bool(bypass_cache or LLM_CACHE_BYPASS))
+    budget = LLM_DEADLINE_S if deadline_s is None else deadline_s
+    shared = _inflight.get(flight)
+    if shared is None:
+        shared = asyncio.ensure_future(_snapshot(_call_json_object(prompt, context, messages, key, bypass_cache, stream, on_day, budget)))
+        _inflight[flight] = shared
+        shared.add_done_callback(lambda _: _inflight.pop(flight, None))
+        # shield: a cancelled caller must not cancel the request other callers are waiting on
+        return copy.deepcopy(await asyncio.shield(shared))
+    _stats["coalesced"] += 1
+    t0 = time.time()
+    error = None
+    try:
+        # The follower's own deadline bounds its wait; the shield keeps the shared request running
+        result = await asyncio.wait_for(asyncio.shield(shared), budget if budget > 0 else None)
+        obj = copy.deepcopy(result)  # callers may mutate their plan
+    except asyncio.TimeoutError:
+        _stats["timeouts"] += 1
+        obj, error = {}, f"deadline of {budget:g}s exceeded"
+    _log_event(
+        {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "event": "llm_json_coalesced",
+            "model": _model(),
+            "elapsed_ms": int((time.time() - t0) * 1000),
+            "context": context,
+            "parse_ok": bool(obj),
+            "error": error,
+        }
+    )
+    _replay_days(on_day, obj)
+    return obj
+
+def call_llm_json_object_with_log(
+    prompt: str,
+    schema: Dict[str, Any],
+    context: Dict[str, Any],
+    bypass_cache: bool = False,
+    stream: Optional[bool] = None,
+    on_day: Optional[DayCallback] = None,
+    deadline_s: Optional[float] = None,
+) -> Dict[str, Any]:
+    # Blocking wrapper: runs on the shared LLM loop (never call it from that loop)
+    future = asyncio.run_coroutine_threadsafe(
+        acall_llm_json_object_with_log(prompt, schema, context, bypass_cache, stream, on_day, deadline_s), _llm_loop()
+    )
+    return future.result()
+
 def call_llm_json_object(prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
     # Backward-compatible wrapper that logs with an empty context
     return call_llm_json_object_with_log(prompt, schema, context={})
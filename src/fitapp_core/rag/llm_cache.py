@@ -0,0 +1,166 @@
+# src/fitapp_core/rag/llm_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# SQLite file for parsed LLM responses; empty disables the cache
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/cache/llm_responses.sqlite")
+# Max cached responses; least recently used rows are evicted beyond this
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+# Seconds a cached response stays valid; <=0 keeps rows until evicted by size
+LLM_CACHE_MAX_AGE_S = float(os.getenv("LLM_CACHE_MAX_AGE_S", str(7 * 24 * 3600)))
+# Skip cache lookups (fresh completions are still stored), e.g. while iterating on prompts
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "false").strip().lower() in ("1", "true", "yes")
+
+def cache_key(model: str, messages: List[Dict[str, Any]], temperature: float, max_tokens: int) -> str:
+    """Content address of one chat request: sha256 over its canonical JSON."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    Content-addressed SQLite cache of parsed LLM objects (never failures or empty objects).
+    Rows expire after max_age_s; beyond max_entries the least recently used rows are dropped.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = LLM_CACHE_PATH,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_age_s: float = LLM_CACHE_MAX_AGE_S,
+    ):
+        self.path = Path(path) if path else None
+        self.max_entries = max(0, int(max_entries))
+        self.max_age_s = float(max_age_s)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        if self.path is not None and self.max_entries > 0:
+            self._open_db()
+
+    def _open_db(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_response ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, obj TEXT NOT NULL, raw TEXT NOT NULL,"
+                " created REAL NOT NULL, used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS llm_response_used ON llm_response (used)")
+            db.commit()
+            self._db = db
+        except Exception as e:
+            print(f"[LLM] Response cache disabled ({e})")
+            self._db = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """(object, raw completion) for key, or None on a miss or an expired row."""
+        if self._db is None:
+            return None
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT obj, raw, created FROM llm_response WHERE key = ?", (key,)).fetchone()
+                if row is not None and self.max_age_s > 0 and now - row[2] > self.max_age_s:
+                    self._db.execute("DELETE FROM llm_response WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.expired += 1
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._db.execute("UPDATE llm_response SET used = ? WHERE key = ?", (now, key))
+                self._db.commit()
+                self.hits += 1
+                return json.loads(row[0]), row[1]
+            except Exception as e:
+                print(f"[LLM] Response cache read failed: {e}")
+                self.misses += 1
+                return None
+
+    def put(self, key: str, model: str, obj: Dict[str, Any], raw: str = "") -> None:
+        if self._db is None or not obj:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_response (key, model, obj, raw, created, used) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, json.dumps(obj, ensure_ascii=False), raw or "", now, now),
+                )
+                self._evict(now)
+                self._db.commit()
+            except Exception as e:
+                print(f"[LLM] Response cache write failed: {e}")
+
+    def _evict(self, now: float) -> None:
+        if self.max_age_s > 0:
+            self.evicted += self._db.execute(
+                "DELETE FROM llm_response WHERE created < ?", (now - self.max_age_s,)
+            ).rowcount
+        self.evicted += self._db.execute(
+            "DELETE FROM llm_response WHERE key IN ("
+            " SELECT key FROM llm_response ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_response")
+                self._db.commit()
+            self.hits = 0
+            self.misses = 0
+            self.expired = 0
+            self.evicted = 0
+
+    def __len__(self) -> int:
+        if self._db is None:
+            return 0
+        with self._lock:
+            return int(self._db.execute("SELECT COUNT(*) FROM llm_response").fetchone()[0])
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "max_entries": self.max_entries,
+            "max_age_s": self.max_age_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "path": str(self.path) if self._db is not None else None,
+        }
+
+_CACHE: Optional[LLMResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def get_llm_cache() -> LLMResponseCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = LLMResponseCache()
+    return _CACHE
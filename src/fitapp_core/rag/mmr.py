@@ -0,0 +1,31 @@
+# src/fitapp_core/rag/mmr.py
+from __future__ import annotations
+
+import numpy as np
+
+def mmr_select(vectors: np.ndarray, relevance: np.ndarray, k: int, lam: float = 0.7) -> np.ndarray:
+    """
+    Maximal marginal relevance over n candidates: indices of k picks, in pick order.
+    vectors (n, d) are unit rows; relevance (n,) is each candidate's query score.
+    The candidate Gram matrix is computed once; each pick is one vectorized argmax plus a
+    running max of similarity to everything already picked.
+    """
+    n = int(relevance.shape[0])
+    k = min(int(k), n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    lam = float(np.clip(lam, 0.0, 1.0))
+    gram = vectors @ vectors.T
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    taken = np.zeros(n, dtype=bool)
+    picks = np.empty(k, dtype=np.int64)
+    rel = lam * relevance.astype(np.float32)
+    for step in range(k):
+        # First pick has no redundancy term: plain relevance
+        score = rel if step == 0 else rel - (1.0 - lam) * redundancy
+        score = np.where(taken, -np.inf, score)
+        j = int(np.argmax(score))
+        picks[step] = j
+        taken[j] = True
+        np.maximum(redundancy, gram[j], out=redundancy)
+    return picks
@@ -110,6 +110,15 @@
 # src/fitapp_core/rag/prompts.py
 from __future__ import annotations
 
+import os
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+# Evidence budget per prompt in characters (~4 per token), shared by all packed snippets; <=0 disables trimming
+PROMPT_SNIPPET_BUDGET_CHARS = int(os.getenv("PROMPT_SNIPPET_BUDGET_CHARS", "1600"))
+# A snippet that would get fewer characters than this is dropped instead of cut to a stub
+PROMPT_SNIPPET_MIN_CHARS = int(os.getenv("PROMPT_SNIPPET_MIN_CHARS", "200"))
+
 # v1 (kept for reference)
 SYSTEM_PROMPT = """You are a cautious workout-planning assistant.
 Return ONLY JSON array with fields: day, movement, sets, reps, tempo_or_rest, load_prescription, notes.
@@ -170,14 +179,75 @@ Output:
 - ONLY the JSON object described in SYSTEM.
 """
 
-def render_snippets_for_v11(snippets_texts):
-    out = []
-    for i, t in enumerate(snippets_texts, 1):
-        t = (t or "").strip().replace("\n", " ")
-        if len(t) > 400:
-            t = t[:397] + "..."
-        out.append(f"- [{i}] {t}")
-    return "\n".join(out)
+# Chunker boilerplate in chunks.jsonl text: "=== CHUNK START ===" markers and "chunk_id: ..." lines
+_BOILERPLATE = re.compile(r"^[ \t]*(?:=+[ \t]*CHUNK[ \t]+(?:START|END)[ \t]*=+|chunk_id[ \t]*:.*)[ \t]*$", re.IGNORECASE | re.MULTILINE)
+# Whitespace after a sentence end (not a list number like "2."), or before a bullet
+_BOUNDARY = re.compile(r"(?<=[^\d\s][.!?;])\s+|\s+(?=•)")
+
+def _cap(text: str, max_chars: Optional[int]) -> str:
+    t = (text or "").strip().replace("\n", " ")
+    if max_chars is not None and len(t) > max_chars:
+        t = t[: max_chars - 3] + "..."
+    return t
+
+def clean_snippet(text: str) -> str:
+    """Chunk text without chunker headers, on one line, starting at a sentence when the chunk begins mid-sentence."""
+    t = re.sub(r"\s+", " ", _BOILERPLATE.sub(" ", text or "")).strip()
+    if t[:1].islower():
+        # Chunks overlap, so a lowercase start is the tail of the previous chunk's sentence
+        m = _BOUNDARY.search(t, 0, len(t) // 3)
+        if m:
+            t = t[m.end():]
+    return t.lstrip("• ")
+
+def trim_to_sentence(text: str, limit: int) -> str:
+    """Cut text to at most `limit` chars at the last sentence/bullet boundary, else at a word with "..."."""
+    if len(text) <= limit:
+        return text
+    cut = -1
+    for m in _BOUNDARY.finditer(text, 0, limit + 1):
+        cut = m.start()
+    if cut >= limit // 2:
+        return text[:cut]
+    space = text.rfind(" ", 0, limit - 2)
+    return text[: space if space > 0 else limit - 3].rstrip(" ,;:•") + "..."
+
+def pack_snippets(
+    hits: Sequence[Mapping[str, Any]],
+    budget_chars: Optional[int] = None,
+    min_chars: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fit retrieved hits into one evidence budget (default PROMPT_SNIPPET_BUDGET_CHARS). Texts are
+    cleaned (clean_snippet) and deduplicated; the best-scored hits are kept, as many as can get
+    min_chars each, and each is trimmed at a sentence boundary to an even share of what is left,
+    so room unused by short snippets goes to the next ones. Returns copies of the kept hits,
+    best first, with "text" replaced; number citations against this list, not the raw hits.
+    """
+    budget = PROMPT_SNIPPET_BUDGET_CHARS if budget_chars is None else budget_chars
+    floor = max(1, PROMPT_SNIPPET_MIN_CHARS if min_chars is None else min_chars)
+    # Stable sort: retrieval order breaks score ties (and orders hits without a score)
+    ranked = sorted(enumerate(hits), key=lambda p: (-float(p[1].get("score") or 0.0), p[0]))
+    candidates, seen = [], set()
+    for _, hit in ranked:
+        text = clean_snippet(hit.get("text", ""))
+        if text and text not in seen:
+            seen.add(text)
+            candidates.append((hit, text))
+    if budget <= 0:
+        return [{**hit, "text": text} for hit, text in candidates]
+    candidates = candidates[: max(1, budget // floor)]
+    out: List[Dict[str, Any]] = []
+    left = budget
+    for i, (hit, text) in enumerate(candidates):
+        text = trim_to_sentence(text, left // (len(candidates) - i))
+        out.append({**hit, "text": text})
+        left -= len(text)
+    return out
+
+def render_snippets_for_v11(snippets_texts, max_chars: Optional[int] = 400):
+    # max_chars=None: texts are already packed (pack_snippets)
+    return "\n".join(f"- [{i}] {_cap(t, max_chars)}" for i, t in enumerate(snippets_texts, 1))
 
 # Tweak assessor prompts (for unified tweak flow)
 TWEAK_ASSESSOR_SYSTEM = """You assess plan tweaks using only the provided evidence.
@@ -193,11 +263,5 @@ Rules:
 - Partially aligned / trade-offs -> verdict='warn'
 - Contradicts evidence / unsafe -> verdict='block'
 Return only the JSON object."""
-def render_numbered_snippets(snips: list[str]) -> str:
-    lines = []
-    for i, t in enumerate(snips, 1):
-        t = (t or "").strip().replace("\n", " ")
-        if len(t) > 400:
-            t = t[:397] + "..."
-        lines.append(f"[{i}] {t}")
-    return "\n".join(lines)
+def render_numbered_snippets(snips: list[str], max_chars: Optional[int] = 400) -> str:
+    return "\n".join(f"[{i}] {_cap(t, max_chars)}" for i, t in enumerate(snips, 1))
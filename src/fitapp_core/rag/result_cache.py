@@ -0,0 +1,117 @@
+# src/fitapp_core/rag/result_cache.py
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from .embed_cache import normalize_query
+
+# Max cached result lists; 0 disables the cache
+RESULT_CACHE_SIZE = int(os.getenv("RAG_RESULT_CACHE_SIZE", "512"))
+# Seconds a cached result list stays valid; <=0 keeps entries until evicted or the index changes
+RESULT_CACHE_TTL_S = float(os.getenv("RAG_RESULT_CACHE_TTL_S", "600"))
+
+Hits = Tuple[Mapping[str, Any], ...]
+
+# Request fields besides the query that change the result list
+_KEY_FIELDS = ("top_k", "mode", "fusion", "alpha", "nprobe", "ef_search", "mmr_lambda")
+
+def result_key(version: str, request: Dict) -> Tuple:
+    domains = request.get("domains") or ()
+    return (
+        version,
+        normalize_query(request.get("query") or ""),
+        tuple(sorted(str(d) for d in domains)),
+        request.get("evidence") or None,
+        *(request.get(f) for f in _KEY_FIELDS),
+    )
+
+def freeze_hits(hits: Iterable[Dict[str, Any]]) -> Hits:
+    """Read-only view of a hit list: a tuple of mapping proxies with tags as tuples."""
+    return tuple(MappingProxyType({**h, "tags": tuple(h.get("tags") or ())}) for h in hits)
+
+class ResultCache:
+    """
+    LRU + TTL cache of frozen retrieval results.
+    Keys start with the index version (content digest), so a hot-swapped index never serves old hits;
+    drop_version() frees the old version's entries eagerly.
+    """
+
+    def __init__(self, capacity: int = RESULT_CACHE_SIZE, ttl_s: float = RESULT_CACHE_TTL_S):
+        self.capacity = max(0, int(capacity))
+        self.ttl_s = float(ttl_s)
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Tuple, Tuple[float, Hits]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def get(self, key: Tuple) -> Optional[Hits]:
+        if self.capacity == 0:
+            return None
+        with self._lock:
+            item = self._lru.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            stored_at, hits = item
+            if self.ttl_s > 0 and time.monotonic() - stored_at > self.ttl_s:
+                del self._lru[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return hits
+
+    def put(self, key: Tuple, hits: Iterable[Dict[str, Any]]) -> Hits:
+        frozen = hits if isinstance(hits, tuple) else freeze_hits(hits)
+        if self.capacity == 0:
+            return frozen
+        with self._lock:
+            self._lru[key] = (time.monotonic(), frozen)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.capacity:
+                self._lru.popitem(last=False)
+        return frozen
+
+    def drop_version(self, version: str) -> int:
+        with self._lock:
+            stale = [k for k in self._lru if k[0] == version]
+            for k in stale:
+                del self._lru[k]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self.hits = 0
+            self.misses = 0
+            self.expired = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._lru),
+            "capacity": self.capacity,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+_CACHE: Optional[ResultCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ResultCache()
+    return _CACHE
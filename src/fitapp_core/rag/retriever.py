@@ -185,9 +185,14 @@
 # src/fitapp_core/rag/retriever.py
 from __future__ import annotations
 
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Callable, List, Dict, Optional, Tuple
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import os
+import threading
+import time
 import numpy as np
 import pandas as pd
 import sys
@@ -197,6 +202,17 @@ try:
 except ImportError:
     faiss = None
 
+from .bm25 import BM25Index, rrf_fuse, weighted_fuse
+from .columns import ChunkColumns
+from .embed_cache import get_query_cache, normalize_query
+from .embed_service import EmbedServiceError, connect_embedder
+from .embedders import HashingEmbedder
+from .mmr import mmr_select
+from .result_cache import Hits, get_result_cache, result_key
+from .telemetry import emit as emit_telemetry
+from .vectors import EMB_DTYPE, INT8_QPARAMS_FILE, SHARDS_FILE, VECTOR_FILES, EmbeddingMatrix, load_legacy, load_vectors
+from .versions import MANIFEST_FILE, POINTER_FILE, resolve_index_dir, verify_version
+
 # Optional central config
 try:
     from config_paths import INDEX_DIR as _INDEX_DIR, PROC_DIR as _PROC_DIR
@@ -211,19 +227,133 @@ except Exception:
 ENV_INDEX_DIR = os.getenv("RAG_INDEX_DIR")
 ENV_PROC_DIR = os.getenv("RAG_PROCESSED_DIR")
 
-INDEX_DIR = Path(ENV_INDEX_DIR).resolve() if ENV_INDEX_DIR else Path(DEFAULT_INDEX_DIR)
+# Versioned layout: INDEX_ROOT/current names the served vN (see fitapp_core.rag.versions).
+# Without RAG_INDEX_DIR the store follows that pointer, and DEFAULT_INDEX_DIR until one is set.
+INDEX_ROOT = Path(os.getenv("RAG_INDEX_ROOT") or Path(DEFAULT_INDEX_DIR).parent)
+INDEX_DIR = Path(ENV_INDEX_DIR).resolve() if ENV_INDEX_DIR else INDEX_ROOT / POINTER_FILE
 PROC_DIR = Path(ENV_PROC_DIR).resolve() if ENV_PROC_DIR else Path(DEFAULT_PROC_DIR)
 
 _EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
+# Query embedder: sentence-transformers (default, _EMBED_MODEL_NAME) or hashing (numpy only, RAG_EMBED_DIM dims).
+# Indexes record the embedder they were built with (build.json); dense search is off on a mismatch.
+EMBEDDER = os.getenv("RAG_EMBEDDER", "sentence-transformers").strip().lower()
+EMBED_DIM = int(os.getenv("RAG_EMBED_DIM", "384"))
+
+# Seconds between index-dir change checks in get_store(); 0 checks on every call, <0 never reloads
+_RELOAD_CHECK_S = float(os.getenv("RAG_RELOAD_CHECK_S", "2"))
+
+# Retrieval mode: dense (embeddings), lexical (BM25) or hybrid (both, fused); per-query "mode" overrides.
+# Dense queries fall back to lexical when the embedder or vector index is unavailable.
+RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "dense").strip().lower()
+HYBRID_FUSION = os.getenv("RAG_HYBRID_FUSION", "rrf").strip().lower()  # rrf | weighted
+HYBRID_ALPHA = float(os.getenv("RAG_HYBRID_ALPHA", "0.5"))  # dense weight for weighted fusion
+BM25_ENABLED = os.getenv("RAG_BM25", "true").strip().lower() in ("1", "true", "yes")
+
+# Default search effort for approximate FAISS indexes (IVF lists probed / HNSW beam width);
+# per-query "nprobe" / "ef_search" override. Ignored by exact (flat) indexes.
+ANN_NPROBE = int(os.getenv("RAG_NPROBE", "16"))
+ANN_EF_SEARCH = int(os.getenv("RAG_EF_SEARCH", "64"))
+
+# Default MMR trade-off (1 = pure relevance, 0 = pure diversity); unset disables MMR unless a query passes "mmr_lambda"
+_MMR_ENV = os.getenv("RAG_MMR_LAMBDA", "").strip()
+MMR_LAMBDA: Optional[float] = float(_MMR_ENV) if _MMR_ENV else None
+
+# Threads searching shards of a sharded index concurrently
+SHARD_WORKERS = int(os.getenv("RAG_SHARD_WORKERS", "8"))
+
+# Files whose changes trigger a hot reload of the shared store
+_INDEX_FILES = ("meta.parquet", "faiss.index", "embeddings.npy", *VECTOR_FILES.values(), INT8_QPARAMS_FILE)
+
+# Process-wide embedder cache so store reloads don't drop the loaded model
+_EMBEDDERS: Dict[str, Any] = {}
+_EMBEDDERS_LOCK = threading.Lock()
+
+def _load_embedder(name: str = _EMBED_MODEL_NAME):
+    model = _EMBEDDERS.get(name)
+    if model is not None:
+        return model
+    with _EMBEDDERS_LOCK:
+        if name not in _EMBEDDERS:
+            from sentence_transformers import SentenceTransformer  # lazy import
+            _EMBEDDERS[name] = SentenceTransformer(name)
+        return _EMBEDDERS[name]
+
+# kind -> (id of the vectors it produces, factory); factories run once per process
+_EMBEDDER_KINDS: Dict[str, Tuple[Callable[[], str], Callable[[], Any]]] = {
+    "sentence-transformers": (lambda: _EMBED_MODEL_NAME, lambda: _load_embedder(_EMBED_MODEL_NAME)),
+    "hashing": (lambda: HashingEmbedder(dim=EMBED_DIM).id, lambda: HashingEmbedder(dim=EMBED_DIM)),
+}
+
+def register_embedder(kind: str, embedder_id: Callable[[], str], factory: Callable[[], Any]) -> None:
+    """Add an embedder selectable via RAG_EMBEDDER; factory() returns an object with encode(texts, normalize_embeddings)."""
+    _EMBEDDER_KINDS[kind] = (embedder_id, factory)
+
+def embedder_kinds() -> List[str]:
+    return sorted(_EMBEDDER_KINDS)
+
+def embedder_id(kind: Optional[str] = None) -> str:
+    kind = kind or EMBEDDER
+    if kind not in _EMBEDDER_KINDS:
+        raise ValueError(f"unknown embedder {kind!r} (known: {', '.join(embedder_kinds())})")
+    return _EMBEDDER_KINDS[kind][0]()
+
+def get_embedder(kind: Optional[str] = None):
+    """Shared embedder instance for kind (default RAG_EMBEDDER)."""
+    kind = kind or EMBEDDER
+    key = f"{kind}:{embedder_id(kind)}"
+    model = _EMBEDDERS.get(key)
+    if model is None:
+        model = _EMBEDDER_KINDS[kind][1]()
+        with _EMBEDDERS_LOCK:
+            model = _EMBEDDERS.setdefault(key, model)
+    return model
+
+def _read_build_info(index_dir: Path) -> Dict[str, Any]:
+    try:
+        return json.loads((Path(index_dir) / "build.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _built_with(index_dir: Path) -> str:
+    # Indexes that predate build.json's "embedder" entry were embedded with the default model (as in build.py)
+    return _read_build_info(index_dir).get("embedder") or _EMBED_MODEL_NAME
+
+def _mmr_lambda(request: Dict) -> Optional[float]:
+    lam = request.get("mmr_lambda")
+    return MMR_LAMBDA if lam is None else float(lam)
+
+def _depth(request: Dict, mode: str) -> int:
+    # Hybrid and MMR rank a deeper candidate list before fusing / diversifying
+    top_k = int(request.get("top_k", 6))
+    deep = mode == "hybrid" or _mmr_lambda(request) is not None
+    return max(top_k * 4, 20) if deep else top_k
+
+def _faiss_kind(index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    try:
+        faiss.extract_index_ivf(index)
+        return "ivf"
+    except Exception:
+        return "flat"
+
 class RAGStore:
-    def __init__(self, index_dir: Path = INDEX_DIR, processed_dir: Path = PROC_DIR):
+    def __init__(self, index_dir: Optional[Path] = None, processed_dir: Optional[Path] = None):
+        # Follow a `current` pointer (the default INDEX_DIR) to its version, as get_store() does
+        index_dir = _resolve_index_dir(Path(index_dir or INDEX_DIR))
+        processed_dir = Path(processed_dir or PROC_DIR)
         self._disabled: bool = False
         self._use_faiss: bool = False
         self._embedder = None
-        self.meta: Optional[pd.DataFrame] = None
+        self.columns: Optional[ChunkColumns] = None
+        self.bm25: Optional[BM25Index] = None
         self.index = None
-        self.emb: Optional[np.ndarray] = None
+        self.index_kind: Optional[str] = None  # flat | ivf | hnsw
+        self._index_bytes: int = 0
+        self.emb: Optional[EmbeddingMatrix] = None
+        self._tag_vocab: Dict[str, int] = {}
+        self._tag_matrix: np.ndarray = np.zeros((0, 0), dtype=bool)
 
         print(f"[RAG] Index dir: {index_dir} | Processed dir: {processed_dir}", file=sys.stderr)
 
@@ -231,12 +361,17 @@ class RAGStore:
         meta_path = index_dir / "meta.parquet"
         chunks_path = processed_dir / "chunks.jsonl"
         try:
+            # Read once into column arrays; the DataFrame is not kept
             if meta_path.exists():
-                self.meta = pd.read_parquet(meta_path)
-            elif chunks_path.exists():
-                chunks = pd.read_json(chunks_path, lines=True)
-                self.meta = chunks[["id", "text"]].copy()
-            else:
+                try:
+                    self.columns = ChunkColumns.from_frame(pd.read_parquet(meta_path))
+                except Exception as e:
+                    if not chunks_path.exists():
+                        raise
+                    print(f"[RAG] meta.parquet unreadable ({e}); using chunks.jsonl", file=sys.stderr)
+            if self.columns is None and chunks_path.exists():
+                self.columns = ChunkColumns.from_frame(pd.read_json(chunks_path, lines=True))
+            elif self.columns is None:
                 print("[RAG] disabled (no meta/chunks found)", file=sys.stderr)
                 self._disabled = True
         except Exception as e:
@@ -251,50 +386,330 @@ class RAGStore:
             if self._use_faiss:
                 try:
                     self.index = faiss.read_index(str(faiss_path))
-                    print("[RAG] Using FAISS backend", file=sys.stderr)
+                    self.index_kind = _faiss_kind(self.index)
+                    if self.index_kind == "ivf":
+                        faiss.extract_index_ivf(self.index).make_direct_map()  # id -> vector lookups for MMR
+                    self._index_bytes = os.path.getsize(faiss_path)  # ~in-memory size; serializing would copy the index
+                    print(f"[RAG] Using FAISS backend ({self.index_kind})", file=sys.stderr)
                 except Exception as e:
                     print(f"[RAG] FAISS load failed: {e}", file=sys.stderr)
                     self._use_faiss = False
             if not self._use_faiss:
-                if emb_path.exists():
+                # Prefer the pre-normalized mmap file (zero copies); raw embeddings.npy is normalized in memory
+                try:
+                    self.emb = load_vectors(index_dir, EMB_DTYPE)
+                except Exception as e:
+                    print(f"[RAG] {EMB_DTYPE} vectors load failed: {e}", file=sys.stderr)
+                if self.emb is not None:
+                    print(f"[RAG] Using NumPy backend ({self.emb.dtype}, mmap)", file=sys.stderr)
+                elif emb_path.exists():
                     try:
-                        emb = np.load(emb_path)
-                        norms = np.linalg.norm(emb, axis=1, keepdims=True) + 1e-12
-                        self.emb = (emb / norms).astype(np.float32)
+                        self.emb = load_legacy(emb_path)
                         print("[RAG] Using NumPy backend", file=sys.stderr)
                     except Exception as e:
-                        print(f"[RAG] disabled (embeddings load error: {e})", file=sys.stderr)
-                        self._disabled = True
+                        print(f"[RAG] embeddings load error: {e}", file=sys.stderr)
                 else:
-                    print("[RAG] disabled (no backend/index)", file=sys.stderr)
-                    self._disabled = True
+                    print("[RAG] no vector backend/index", file=sys.stderr)
 
-        if self.meta is None or getattr(self.meta, "empty", True):
+        if self.columns is None or self.columns.empty:
             print("[RAG] disabled (empty metadata)", file=sys.stderr)
             self._disabled = True
+        else:
+            # One boolean column per distinct tag; filters become column ORs/ANDs instead of per-row scans
+            self._tag_vocab = self.columns.tag_vocab
+            self._tag_matrix = self.columns.tag_matrix()
+            if BM25_ENABLED:
+                self.bm25 = BM25Index(self.columns.text(i) for i in range(len(self.columns)))
+            rows = self.index.ntotal if self._use_faiss else (len(self.emb) if self.emb is not None else None)
+            if rows is not None and rows != len(self.columns):
+                self._disable_dense(f"vector rows ({rows}) != metadata rows ({len(self.columns)})")
+            if not self.has_dense and self.bm25 is None:
+                print("[RAG] disabled (no backend/index)", file=sys.stderr)
+                self._disabled = True
+            self.check_embedder(_built_with(index_dir))
+            if not self._disabled and not self.has_dense:
+                print("[RAG] Using lexical (BM25) backend only", file=sys.stderr)
+
+    @property
+    def has_dense(self) -> bool:
+        return self._use_faiss or self.emb is not None
+
+    @property
+    def dim(self) -> Optional[int]:
+        if self._use_faiss:
+            return int(self.index.d)
+        return int(self.emb.shape[1]) if self.emb is not None else None
+
+    @property
+    def backend(self) -> str:
+        return "faiss" if self._use_faiss else ("numpy" if self.emb is not None else "bm25")
+
+    def check_embedder(self, built_with: Optional[str]) -> None:
+        # Vectors from another embedder live in a different space; keep only lexical retrieval
+        built_with = built_with or _EMBED_MODEL_NAME
+        if self.has_dense and built_with != embedder_id():
+            self._disable_dense(f"index built with {built_with}, queries use {embedder_id()}")
+
+    def _disable_dense(self, reason: str) -> None:
+        print(f"[RAG] {reason}; dense retrieval off", file=sys.stderr)
+        self._use_faiss, self.index, self.emb = False, None, None
+        if self.bm25 is None:
+            self._disabled = True
+
+    def _candidate_mask(self, domains: Optional[List[str]], evidence: Optional[str]) -> Optional[np.ndarray]:
+        if not domains and not evidence:
+            return None
+        n = self._tag_matrix.shape[0]
+        mask = np.ones(n, dtype=bool)
+        if domains:
+            cols = [self._tag_vocab[f"domain:{d}"] for d in domains if f"domain:{d}" in self._tag_vocab]
+            if not cols:
+                return np.zeros(n, dtype=bool)
+            mask &= self._tag_matrix[:, cols].any(axis=1)
+        if evidence:
+            col = self._tag_vocab.get(f"evidence:{evidence}")
+            if col is None:
+                return np.zeros(n, dtype=bool)
+            mask &= self._tag_matrix[:, col]
+        return mask
 
     def _embedder_model(self):
-        from sentence_transformers import SentenceTransformer  # lazy import
+        # SentenceTransformer: shared embed service when configured (RAG_EMBED_SOCKET), else in-process
         if self._embedder is None:
-            self._embedder = SentenceTransformer(_EMBED_MODEL_NAME)
+            if EMBEDDER == "sentence-transformers":
+                self._embedder = connect_embedder(_EMBED_MODEL_NAME) or _load_embedder(_EMBED_MODEL_NAME)
+            else:
+                self._embedder = get_embedder()
         return self._embedder
 
+    def resident_bytes(self) -> int:
+        total = 0
+        if self.emb is not None:
+            total += self.emb.resident_bytes()
+        if self.index is not None:
+            total += self._index_bytes
+        if self.columns is not None:
+            total += self.columns.nbytes() + int(self._tag_matrix.nbytes)
+        if self.bm25 is not None:
+            total += self.bm25.nbytes
+        return total
+
     def _encode(self, texts: List[str]) -> np.ndarray:
-        model = self._embedder_model()
-        vecs = model.encode(texts, normalize_embeddings=True)
-        return np.asarray(vecs, dtype=np.float32)
-
-    def _search_numpy(self, qv: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
-        sims = (self.emb @ qv.T).ravel()
-        n = sims.size
-        if n == 0:
-            return sims, np.array([], dtype=int)
-        if k >= n:
-            order = np.argsort(-sims)
+        cache = get_query_cache()
+        model_id = embedder_id()
+        vecs: List[Optional[np.ndarray]] = [cache.get(model_id, t) for t in texts]
+        missing: Dict[str, List[int]] = {}
+        for i, v in enumerate(vecs):
+            if v is None:
+                missing.setdefault(normalize_query(texts[i]), []).append(i)
+        if missing:
+            try:
+                fresh = self._embedder_model().encode(list(missing), normalize_embeddings=True)
+            except EmbedServiceError as e:
+                print(f"[RAG] {e}; embedding in-process", file=sys.stderr)
+                self._embedder = _load_embedder(_EMBED_MODEL_NAME)
+                fresh = self._embedder.encode(list(missing), normalize_embeddings=True)
+            for text, v in zip(missing, np.asarray(fresh, dtype=np.float32)):
+                v = cache.put(model_id, text, v)
+                for i in missing[text]:
+                    vecs[i] = v
+        return np.stack(vecs).astype(np.float32, copy=False)
+
+    def _search_numpy(self, qv: np.ndarray, k: int, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # qv is (Q, d); one (Q×d)·(d×N) product scores every query, then a row-wise top-k
+        if allowed is None:
+            sims = self.emb.scores(qv)
         else:
-            topk = np.argpartition(-sims, k)[:k]
-            order = topk[np.argsort(-sims[topk])]
-        return sims[order], order
+            allowed = allowed[allowed < len(self.emb)]
+            sims = self.emb.scores(qv, allowed)  # gathered rows only
+        n = sims.shape[1]
+        k = min(k, n)
+        if k == 0:
+            return np.zeros((qv.shape[0], 0), dtype=np.float32), np.zeros((qv.shape[0], 0), dtype=np.int64)
+        if k < n:
+            part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            part = np.broadcast_to(np.arange(n), sims.shape)
+        part_sims = np.take_along_axis(sims, part, axis=1)
+        order = np.argsort(-part_sims, axis=1)
+        idx = np.take_along_axis(part, order, axis=1)
+        top = np.take_along_axis(part_sims, order, axis=1)
+        return top, (idx if allowed is None else allowed[idx])
+
+    def _search_faiss(
+        self,
+        qv: np.ndarray,
+        k: int,
+        allowed: Optional[np.ndarray] = None,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # Missing neighbours come back as -1 and are skipped during hit assembly
+        sel = faiss.IDSelectorBatch(allowed.astype(np.int64)) if allowed is not None else None
+        if self.index_kind == "ivf":
+            params = faiss.SearchParametersIVF(nprobe=int(nprobe or ANN_NPROBE))
+        elif self.index_kind == "hnsw":
+            # efSearch below k would cap the result list
+            params = faiss.SearchParametersHNSW(efSearch=max(int(ef_search or ANN_EF_SEARCH), k))
+        elif sel is None:
+            return self.index.search(qv, k)
+        else:
+            params = faiss.SearchParameters()
+        if sel is not None:
+            params.sel = sel
+        return self.index.search(qv, k, params=params)
+
+    def _vectors(self, rows: np.ndarray) -> Optional[np.ndarray]:
+        if self.emb is not None:
+            return self.emb.take(rows)
+        if self._use_faiss:
+            try:
+                return self.index.reconstruct_batch(rows.astype(np.int64))
+            except Exception as e:
+                print(f"[RAG] vectors unavailable for MMR ({e})", file=sys.stderr)
+        return None
+
+    def _diversify(self, ranked: Tuple[np.ndarray, np.ndarray], top_k: int, lam: float, cosine: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """MMR re-selection of top_k from the ranked candidates; hits keep their original scores."""
+        scores, ids = ranked
+        if ids.size <= 1:
+            return ranked
+        vecs = self._vectors(ids)
+        if vecs is None:
+            return ranked
+        rel = np.asarray(scores, dtype=np.float32)
+        if not cosine:
+            # Fused / BM25 scores aren't on the cosine scale; map them to [0, 1]
+            lo, hi = float(rel.min()), float(rel.max())
+            rel = np.ones_like(rel) if hi - lo < 1e-12 else (rel - lo) / (hi - lo)
+        picks = mmr_select(vecs, rel, top_k, lam)
+        return scores[picks], ids[picks]
+
+    def _hits(self, sims: np.ndarray, idx: np.ndarray, top_k: int) -> List[Dict]:
+        # Vectorized over the candidate rows; text is only sliced for the final top_k
+        valid = (idx >= 0) & (idx < len(self.columns))
+        return self.columns.records(idx[valid][:top_k], sims[valid][:top_k])
+
+    def _mode_for(self, request: Dict) -> str:
+        mode = (request.get("mode") or RETRIEVAL_MODE).strip().lower()
+        if mode not in ("dense", "lexical", "hybrid"):
+            mode = "dense"
+        if not self.has_dense:
+            return "lexical"
+        if mode != "dense" and self.bm25 is None:
+            return "dense"
+        return mode
+
+    def _fuse(self, request: Dict, dense: Tuple[np.ndarray, np.ndarray], lexical: Tuple[np.ndarray, np.ndarray], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        fusion = (request.get("fusion") or HYBRID_FUSION).strip().lower()
+        if fusion == "weighted":
+            alpha = float(request.get("alpha", HYBRID_ALPHA))
+            return weighted_fuse(dense, lexical, k, alpha=alpha)
+        return rrf_fuse([dense[1], lexical[1]], k)
+
+    def query_many(self, requests: List[Dict], query_vectors: Optional[Dict[str, np.ndarray]] = None) -> List[List[Dict]]:
+        """
+        Batched retrieval over retrieve_snippets-style inputs (query, top_k, domains, evidence, mode,
+        nprobe / ef_search for approximate FAISS indexes, mmr_lambda to diversify the final top_k).
+        Distinct query texts are encoded in one call (or taken from query_vectors, keyed by normalized
+        query); requests sharing a filter share one dense search.
+        Returns one hit list per request, in input order.
+        """
+        results: List[List[Dict]] = [[] for _ in requests]
+        if self._disabled:
+            if any((r.get("query") or "").strip() for r in requests):
+                print("[RAG] query skipped (disabled)", file=sys.stderr)
+            return results
+        for i, (mode, ranked) in self._rank_many(requests, query_vectors).items():
+            results[i] = self._finish(requests[i], mode, ranked)
+        return results
+
+    def _finish(self, request: Dict, mode: str, ranked: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> List[Dict]:
+        """Fuse the dense / lexical candidate lists of one request, diversify, and build its hits."""
+        top_k = int(request.get("top_k", 6))
+        best = ranked["lexical"] if mode == "lexical" else ranked["dense"]
+        if mode == "hybrid":
+            best = self._fuse(request, best, ranked["lexical"], _depth(request, mode))
+        lam = _mmr_lambda(request)
+        if lam is not None:
+            best = self._diversify(best, top_k, lam, cosine=mode == "dense")
+        return self._hits(*best, top_k)
+
+    def _rank_many(
+        self, requests: List[Dict], query_vectors: Optional[Dict[str, np.ndarray]] = None
+    ) -> Dict[int, Tuple[str, Dict[str, Tuple[np.ndarray, np.ndarray]]]]:
+        """
+        Candidate lists of query_many before fusion and MMR: request index -> (mode, {"dense": ...,
+        "lexical": ...}), each (scores, rows) best first and _depth() long. Requests whose filters
+        match nothing are left out.
+        """
+        out: Dict[int, Tuple[str, Dict[str, Tuple[np.ndarray, np.ndarray]]]] = {}
+        live = [i for i, r in enumerate(requests) if (r.get("query") or "").strip()]
+        if not live or self._disabled:
+            return out
+
+        modes = {i: self._mode_for(requests[i]) for i in live}
+        texts: Dict[str, int] = {}
+        for i in live:
+            if modes[i] != "lexical":
+                texts.setdefault(normalize_query(requests[i]["query"]), len(texts))
+        qv_all: Optional[np.ndarray] = None
+        if texts:
+            try:
+                if query_vectors is not None and all(t in query_vectors for t in texts):
+                    qv_all = np.stack([query_vectors[t] for t in texts])
+                else:
+                    qv_all = self._encode(list(texts))  # (U, d)
+            except Exception as e:
+                if self.bm25 is None:
+                    print(f"[RAG] embedder unavailable ({e}); skipping retrieval", file=sys.stderr)
+                    return out
+                print(f"[RAG] embedder unavailable ({e}); falling back to lexical (BM25)", file=sys.stderr)
+                modes = {i: "lexical" for i in live}
+        if qv_all is not None and self.has_dense and qv_all.shape[1] != self.dim:
+            # e.g. RAG_EMBED_DIM changed since the build: the product can't be taken, so answer lexically from now on
+            self._disable_dense(f"query vectors have {qv_all.shape[1]} dims, index has {self.dim}")
+            if self._disabled:
+                return out
+            qv_all, modes = None, {i: "lexical" for i in live}
+
+        groups: Dict[Tuple, List[int]] = {}
+        for i in live:
+            r = requests[i]
+            key = (tuple(r.get("domains") or ()), r.get("evidence") or None, r.get("nprobe"), r.get("ef_search"))
+            groups.setdefault(key, []).append(i)
+
+        for (domains, evidence, nprobe, ef_search), members in groups.items():
+            # Filter first, then search only the allowed rows: exact top-k under the filter
+            mask = self._candidate_mask(list(domains), evidence)
+            allowed = np.flatnonzero(mask) if mask is not None else None
+            candidates = int(allowed.size) if allowed is not None else len(self.columns)
+            if candidates == 0:
+                continue
+
+            dense_members = [i for i in members if modes[i] != "lexical"]
+            pos: Dict[int, int] = {}
+            if dense_members:
+                rows = sorted({texts[normalize_query(requests[i]["query"])] for i in dense_members})
+                pos = {row: j for j, row in enumerate(rows)}
+                k = min(max(_depth(requests[i], modes[i]) for i in dense_members), candidates)
+                qv = np.ascontiguousarray(qv_all[rows])
+                if self._use_faiss:
+                    sims, idx = self._search_faiss(qv, k, allowed, nprobe=nprobe, ef_search=ef_search)
+                else:
+                    sims, idx = self._search_numpy(qv, k, allowed)
+
+            for i in members:
+                d = _depth(requests[i], modes[i])
+                ranked: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+                if modes[i] != "lexical":
+                    j = pos[texts[normalize_query(requests[i]["query"])]]
+                    valid = idx[j][:d] >= 0
+                    ranked["dense"] = (sims[j][:d][valid], idx[j][:d][valid])
+                if modes[i] != "dense":
+                    ranked["lexical"] = self.bm25.search(requests[i]["query"], d, allowed)
+                out[i] = (modes[i], ranked)
+        return out
 
     def query(
         self,
@@ -306,61 +721,438 @@ class RAGStore:
         q = inputs.get("query") or ""
         if not q.strip():
             return []
+        return self.query_many([{**inputs, "query": q, "top_k": top_k, "domains": domains, "evidence": evidence}])[0]
+
+_SHARD_POOL: Optional[ThreadPoolExecutor] = None
+_SHARD_POOL_LOCK = threading.Lock()
+
+def _shard_pool() -> ThreadPoolExecutor:
+    global _SHARD_POOL
+    if _SHARD_POOL is None:
+        with _SHARD_POOL_LOCK:
+            if _SHARD_POOL is None:
+                _SHARD_POOL = ThreadPoolExecutor(max_workers=max(1, SHARD_WORKERS), thread_name_prefix="rag-shard")
+    return _SHARD_POOL
+
+def _read_shards(index_dir: Path) -> Optional[List[Dict]]:
+    path = Path(index_dir) / SHARDS_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))["shards"]
+
+class ShardedStore:
+    """
+    Index split into shard sub-dirs listed in shards.json, each served by its own RAGStore.
+    Queries are encoded once and fanned out on a shared thread pool (FAISS and BLAS release the GIL)
+    to the shards whose tags can satisfy the filters. Each shard returns its dense and lexical
+    candidates; these are merged into one ranking per side (BM25 uses corpus-wide statistics, so
+    scores compare across shards), then fused and diversified once, as an unsharded store would.
+    """
+
+    def __init__(self, index_dir: Path, processed_dir: Path = PROC_DIR):
+        print(f"[RAG] Sharded index dir: {index_dir}", file=sys.stderr)
+        self.shards: List[Tuple[Dict, RAGStore]] = []
+        for spec in _read_shards(index_dir) or []:
+            shard_dir = Path(index_dir) / spec["dir"]
+            # The shard dir doubles as processed_dir: no fallback to the full chunks.jsonl
+            store = RAGStore(shard_dir, shard_dir)
+            if not store._disabled:
+                self.shards.append((spec, store))
+        built_with = _built_with(index_dir)
+        for _, store in self.shards:
+            store.check_embedder(built_with)
+        self.shards = [(spec, store) for spec, store in self.shards if not store._disabled]
+        self._disabled = not self.shards
         if self._disabled:
-            print("[RAG] query skipped (disabled)", file=sys.stderr)
-            return []
+            print("[RAG] disabled (no usable shards)", file=sys.stderr)
+        self.index_kind = next((s.index_kind for _, s in self.shards if s.index_kind), None)
+        # Global row id = shard offset + row within the shard
+        self._offsets = np.cumsum([0] + [len(s.columns) for _, s in self.shards]).astype(np.int64)
+        self._share_bm25_stats()
+
+    def _share_bm25_stats(self) -> None:
+        # Per-shard idf / avgdl would make a term rare in one shard outscore the same match elsewhere
+        indexes = [s.bm25 for _, s in self.shards if s.bm25 is not None]
+        if len(indexes) < 2:
+            return
+        n_docs, total_len, df = 0, 0.0, {}
+        for bm25 in indexes:
+            n, length, terms = bm25.corpus_stats()
+            n_docs += n
+            total_len += length
+            for term, count in terms.items():
+                df[term] = df.get(term, 0) + count
+        avgdl = total_len / n_docs if n_docs and total_len > 0 else 1.0
+        for bm25 in indexes:
+            bm25.reweight(n_docs, avgdl, df)
+
+    @property
+    def has_dense(self) -> bool:
+        return any(s.has_dense for _, s in self.shards)
+
+    @property
+    def backend(self) -> str:
+        return f"sharded:{self.shards[0][1].backend}" if self.shards else "sharded"
+
+    def __len__(self) -> int:
+        return sum(len(s.columns) for _, s in self.shards)
+
+    def resident_bytes(self) -> int:
+        return sum(s.resident_bytes() for _, s in self.shards)
+
+    @staticmethod
+    def _may_match(spec: Dict, request: Dict) -> bool:
+        # Manifest tag lists let filtered queries skip shards without touching them
+        domains = request.get("domains")
+        if domains and spec.get("domains") is not None and not set(domains) & set(spec["domains"]):
+            return False
+        evidence = request.get("evidence")
+        if evidence and spec.get("evidence") is not None and evidence not in spec["evidence"]:
+            return False
+        return True
+
+    def query_many(self, requests: List[Dict]) -> List[List[Dict]]:
+        results: List[List[Dict]] = [[] for _ in requests]
+        live = [i for i, r in enumerate(requests) if (r.get("query") or "").strip()]
+        if not live or self._disabled:
+            return results
+
+        # Encode once for all shards; without an embedder every shard answers lexically
+        vectors: Dict[str, np.ndarray] = {}
+        dense_shard = next((s for _, s in self.shards if s.has_dense), None)
+        texts = sorted({normalize_query(requests[i]["query"]) for i in live if (requests[i].get("mode") or RETRIEVAL_MODE) != "lexical"})
+        if dense_shard is not None and texts:
+            try:
+                vectors = dict(zip(texts, dense_shard._encode(texts)))
+            except Exception as e:
+                print(f"[RAG] embedder unavailable ({e}); falling back to lexical (BM25)", file=sys.stderr)
+                requests = [{**r, "mode": "lexical"} for r in requests]
+
+        jobs = []
+        for n, (spec, store) in enumerate(self.shards):
+            members = [i for i in live if self._may_match(spec, requests[i])]
+            if members:
+                jobs.append((members, n, store, [requests[i] for i in members]))
+        if len(jobs) == 1:
+            outputs = [jobs[0][2]._rank_many(jobs[0][3], query_vectors=vectors)]
+        else:
+            futures = [_shard_pool().submit(store._rank_many, reqs, vectors) for _, _, store, reqs in jobs]
+            outputs = [f.result() for f in futures]
+
+        # Shard candidates per request and side, in global row ids
+        parts: Dict[int, Dict[str, List[Tuple[np.ndarray, np.ndarray]]]] = {}
+        for (members, n, _, _), ranked_by_request in zip(jobs, outputs):
+            for j, (_, ranked) in ranked_by_request.items():
+                sides = parts.setdefault(members[j], {})
+                for side, (scores, rows) in ranked.items():
+                    sides.setdefault(side, []).append((scores, rows + self._offsets[n]))
+        for i, sides in parts.items():
+            # Both sides present: the request was hybrid (or shards disagree on having vectors)
+            mode = "hybrid" if len(sides) == 2 else next(iter(sides))
+            depth = _depth(requests[i], mode)
+            ranked = {side: _merge_ranked(lists, depth) for side, lists in sides.items()}
+            results[i] = self._finish(requests[i], mode, ranked)
+        return results
+
+    def _shard_of(self, rows: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self._offsets, rows, side="right") - 1
+
+    def _vectors(self, rows: np.ndarray) -> Optional[np.ndarray]:
+        shard_of = self._shard_of(rows)
+        out: Optional[np.ndarray] = None
+        for n in np.unique(shard_of).tolist():
+            sel = np.flatnonzero(shard_of == n)
+            vecs = self.shards[n][1]._vectors(rows[sel] - self._offsets[n])
+            if vecs is None:
+                return None
+            if out is None:
+                out = np.empty((rows.size, vecs.shape[1]), dtype=np.float32)
+            out[sel] = vecs
+        return out
+
+    def _hits(self, scores: np.ndarray, rows: np.ndarray, top_k: int) -> List[Dict]:
+        scores, rows = scores[:top_k], rows[:top_k]
+        shard_of = self._shard_of(rows)
+        hits: List[Optional[Dict]] = [None] * rows.size
+        for n in np.unique(shard_of).tolist():
+            sel = np.flatnonzero(shard_of == n)
+            for j, hit in zip(sel.tolist(), self.shards[n][1]._hits(scores[sel], rows[sel] - self._offsets[n], sel.size)):
+                hits[j] = hit
+        return [h for h in hits if h is not None]
+
+    query = RAGStore.query
+    _finish = RAGStore._finish
+    _fuse = RAGStore._fuse
+    _diversify = RAGStore._diversify
+
+def _merge_ranked(lists: List[Tuple[np.ndarray, np.ndarray]], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Best k of several (scores, ids) lists on one scale; ties go to the lower id
+    scores = np.concatenate([s for s, _ in lists]).astype(np.float32)
+    ids = np.concatenate([i for _, i in lists]).astype(np.int64)
+    order = np.lexsort((ids, -scores))[:k]
+    return scores[order], ids[order]
+
+def open_store(index_dir: Optional[Path] = None, processed_dir: Optional[Path] = None):
+    """ShardedStore when index_dir (default INDEX_DIR, pointers resolved) holds shards.json, else a single RAGStore."""
+    index_dir = _resolve_index_dir(Path(index_dir or INDEX_DIR))
+    processed_dir = Path(processed_dir or PROC_DIR)
+    if (index_dir / SHARDS_FILE).exists():
+        return ShardedStore(index_dir, processed_dir)
+    return RAGStore(index_dir=index_dir, processed_dir=processed_dir)
+
+def _file_signature(paths: List[Path]) -> Tuple:
+    sig = []
+    for p in paths:
+        try:
+            st = p.stat()
+            sig.append((p.name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((p.name, None, None))
+    return tuple(sig)
+
+def _resolve_index_dir(index_dir: Path) -> Path:
+    # `current` pointer -> named version; an unset pointer serves the legacy default dir
+    return resolve_index_dir(index_dir) or Path(DEFAULT_INDEX_DIR)
+
+def _version_digest(index_dir: Path, watched: List[Path]) -> str:
+    # A manifest already holds every file's checksum; hashing it stands in for hashing the files
+    manifest = index_dir / MANIFEST_FILE
+    if manifest.exists():
+        return _file_digest([manifest])
+    return _file_digest(watched)
+
+def _file_digest(paths: List[Path]) -> str:
+    h = hashlib.sha1()
+    for p in paths:
+        h.update(p.name.encode("utf-8"))
+        try:
+            with open(p, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+        except OSError:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+class _StoreEntry:
+    def __init__(self, store, signature: Tuple, digest: str, load_ms: float, index_dir: Optional[Path] = None):
+        self.store = store
+        self.index_dir = index_dir
+        self.signature = signature
+        self.digest = digest
+        self.checked_at = time.monotonic()
+        self.loaded_at = time.time()
+        self.load_ms = load_ms
+
+class _StoreRegistry:
+    """
+    Process-wide RAGStore cache keyed by (index_dir, processed_dir).
+    Stores load once; a changed index (stat signature, then content digest) is
+    loaded off to the side and swapped in, while other threads keep serving the old one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], _StoreEntry] = {}
+        self._load_count = 0
+        self._load_ms_total = 0.0
+
+    @staticmethod
+    def _watched(index_dir: Path, processed_dir: Path) -> List[Path]:
+        pointer = [index_dir] if index_dir.name == POINTER_FILE and not index_dir.is_dir() else []
+        index_dir = _resolve_index_dir(index_dir)
+        paths = pointer + [index_dir / f for f in _INDEX_FILES] + [index_dir / SHARDS_FILE, index_dir / MANIFEST_FILE]
         try:
-            qv = self._encode([q])  # (1, d)
+            for spec in _read_shards(index_dir) or []:
+                paths += [index_dir / spec["dir"] / f for f in _INDEX_FILES]
         except Exception as e:
-            print(f"[RAG] embedder unavailable ({e}); skipping retrieval", file=sys.stderr)
-            return []
-        over_k = max(top_k * 3, top_k)
-        if self._use_faiss:
-            sims, idx = self.index.search(qv, over_k)
-            sims = sims[0]
-            idx = idx[0]
-            pre_count = len(idx)
-        else:
-            sims, idx = self._search_numpy(qv, over_k)
-            pre_count = int(idx.size)
+            print(f"[RAG] unreadable {SHARDS_FILE}: {e}", file=sys.stderr)
+        return paths + [processed_dir / "chunks.jsonl"]
 
-        out: List[Dict] = []
-        meta = self.meta if self.meta is not None else pd.DataFrame()
-        for rank, i in enumerate(idx.tolist() if hasattr(idx, "tolist") else idx):
-            if i is None or i < 0:
-                continue
-            if i >= len(meta):
-                continue
-            row = meta.iloc[i].to_dict()
-            tags = row.get("tags", []) or []
-            if domains and not any(f"domain:{d}" in tags for d in domains):
-                continue
-            if evidence and f"evidence:{evidence}" not in tags:
-                continue
-            out.append({
-                "id": row.get("id"),
-                "doc_id": row.get("doc_id"),
-                "text": row.get("text", ""),
-                "tags": tags,
-                "score": float(sims[rank]) if rank < len(sims) else None,
+    def _load(self, key: Tuple[str, str], index_dir: Path, processed_dir: Path) -> _StoreEntry:
+        watched = self._watched(index_dir, processed_dir)
+        signature = _file_signature(watched)
+        version_dir = _resolve_index_dir(index_dir)
+        digest = _version_digest(version_dir, watched)
+        if verify_version(version_dir) is False:
+            print(f"[RAG] WARNING: {version_dir} fails checksum verification", file=sys.stderr)
+        t0 = time.perf_counter()
+        store = open_store(version_dir, processed_dir)
+        load_ms = (time.perf_counter() - t0) * 1000
+        entry = _StoreEntry(store, signature, digest, load_ms, version_dir)
+        old = self._entries.get(key)
+        self._entries[key] = entry  # single assignment: readers see old or new, never partial
+        if old is not None and old.digest != digest:
+            # Cached results are keyed by digest; free the swapped-out version's entries now
+            get_result_cache().drop_version(old.digest)
+        self._load_count += 1
+        self._load_ms_total += load_ms
+        print(f"[RAG] Store loaded in {load_ms:.1f} ms (digest {digest[:12]})", file=sys.stderr)
+        return entry
+
+    def _check(self, key: Tuple[str, str], entry: _StoreEntry, index_dir: Path, processed_dir: Path) -> _StoreEntry:
+        entry.checked_at = time.monotonic()
+        watched = self._watched(index_dir, processed_dir)
+        signature = _file_signature(watched)
+        if signature == entry.signature:
+            return entry
+        # Touched but identical content (e.g. re-copied files) keeps the current store
+        version_dir = _resolve_index_dir(index_dir)
+        if _version_digest(version_dir, watched) == entry.digest:
+            entry.signature = signature
+            return entry
+        if verify_version(version_dir) is False:
+            # Half-copied or corrupted snapshot: keep serving the current one
+            print(f"[RAG] {version_dir} fails checksum verification; keeping {entry.index_dir}", file=sys.stderr)
+            entry.signature = signature
+            return entry
+        print(f"[RAG] Index change detected; reloading store ({version_dir})", file=sys.stderr)
+        return self._load(key, index_dir, processed_dir)
+
+    def entry(self, index_dir: Path, processed_dir: Path) -> _StoreEntry:
+        key = (str(Path(index_dir).resolve()), str(Path(processed_dir).resolve()))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if _RELOAD_CHECK_S < 0 or time.monotonic() - entry.checked_at < _RELOAD_CHECK_S:
+                return entry
+            # Another thread is already checking/reloading: keep serving the current store
+            if not self._lock.acquire(blocking=False):
+                return entry
+            try:
+                return self._check(key, entry, Path(index_dir), Path(processed_dir))
+            finally:
+                self._lock.release()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(key, Path(index_dir), Path(processed_dir))
+            return entry
+
+    def get(self, index_dir: Path, processed_dir: Path) -> RAGStore:
+        return self.entry(index_dir, processed_dir).store
+
+    def reload(self, index_dir: Path, processed_dir: Path, force: bool = True) -> RAGStore:
+        key = (str(Path(index_dir).resolve()), str(Path(processed_dir).resolve()))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or force:
+                entry = self._load(key, Path(index_dir), Path(processed_dir))
+            else:
+                entry = self._check(key, entry, Path(index_dir), Path(processed_dir))
+            return entry.store
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        get_result_cache().clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stores = []
+        for (index_dir, processed_dir), e in list(self._entries.items()):
+            stores.append({
+                "index_dir": index_dir,
+                "version_dir": str(e.index_dir) if e.index_dir is not None else None,
+                "processed_dir": processed_dir,
+                "digest": e.digest,
+                "disabled": e.store._disabled,
+                "backend": e.store.backend,
+                "index_kind": e.store.index_kind,
+                "loaded_at": e.loaded_at,
+                "load_ms": round(e.load_ms, 3),
+                "resident_bytes": e.store.resident_bytes(),
             })
-            if len(out) >= top_k:
-                break
+        return {
+            "load_count": self._load_count,
+            "load_ms_total": round(self._load_ms_total, 3),
+            "resident_bytes": sum(s["resident_bytes"] for s in stores),
+            "stores": stores,
+            "query_cache": get_query_cache().stats(),
+            "result_cache": get_result_cache().stats(),
+        }
 
-        print(f"[RAG] Query: {q[:120]}... | top_k={top_k}", file=sys.stderr)
-        print(f"[RAG] Hits (pre-filter): {pre_count}", file=sys.stderr)
-        print(f"[RAG] Hits (post-filter): {len(out)}", file=sys.stderr)
-        return out
+_REGISTRY = _StoreRegistry()
+
+def get_store(index_dir: Optional[Path] = None, processed_dir: Optional[Path] = None) -> RAGStore:
+    """Shared store for the given dirs (default INDEX_DIR/PROC_DIR); hot-reloads when the index files change."""
+    return _REGISTRY.get(index_dir or INDEX_DIR, processed_dir or PROC_DIR)
 
-def retrieve_snippets(inputs: Dict) -> List[Dict]:
+def reload_store(index_dir: Optional[Path] = None, processed_dir: Optional[Path] = None, force: bool = True) -> RAGStore:
+    """Reload now (force) or only if the index files changed (force=False)."""
+    return _REGISTRY.reload(index_dir or INDEX_DIR, processed_dir or PROC_DIR, force=force)
+
+def store_stats() -> Dict[str, Any]:
+    return _REGISTRY.stats()
+
+def _request(inputs: Dict) -> Dict:
+    return {
+        "query": inputs.get("query") or "",
+        "top_k": inputs.get("top_k", 6),
+        "domains": inputs.get("domains"),
+        "evidence": inputs.get("evidence"),
+        "mode": inputs.get("mode"),
+        "fusion": inputs.get("fusion"),
+        "alpha": inputs.get("alpha"),
+        "nprobe": inputs.get("nprobe"),
+        "ef_search": inputs.get("ef_search"),
+        "mmr_lambda": inputs.get("mmr_lambda"),
+    }
+
+def retrieve_snippets(inputs: Dict) -> Hits:
+    """
+    Top-k hits for one query, served from the result cache when the same request already ran
+    against the same index version. Hits are read-only mappings (tags as tuples).
+    """
+    t0 = time.perf_counter()
     try:
-        store = RAGStore()
-        return store.query(
-            inputs,
-            top_k=inputs.get("top_k", 6),
-            domains=inputs.get("domains"),
-            evidence=inputs.get("evidence"),
-        )
+        entry = _REGISTRY.entry(INDEX_DIR, PROC_DIR)
+        request = _request(inputs)
+        cache = get_result_cache()
+        key = result_key(entry.digest, request)
+        hits = cache.get(key)
+        cached = hits is not None
+        if not cached:
+            hits = entry.store.query(
+                inputs,
+                top_k=request["top_k"],
+                domains=request["domains"],
+                evidence=request["evidence"],
+            )
+            # Empty results aren't cached: they may come from a transient failure
+            hits = cache.put(key, hits) if hits else ()
+        emit_telemetry("rag", {
+            "event": "rag_query",
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3),
+            "top_k": request["top_k"],
+            "hits": len(hits),
+            "cached": cached,
+            "mode": request["mode"] or RETRIEVAL_MODE,
+        })
+        return hits
     except Exception as e:
         print(f"[RAG] retrieval error: {e}", file=sys.stderr)
-        return []
+        return ()
+
+def retrieve_snippets_many(inputs_list: List[Dict]) -> List[Hits]:
+    """Batched retrieve_snippets: one encode call and one search per filter group for the cache misses; output follows input order."""
+    t0 = time.perf_counter()
+    try:
+        entry = _REGISTRY.entry(INDEX_DIR, PROC_DIR)
+        cache = get_result_cache()
+        requests = [_request(inputs) for inputs in inputs_list]
+        keys = [result_key(entry.digest, r) for r in requests]
+        out: List[Hits] = [cache.get(k) or () for k in keys]
+        misses = [i for i, r in enumerate(requests) if not out[i] and r["query"].strip()]
+        if misses:
+            fresh = entry.store.query_many([requests[i] for i in misses])
+            for i, hits in zip(misses, fresh):
+                out[i] = cache.put(keys[i], hits) if hits else ()
+        emit_telemetry("rag", {
+            "event": "rag_query_batch",
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3),
+            "queries": len(requests),
+            "misses": len(misses),
+            "hits": sum(len(h) for h in out),
+        })
+        return out
+    except Exception as e:
+        print(f"[RAG] batch retrieval error: {e}", file=sys.stderr)
+        return [() for _ in inputs_list]
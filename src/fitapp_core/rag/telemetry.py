@@ -0,0 +1,276 @@
+# src/fitapp_core/rag/telemetry.py
+from __future__ import annotations
+
+import argparse
+import atexit
+import glob
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# JSONL sink directory: events go to {stream}_{YYYY-MM-DD}.jsonl (UTC date); empty disables the sink
+TELEMETRY_DIR = os.getenv("TELEMETRY_DIR", "data/logs")
+# Seconds between writer flushes, and the queue bound (events beyond it are dropped, never waited on)
+TELEMETRY_FLUSH_S = float(os.getenv("TELEMETRY_FLUSH_S", "1.0"))
+TELEMETRY_QUEUE_SIZE = int(os.getenv("TELEMETRY_QUEUE_SIZE", "10000"))
+
+_MAX_BATCH = 512
+
+def _utc_ts() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+def _utc_day() -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime())
+
+class TelemetryWriter:
+    """
+    Non-blocking JSONL event sink. emit() only enqueues (dropping and counting events when the
+    queue is full); a daemon thread serializes and appends them in batches, one file per stream
+    and UTC day, so request threads never wait on disk. flush() blocks until queued events are written.
+    """
+
+    def __init__(self, log_dir: Path, flush_s: float = TELEMETRY_FLUSH_S, queue_size: int = TELEMETRY_QUEUE_SIZE):
+        self.log_dir = Path(log_dir)
+        self.flush_s = max(0.01, float(flush_s))
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._files: Dict[str, Tuple[str, Any]] = {}  # stream -> (path, open handle)
+        self._closed = False
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    def emit(self, stream: str, event: Dict[str, Any]) -> bool:
+        """Queue one event for {stream}_{date}.jsonl; False if it was dropped."""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait((stream, event))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.emitted += 1
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued before this call is on disk."""
+        if self._closed or not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "log_dir": str(self.log_dir),
+            "emitted": self.emitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "queued": self._queue.qsize(),
+        }
+
+    def _handle(self, stream: str, day: str) -> Any:
+        path = str(self.log_dir / f"{stream}_{day}.jsonl")
+        current = self._files.get(stream)
+        if current is not None and current[0] == path:
+            return current[1]
+        if current is not None:
+            current[1].close()  # day rolled over
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        f = open(path, "a", encoding="utf-8")
+        self._files[stream] = (path, f)
+        return f
+
+    def _write(self, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+        day = _utc_day()
+        touched = set()
+        for stream, event in batch:
+            try:
+                line = json.dumps(event, ensure_ascii=False, default=str)
+                f = self._handle(stream, day)
+                f.write(line + "\n")
+                touched.add(stream)
+                self.written += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"[Telemetry] write failed: {e}", file=sys.stderr)
+        for stream in touched:
+            self._files[stream][1].flush()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            try:
+                first = self._queue.get(timeout=self.flush_s)
+            except queue.Empty:
+                continue
+            batch: List[Tuple[str, Dict[str, Any]]] = []
+            waiters: List[threading.Event] = []
+            item = first
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= _MAX_BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for w in waiters:
+                w.set()
+        for _, f in self._files.values():
+            f.close()
+        self._files.clear()
+
+_writer: Optional[TelemetryWriter] = None
+_writer_lock = threading.Lock()
+
+def get_telemetry() -> Optional[TelemetryWriter]:
+    """Process-wide writer for TELEMETRY_DIR; None when telemetry is disabled."""
+    global _writer
+    if not TELEMETRY_DIR:
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = TelemetryWriter(Path(TELEMETRY_DIR))
+                atexit.register(_writer.close)
+    return _writer
+
+def emit(stream: str, event: Dict[str, Any]) -> bool:
+    """Queue an event (a "ts" is added if missing); False when disabled or dropped."""
+    writer = get_telemetry()
+    if writer is None:
+        return False
+    if "ts" not in event:
+        event = {"ts": _utc_ts(), **event}
+    return writer.emit(stream, event)
+
+# -------------------------
+# Report
+# -------------------------
+def iter_events(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Stream events from JSONL files; also accepts captured "[LLM-LOG] {...}" stdout lines."""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("[LLM-LOG]"):
+                    line = line[len("[LLM-LOG]"):].strip()
+                if not line.startswith("{"):
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict):
+                    yield event
+
+def _percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values), max(1, math.ceil(p / 100.0 * len(sorted_values)))) - 1
+    return sorted_values[k]
+
+def summarize(events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per (event, model): count, elapsed_ms p50/p95/p99, parse-failure rate and summed token usage."""
+    groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for e in events:
+        key = (str(e.get("event") or "-"), str(e.get("model") or "-"))
+        g = groups.setdefault(key, {"count": 0, "elapsed": [], "parsed": 0, "parse_fail": 0, "tokens": {}})
+        g["count"] += 1
+        elapsed = e.get("elapsed_ms")
+        if isinstance(elapsed, (int, float)):
+            g["elapsed"].append(float(elapsed))
+        if "parse_ok" in e:
+            g["parsed"] += 1
+            g["parse_fail"] += not e["parse_ok"]
+        usage = e.get("usage")
+        if isinstance(usage, dict):
+            for k, v in usage.items():
+                if isinstance(v, (int, float)) and not isinstance(v, bool):
+                    g["tokens"][k] = g["tokens"].get(k, 0) + v
+    rows = []
+    for (event, model), g in sorted(groups.items()):
+        elapsed = sorted(g["elapsed"])
+        rows.append({
+            "event": event,
+            "model": model,
+            "count": g["count"],
+            "p50_ms": _percentile(elapsed, 50),
+            "p95_ms": _percentile(elapsed, 95),
+            "p99_ms": _percentile(elapsed, 99),
+            "parse_fail_rate": round(g["parse_fail"] / g["parsed"], 4) if g["parsed"] else None,
+            "tokens": g["tokens"],
+        })
+    return rows
+
+def _fmt(v: Any) -> str:
+    if v is None:
+        return "-"
+    if isinstance(v, float):
+        return f"{v:.1f}" if v != int(v) else str(int(v))
+    return str(v)
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    header = ["event", "model", "count", "p50_ms", "p95_ms", "p99_ms", "parse_fail", "tokens"]
+    table = [header]
+    for r in rows:
+        tokens = " ".join(f"{k}={_fmt(v)}" for k, v in sorted(r["tokens"].items())) or "-"
+        rate = "-" if r["parse_fail_rate"] is None else f"{r['parse_fail_rate']:.1%}"
+        table.append([r["event"], r["model"], str(r["count"]), _fmt(r["p50_ms"]), _fmt(r["p95_ms"]), _fmt(r["p99_ms"]), rate, tokens])
+    widths = [max(len(row[i]) for row in table) for i in range(len(header) - 1)]
+    for row in table:
+        print("  ".join(c.ljust(w) for c, w in zip(row, widths)) + "  " + row[-1])
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m fitapp_core.rag.telemetry", description="Telemetry JSONL tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("report", help="latency percentiles, parse failures and token usage per event and model")
+    rp.add_argument("logs", nargs="?", default=None, help="glob of JSONL files (default: TELEMETRY_DIR/*.jsonl)")
+    rp.add_argument("--event", default="", help="only events starting with this prefix (e.g. llm_json)")
+    rp.add_argument("--json", action="store_true", help="print rows as JSON")
+    args = ap.parse_args(argv)
+
+    pattern = args.logs or str(Path(TELEMETRY_DIR or "data/logs") / "*.jsonl")
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise SystemExit(f"no files match {pattern}")
+    events = iter_events(paths)
+    if args.event:
+        events = (e for e in events if str(e.get("event", "")).startswith(args.event))
+    rows = summarize(events)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        _print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# src/fitapp_core/rag/vectors.py
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Pre-normalized on-disk formats, loaded with mmap_mode="r" (zero copies, page cache shared across workers)
+VECTOR_FILES = {
+    "float32": "embeddings.f32.npy",
+    "float16": "embeddings.f16.npy",
+    "int8": "embeddings.i8.npy",
+}
+INT8_QPARAMS_FILE = "embeddings.i8.qparams.npy"  # (N, 2) float32: per-row scale, zero_point
+# Sharded versions: manifest listing shard sub-dirs (each a complete index dir) and the tags they hold
+SHARDS_FILE = "shards.json"
+
+# Which pre-normalized file the NumPy backend prefers; falls back to embeddings.npy when absent
+EMB_DTYPE = os.getenv("RAG_EMB_DTYPE", "float32").strip().lower()
+# Rows scored per block when dequantizing on the fly (bounds temporary memory)
+BLOCK_ROWS = int(os.getenv("RAG_EMB_BLOCK_ROWS", "65536"))
+
+def normalize_rows(emb: np.ndarray, inplace: bool = False) -> np.ndarray:
+    emb = np.asarray(emb, dtype=np.float32)
+    if not inplace or not emb.flags.writeable:
+        emb = emb.copy()
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True) + 1e-12
+    return emb
+
+def quantize_int8(emb: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row asymmetric int8: x ≈ scale * (q - zero_point)."""
+    lo = emb.min(axis=1)
+    hi = emb.max(axis=1)
+    scale = np.maximum(hi - lo, 1e-12) / 255.0
+    zero_point = np.round(-lo / scale) - 128.0
+    q = np.clip(np.round(emb / scale[:, None]) + zero_point[:, None], -128, 127).astype(np.int8)
+    return q, np.stack([scale, zero_point], axis=1).astype(np.float32)
+
+def write_vectors(emb: np.ndarray, index_dir: Path, dtype: str = "float32", normalized: bool = False) -> Path:
+    if dtype not in VECTOR_FILES:
+        raise ValueError(f"unsupported vector dtype: {dtype}")
+    index_dir = Path(index_dir)
+    emb = np.asarray(emb, dtype=np.float32) if normalized else normalize_rows(emb)
+    path = index_dir / VECTOR_FILES[dtype]
+    if dtype == "int8":
+        q, qparams = quantize_int8(emb)
+        np.save(path, q)
+        np.save(index_dir / INT8_QPARAMS_FILE, qparams)
+    else:
+        np.save(path, emb.astype(dtype))
+    return path
+
+class EmbeddingMatrix:
+    """
+    Read-only, unit-norm embedding rows in float32, float16 or int8 (scale/zero-point),
+    usually memory-mapped. Scores are computed block by block, dequantizing on the fly.
+    """
+
+    def __init__(self, data: np.ndarray, qparams: Optional[np.ndarray] = None, block_rows: int = BLOCK_ROWS):
+        self.data = data
+        self.qparams = qparams
+        self.block_rows = max(1, int(block_rows))
+        self.dtype = {np.dtype(np.float32): "float32", np.dtype(np.float16): "float16", np.dtype(np.int8): "int8"}[data.dtype]
+        if self.dtype == "int8" and qparams is None:
+            raise ValueError("int8 embeddings need qparams")
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return tuple(self.data.shape)
+
+    def __len__(self) -> int:
+        return int(self.data.shape[0])
+
+    @property
+    def mapped(self) -> bool:
+        return isinstance(self.data, np.memmap)
+
+    @property
+    def nbytes(self) -> int:
+        extra = self.qparams.nbytes if self.qparams is not None else 0
+        return int(self.data.nbytes + extra)
+
+    def resident_bytes(self) -> int:
+        # Mapped pages live in the shared page cache, not in this process's heap
+        return 0 if self.mapped else self.nbytes
+
+    def _block(self, sel) -> np.ndarray:
+        block = self.data[sel]
+        if self.dtype == "float32":
+            return block
+        if self.dtype == "float16":
+            return block.astype(np.float32)
+        scale, zero_point = self.qparams[sel, 0], self.qparams[sel, 1]
+        return (block.astype(np.float32) - zero_point[:, None]) * scale[:, None]
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """Dequantized float32 copy of the given rows."""
+        return self._block(np.asarray(rows))
+
+    def scores(self, qv: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """(Q, n) inner products of qv (Q, d) against all rows, or only `rows` when given."""
+        n = len(self) if rows is None else int(len(rows))
+        if rows is None and self.dtype == "float32" and not self.mapped:
+            return qv @ self.data.T
+        out = np.empty((qv.shape[0], n), dtype=np.float32)
+        qsum = qv.sum(axis=1)[:, None] if self.dtype == "int8" else None
+        for start in range(0, n, self.block_rows):
+            stop = min(start + self.block_rows, n)
+            sel = slice(start, stop) if rows is None else rows[start:stop]
+            block = self.data[sel]
+            if self.dtype == "int8":
+                # scale * (q·v - zp * Σv): no dequantized copy of the block
+                scale, zero_point = self.qparams[sel, 0], self.qparams[sel, 1]
+                out[:, start:stop] = (qv @ block.astype(np.float32).T - qsum * zero_point) * scale
+            else:
+                out[:, start:stop] = qv @ block.astype(np.float32, copy=False).T
+        return out
+
+def load_vectors(index_dir: Path, dtype: str = EMB_DTYPE, mmap: bool = True) -> Optional[EmbeddingMatrix]:
+    """Open the pre-normalized file for `dtype`, or None when it hasn't been written."""
+    index_dir = Path(index_dir)
+    name = VECTOR_FILES.get(dtype)
+    if name is None or not (index_dir / name).exists():
+        return None
+    mode = "r" if mmap else None
+    data = np.load(index_dir / name, mmap_mode=mode)
+    qparams = np.load(index_dir / INT8_QPARAMS_FILE, mmap_mode=mode) if dtype == "int8" else None
+    return EmbeddingMatrix(data, qparams)
+
+def load_legacy(emb_path: Path) -> EmbeddingMatrix:
+    """Raw embeddings.npy: normalize once in place (a single float32 copy) and keep it in memory."""
+    return EmbeddingMatrix(normalize_rows(np.load(emb_path), inplace=True))
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Write pre-normalized (optionally quantized) embeddings next to embeddings.npy")
+    ap.add_argument("index_dir", type=Path)
+    ap.add_argument("--dtype", choices=sorted(VECTOR_FILES), action="append")
+    args = ap.parse_args(argv)
+    emb = normalize_rows(np.load(args.index_dir / "embeddings.npy"), inplace=True)
+    for dtype in args.dtype or ["float32"]:
+        path = write_vectors(emb, args.index_dir, dtype=dtype, normalized=True)
+        print(f"[RAG] wrote {path} ({path.stat().st_size} bytes)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
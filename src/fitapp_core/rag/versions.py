@@ -0,0 +1,206 @@
+# src/fitapp_core/rag/versions.py
+"""
+Versioned index snapshots under an index root (default data/index):
+
+    v1/ v2/ ...      immutable versions written by fitapp_core.rag.build, each with manifest.json
+    current          one line naming the served version; replaced atomically
+    history          one line per switch (timestamp, version), used by rollback
+
+    python -m fitapp_core.rag.versions list
+    python -m fitapp_core.rag.versions promote v3     # verify, then point `current` at v3
+    python -m fitapp_core.rag.versions rollback       # back to the previously served version
+    python -m fitapp_core.rag.versions verify [v3]
+
+Running stores watch `current` and swap to the new version on their next reload check.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MANIFEST_FILE = "manifest.json"
+POINTER_FILE = "current"
+HISTORY_FILE = "history"
+_VERIFIED_FILE = ".verified.json"  # stat signature of the files last verified against the manifest
+
+_VERSION_RE = re.compile(r"^v(\d+)$")
+
+def list_versions(index_root: Path) -> List[int]:
+    if not index_root.exists():
+        return []
+    return sorted(int(m.group(1)) for p in index_root.iterdir() if p.is_dir() and (m := _VERSION_RE.match(p.name)))
+
+def latest_version_dir(index_root: Path) -> Optional[Path]:
+    versions = list_versions(index_root)
+    return index_root / f"v{versions[-1]}" if versions else None
+
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _data_files(version_dir: Path) -> List[Path]:
+    skip = {MANIFEST_FILE, _VERIFIED_FILE}
+    return sorted(p for p in version_dir.rglob("*") if p.is_file() and p.name not in skip)
+
+def write_manifest(version_dir: Path, version: str, rows: int) -> Dict:
+    """Checksum every file in version_dir (shards included) into manifest.json."""
+    version_dir = Path(version_dir)
+    files = {
+        p.relative_to(version_dir).as_posix(): {"sha1": _sha1(p), "bytes": p.stat().st_size}
+        for p in _data_files(version_dir)
+    }
+    manifest = {"version": version, "rows": int(rows), "files": files}
+    with open(version_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def read_manifest(version_dir: Path) -> Optional[Dict]:
+    try:
+        return json.loads((Path(version_dir) / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def _stat_signature(version_dir: Path, names: List[str]) -> List:
+    sig = []
+    for name in names:
+        try:
+            st = (version_dir / name).stat()
+            sig.append([name, st.st_size, st.st_mtime_ns])
+        except OSError:
+            sig.append([name, None, None])
+    return sig
+
+_VERIFIED: Dict[Tuple[str, str], bool] = {}
+_VERIFIED_LOCK = threading.Lock()
+
+def verify_version(version_dir: Path) -> Optional[bool]:
+    """
+    True when every manifest file matches its checksum, False on any mismatch, None without a manifest.
+    Files are hashed once; later calls only compare stat signatures (in-process, then .verified.json).
+    """
+    version_dir = Path(version_dir)
+    manifest = read_manifest(version_dir)
+    if manifest is None:
+        return None
+    names = sorted(manifest["files"])
+    sig = json.dumps(_stat_signature(version_dir, names))
+    key = (str(version_dir.resolve()), sig)
+    if key in _VERIFIED:
+        return _VERIFIED[key]
+    try:
+        if json.loads((version_dir / _VERIFIED_FILE).read_text(encoding="utf-8")).get("signature") == sig:
+            _VERIFIED[key] = True
+            return True
+    except (OSError, ValueError):
+        pass
+    ok = True
+    for name in names:
+        path = version_dir / name
+        expected = manifest["files"][name]
+        if not path.exists() or path.stat().st_size != expected["bytes"] or _sha1(path) != expected["sha1"]:
+            print(f"[RAG] checksum mismatch: {path}", file=sys.stderr)
+            ok = False
+            break
+    with _VERIFIED_LOCK:
+        _VERIFIED[key] = ok
+    if ok:
+        try:
+            tmp = version_dir / f"{_VERIFIED_FILE}.{os.getpid()}"
+            tmp.write_text(json.dumps({"signature": sig, "verified_at": time.time()}), encoding="utf-8")
+            os.replace(tmp, version_dir / _VERIFIED_FILE)
+        except OSError:
+            pass  # read-only snapshot: the in-process cache still applies
+    return ok
+
+def read_current(index_root: Path) -> Optional[str]:
+    try:
+        name = (Path(index_root) / POINTER_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return name or None
+
+def resolve_index_dir(index_dir: Path) -> Optional[Path]:
+    """A `current` pointer file resolves to the version it names (None if unset); directories pass through."""
+    index_dir = Path(index_dir)
+    if index_dir.name != POINTER_FILE or index_dir.is_dir():
+        return index_dir
+    name = read_current(index_dir.parent)
+    return index_dir.parent / name if name else None
+
+def set_current(index_root: Path, version: str, verify: bool = True) -> Path:
+    """Atomically point `current` at version (after checksum verification) and log the switch."""
+    index_root = Path(index_root)
+    target = index_root / version
+    if not target.is_dir():
+        raise FileNotFoundError(f"{target} does not exist")
+    if verify and verify_version(target) is False:
+        raise ValueError(f"{target} failed checksum verification")
+    tmp = index_root / f".{POINTER_FILE}.{os.getpid()}"
+    tmp.write_text(version + "\n", encoding="utf-8")
+    os.replace(tmp, index_root / POINTER_FILE)  # atomic: readers see the old or the new name
+    with open(index_root / HISTORY_FILE, "a", encoding="utf-8") as f:
+        f.write(f"{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}\t{version}\n")
+    print(f"[RAG] current -> {version}", file=sys.stderr)
+    return target
+
+def history(index_root: Path) -> List[str]:
+    try:
+        lines = (Path(index_root) / HISTORY_FILE).read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    return [line.split("\t", 1)[1] for line in lines if "\t" in line]
+
+def rollback(index_root: Path) -> Path:
+    """Point `current` back at the version served before it."""
+    index_root = Path(index_root)
+    current = read_current(index_root)
+    previous = next((v for v in reversed(history(index_root)) if v != current and (index_root / v).is_dir()), None)
+    if previous is None:
+        raise ValueError("no earlier version to roll back to")
+    return set_current(index_root, previous)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--index-root", type=Path, default=Path(os.getenv("RAG_INDEX_ROOT") or "data/index"))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list")
+    sub.add_parser("promote").add_argument("version")
+    sub.add_parser("rollback")
+    sub.add_parser("verify").add_argument("version", nargs="?")
+    args = ap.parse_args(argv)
+    root = args.index_root
+
+    if args.cmd == "list":
+        current = read_current(root)
+        for n in list_versions(root):
+            manifest = read_manifest(root / f"v{n}") or {}
+            mark = "*" if current == f"v{n}" else " "
+            print(f"{mark} v{n}\trows={manifest.get('rows', '?')}\tfiles={len(manifest.get('files', {})) or '?'}")
+        return 0
+    if args.cmd == "promote":
+        set_current(root, args.version)
+        return 0
+    if args.cmd == "rollback":
+        print(rollback(root).name)
+        return 0
+    version = args.version or read_current(root)
+    if not version:
+        print("no version given and no current pointer", file=sys.stderr)
+        return 2
+    ok = verify_version(root / version)
+    print(f"{version}: {'ok' if ok else ('no manifest' if ok is None else 'CHECKSUM MISMATCH')}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
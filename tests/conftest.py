@@ -2,14 +2,15 @@
 import pytest
 import os
 
+# Keep test runs out of data/logs: with the telemetry sink off, LLM events print to stdout
+os.environ.setdefault("TELEMETRY_DIR", "")
+
 # # --- Early env guard for modules that init clients at import time ---
 # @pytest.fixture(scope="session", autouse=True)
 # def _set_dummy_api_key_for_imports():
 #     # Ensure present during collection/import of modules like rag.llm
 #     os.environ.setdefault("OPENAI_API_KEY", "test")
 
-# Ensure present during collection/import of modules that init clients at import time
-os.environ.setdefault("OPENAI_API_KEY", "test")
 
 # ----- Shared v1.1 fixtures -----
 
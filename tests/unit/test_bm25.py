@@ -0,0 +1,39 @@
+import numpy as np
+
+from fitapp_core.rag.bm25 import BM25Index, rrf_fuse, tokenize, weighted_fuse
+
+DOCS = [
+    "Barbell bench press builds the chest; bench press variations.",
+    "Back squat and leg press for quadriceps hypertrophy.",
+    "Zone 2 cardio improves endurance.",
+    "Romanian deadlift trains the hamstrings.",
+]
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The Bench-Press, and a SQUAT") == ["bench", "press", "squat"]
+
+
+def test_bm25_ranks_matching_docs_only():
+    idx = BM25Index(DOCS)
+    scores, ids = idx.search("bench press chest", k=3)
+    assert ids.tolist() == [0, 1]  # "leg press" matches one term; docs 2 and 3 match none
+    assert scores[0] > scores[1]
+    scores, ids = idx.search("press hypertrophy", k=3)
+    assert set(ids.tolist()) == {0, 1} and scores[0] >= scores[1]
+    assert idx.search("yoga", k=3)[1].size == 0
+
+
+def test_bm25_respects_allowed_rows():
+    idx = BM25Index(DOCS)
+    _, ids = idx.search("press", k=3, allowed=np.array([1, 2, 3]))
+    assert ids.tolist() == [1]
+
+
+def test_fusion_helpers():
+    dense = (np.array([0.9, 0.8, 0.1], dtype=np.float32), np.array([2, 0, 1]))
+    lexical = (np.array([5.0, 1.0], dtype=np.float32), np.array([0, 3]))
+    _, ids = rrf_fuse([dense[1], lexical[1]], k=2)
+    assert ids.tolist()[0] == 0  # ranked well on both sides
+    _, ids = weighted_fuse(dense, lexical, k=4, alpha=1.0)
+    assert ids.tolist()[:3] == [2, 0, 1]
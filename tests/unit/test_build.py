@@ -0,0 +1,82 @@
+import json
+
+import numpy as np
+import pytest
+
+from fitapp_core.rag import build as bmod
+from fitapp_core.rag import retriever as rmod
+
+
+def _write_chunks(proc_dir, texts):
+    proc_dir.mkdir(parents=True, exist_ok=True)
+    with open(proc_dir / "chunks.jsonl", "w", encoding="utf-8") as f:
+        for i, t in enumerate(texts):
+            f.write(json.dumps({"id": f"c{i}", "doc_id": "d0", "text": t, "tags": ["evidence:evidence"]}) + "\n")
+
+
+class _Encoder:
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, texts):
+        self.seen.extend(texts)
+        return np.stack([np.random.default_rng(sum(map(ord, t))).standard_normal(8) for t in texts]).astype(np.float32)
+
+
+def test_rebuild_only_embeds_new_or_changed_chunks(tmp_path):
+    proc, root = tmp_path / "processed", tmp_path / "index"
+    _write_chunks(proc, ["squat depth", "bench arch", "row tempo"])
+    enc = _Encoder()
+    v1 = bmod.build_index(proc, root, encode=enc, batch_size=2, write_faiss=False)
+    assert v1.name == "v1" and sorted(enc.seen) == ["bench arch", "row tempo", "squat depth"]
+
+    _write_chunks(proc, ["squat depth", "bench arch (revised)", "row tempo", "deadlift hinge"])
+    enc2 = _Encoder()
+    v2 = bmod.build_index(proc, root, encode=enc2, write_faiss=False)
+    assert v2.name == "v2"
+    assert sorted(enc2.seen) == ["bench arch (revised)", "deadlift hinge"]
+    e1, e2 = np.load(v1 / "embeddings.npy"), np.load(v2 / "embeddings.npy")
+    np.testing.assert_array_equal(e1[[0, 2]], e2[[0, 2]])
+    info = json.loads((v2 / "build.json").read_text())
+    assert info == {**info, "rows": 4, "embedded": 2, "reused": 2, "base": "v1"}
+    assert not [p for p in root.iterdir() if p.name.startswith(".")]  # temp dir renamed away
+
+
+def test_built_index_is_servable(tmp_path):
+    proc, root = tmp_path / "processed", tmp_path / "index"
+    _write_chunks(proc, ["a", "b", "c"])
+    out = bmod.build_index(proc, root, encode=_Encoder(), write_faiss=False)
+    store = rmod.RAGStore(out, proc)
+    assert not store._disabled and len(store.columns) == 3
+    assert store.emb.mapped  # pre-normalized float32 file written by default
+
+
+def test_existing_version_is_never_overwritten(tmp_path):
+    proc, root = tmp_path / "processed", tmp_path / "index"
+    _write_chunks(proc, ["a"])
+    bmod.build_index(proc, root, encode=_Encoder(), write_faiss=False)
+    with pytest.raises(FileExistsError):
+        bmod.build_index(proc, root, version="v1", encode=_Encoder(), write_faiss=False)
+
+
+@pytest.mark.parametrize("index_type,kind", [("flat", "flat"), ("ivf", "ivf"), ("hnsw", "hnsw")])
+def test_approximate_index_types_serve_with_search_knobs(index_type, kind):
+    faiss = pytest.importorskip("faiss")
+    emb = np.random.default_rng(0).standard_normal((400, 8)).astype(np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    index = bmod.make_faiss_index(emb, index_type, nlist=4)
+    assert rmod._faiss_kind(index) == kind and index.ntotal == 400
+
+    store = rmod.RAGStore.__new__(rmod.RAGStore)
+    store.index, store.index_kind = index, kind
+    allowed = np.arange(0, 400, 2)
+    # Exhaustive effort must agree with exact search, under a filter too
+    sims, idx = store._search_faiss(emb[:3], 5, allowed, nprobe=4, ef_search=400)
+    exact = np.argsort(-(emb[allowed] @ emb[:3].T), axis=0)[:5].T
+    np.testing.assert_array_equal(idx, allowed[exact])
+
+
+def test_ivf_falls_back_to_flat_when_too_small_to_train():
+    pytest.importorskip("faiss")
+    emb = np.eye(8, dtype=np.float32)
+    assert rmod._faiss_kind(bmod.make_faiss_index(emb, "ivfpq")) == "flat"
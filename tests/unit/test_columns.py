@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from fitapp_core.rag.columns import ChunkColumns
+
+
+def test_columns_round_trip_rows_and_tags():
+    df = pd.DataFrame({
+        "id": ["a", "b", "c"],
+        "doc_id": ["d1", "d1", "d2"],
+        "text": ["first chunk", None, "third – ünïcode"],
+        "tags": [["evidence:evidence"], None, np.array(["domain:strength", "evidence:evidence"])],
+    })
+    cols = ChunkColumns.from_frame(df)
+    assert len(cols) == 3
+    assert [cols.text(i) for i in range(3)] == ["first chunk", "", "third – ünïcode"]
+    assert cols.tags(1) == [] and cols.tags(2) == ["domain:strength", "evidence:evidence"]
+    m = cols.tag_matrix()
+    assert m.shape == (3, 2) and m[:, cols.tag_vocab["evidence:evidence"]].tolist() == [True, False, True]
+    recs = cols.records(np.array([2, 0]), [0.9, 0.5])
+    assert [r["id"] for r in recs] == ["c", "a"]
+    assert recs[0] == {"id": "c", "doc_id": "d2", "text": "third – ünïcode", "tags": ["domain:strength", "evidence:evidence"], "score": 0.9}
+
+
+def test_columns_tolerate_missing_optional_fields():
+    cols = ChunkColumns.from_frame(pd.DataFrame({"id": ["x"], "text": ["only text"]}))
+    assert cols.records(np.array([0]), [1.0])[0]["doc_id"] is None
+    assert cols.tag_matrix().shape == (1, 0)
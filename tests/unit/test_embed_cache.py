@@ -0,0 +1,33 @@
+import numpy as np
+
+from fitapp_core.rag.embed_cache import QueryEmbeddingCache
+
+
+def test_lru_hits_misses_and_eviction():
+    cache = QueryEmbeddingCache(capacity=2, path=None)
+    assert cache.get("m", "hypertrophy, 5 days/week") is None
+    cache.put("m", "hypertrophy, 5 days/week", np.ones(4))
+    cache.put("m", "strength", np.zeros(4))
+    # Whitespace-normalized key hits the same entry
+    assert cache.get("m", "  hypertrophy,  5 days/week ") is not None
+    cache.put("m", "endurance", np.zeros(4))  # evicts least-recently used ("strength")
+    assert cache.get("m", "strength") is None
+    assert cache.get("other-model", "endurance") is None
+    stats = cache.stats()
+    assert stats["size"] == 2 and stats["hits"] == 1 and stats["misses"] == 3
+
+
+def test_cached_vectors_are_read_only():
+    cache = QueryEmbeddingCache(capacity=4, path=None)
+    vec = cache.put("m", "q", np.arange(3, dtype=np.float32))
+    assert not vec.flags.writeable
+    assert not cache.get("m", "q").flags.writeable
+
+
+def test_sqlite_sidecar_warms_new_cache(tmp_path):
+    path = tmp_path / "query_cache.sqlite"
+    first = QueryEmbeddingCache(capacity=8, path=str(path))
+    first.put("m", "fat_loss, 4 days/week", np.array([0.5, 0.5], dtype=np.float32))
+    second = QueryEmbeddingCache(capacity=8, path=str(path))
+    assert second.stats()["warmed"] == 1
+    np.testing.assert_allclose(second.get("m", "fat_loss, 4 days/week"), [0.5, 0.5])
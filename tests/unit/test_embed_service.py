@@ -0,0 +1,107 @@
+import threading
+
+import numpy as np
+import pytest
+
+from fitapp_core.rag import embed_service as es
+from fitapp_core.rag import retriever as rmod
+
+
+class _Model:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, normalize_embeddings=True):
+        self.calls.append(list(texts))
+        return np.stack([np.full(4, float(len(t)), dtype=np.float32) for t in texts])
+
+
+@pytest.fixture
+def server(tmp_path):
+    model = _Model()
+    srv = es.EmbedServer(str(tmp_path / "embed.sock"), model, "stub", max_wait_ms=100).start()
+    yield srv, model
+    srv.stop()
+
+
+def test_remote_encode_matches_model(server):
+    srv, _ = server
+    remote = es.connect_embedder("stub", srv.address)
+    out = remote.encode(["ab", "abcd", "ab"])
+    np.testing.assert_array_equal(out[:, 0], [2, 4, 2])
+    assert remote.stats()["requests"] == 1
+
+
+def test_concurrent_requests_are_micro_batched(server):
+    srv, model = server
+    remote = es.RemoteEmbedder(srv.address, "stub")
+    start = threading.Barrier(6)
+    out = {}
+
+    def worker(i):
+        start.wait()
+        out[i] = remote.encode(["x" * (i + 1), "shared"])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(out[i][0, 0] == i + 1 and out[i][1, 0] == 6 for i in range(6))
+    assert srv.stats()["requests"] == 6 and srv.stats()["batches"] < 6
+    assert sum(c.count("shared") for c in model.calls) == srv.stats()["batches"]  # de-duplicated per batch
+
+
+def test_wrong_model_is_rejected(server):
+    srv, _ = server
+    with pytest.raises(es.EmbedServiceError):
+        es.RemoteEmbedder(srv.address, "other-model").encode(["a"])
+
+
+def test_store_falls_back_in_process_when_service_dies(server, monkeypatch):
+    from fitapp_core.rag import embed_cache
+
+    srv, _ = server
+    local = _Model()
+    monkeypatch.setattr(embed_cache, "_CACHE", embed_cache.QueryEmbeddingCache(capacity=0, path=None))
+    monkeypatch.setattr(rmod, "_EMBED_MODEL_NAME", "stub")
+    monkeypatch.setattr(rmod, "_load_embedder", lambda name=None: local)
+    monkeypatch.setattr(es, "EMBED_SOCKET", srv.address)
+    monkeypatch.setattr(rmod, "connect_embedder", lambda name: es.connect_embedder(name, srv.address))
+    store = rmod.RAGStore.__new__(rmod.RAGStore)
+    store._embedder = None
+    store._encode(["abc"])
+    assert isinstance(store._embedder, es.RemoteEmbedder) and not local.calls
+    srv.stop()
+    assert store._encode(["abcd"])[0, 0] == 4
+    assert local.calls == [["abcd"]]
+
+
+def test_connect_without_service_returns_none(tmp_path):
+    assert es.connect_embedder("stub", str(tmp_path / "missing.sock")) is None
+
+
+def test_wrong_key_is_rejected_and_key_file_is_private(server):
+    import os
+    import stat
+
+    srv, model = server
+    assert stat.S_IMODE(os.stat(srv.address + ".key").st_mode) == 0o600
+    with pytest.raises(es.EmbedServiceError):
+        es.RemoteEmbedder(srv.address, "stub", authkey=b"not-the-key").encode(["a"])
+    assert not model.calls
+
+
+def test_refuses_live_socket_and_shared_directory(server, tmp_path):
+    import os
+
+    srv, _ = server
+    with pytest.raises(es.EmbedServiceError, match="already listening"):
+        es.EmbedServer(srv.address, _Model(), "stub").start()
+    assert es.connect_embedder("stub", srv.address) is not None  # first server untouched
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+    with pytest.raises(es.EmbedServiceError, match="0700"):
+        es.EmbedServer(str(shared / "embed.sock"), _Model(), "stub").start()
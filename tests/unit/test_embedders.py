@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+
+from fitapp_core.rag import build as bmod
+from fitapp_core.rag import retriever as rmod
+from fitapp_core.rag.embedders import HashingEmbedder
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    a = HashingEmbedder(dim=64).encode(["Barbell squats for strength", ""])
+    b = HashingEmbedder(dim=64).encode(["Barbell squats for strength"])
+    np.testing.assert_array_equal(a[0], b[0])
+    assert np.isclose(np.linalg.norm(a[0]), 1.0) and not a[1].any()
+    assert HashingEmbedder(dim=64, seed=1).id != HashingEmbedder(dim=64).id
+
+
+def test_hashing_embedder_ranks_shared_vocabulary_higher():
+    vecs = HashingEmbedder().encode([
+        "hypertrophy training volume per week",
+        "weekly hypertrophy volume for training",
+        "zone 2 cardio improves endurance",
+    ])
+    sims = vecs @ vecs[0]
+    assert sims[1] > 0.5 > sims[2]
+
+
+def _chunks(proc):
+    proc.mkdir(parents=True, exist_ok=True)
+    texts = ["romanian deadlift hamstrings", "bench press chest", "zone 2 cardio endurance"]
+    with open(proc / "chunks.jsonl", "w", encoding="utf-8") as f:
+        for i, t in enumerate(texts):
+            f.write(json.dumps({"id": f"c{i}", "doc_id": "d", "text": t, "tags": ["evidence:evidence"]}) + "\n")
+
+
+def test_hashing_index_build_and_query(tmp_path, monkeypatch):
+    proc, root = tmp_path / "processed", tmp_path / "index"
+    _chunks(proc)
+    monkeypatch.setattr(rmod, "faiss", None)
+    monkeypatch.setattr(rmod, "EMBEDDER", "hashing")
+    out = bmod.build_index(proc, root, encode=bmod.default_encoder(embedder="hashing"),
+                           embedder_id=bmod.default_embedder_id(embedder="hashing"), write_faiss=False)
+    assert json.loads((out / "build.json").read_text())["embedder"] == HashingEmbedder().id
+    store = rmod.RAGStore(out, proc)
+    assert store.has_dense
+    assert store.query({"query": "chest bench", "mode": "dense"}, top_k=1)[0]["id"] == "c1"
+
+    # Same index, different query embedder: vectors are incomparable, so only BM25 remains
+    monkeypatch.setattr(rmod, "EMBEDDER", "sentence-transformers")
+    store = rmod.RAGStore(out, proc)
+    assert not store.has_dense and not store._disabled
+
+
+def test_rebuild_with_other_embedder_reembeds_everything(tmp_path):
+    proc, root = tmp_path / "processed", tmp_path / "index"
+    _chunks(proc)
+    h8, h16 = HashingEmbedder(dim=8), HashingEmbedder(dim=16)
+    bmod.build_index(proc, root, encode=h8.encode, embedder_id=h8.id, write_faiss=False)
+    out = bmod.build_index(proc, root, encode=h16.encode, embedder_id=h16.id, write_faiss=False)
+    info = json.loads((out / "build.json").read_text())
+    assert info["embedded"] == 3 and info["dim"] == 16
+
+
+def test_index_without_embedder_entry_is_taken_as_default_model(tmp_path, monkeypatch):
+    proc, root = tmp_path / "processed", tmp_path / "index"
+    _chunks(proc)
+    monkeypatch.setattr(rmod, "faiss", None)
+    monkeypatch.setattr(rmod, "EMBEDDER", "hashing")
+    out = bmod.build_index(proc, root, encode=HashingEmbedder().encode, embedder_id=HashingEmbedder().id, write_faiss=False)
+    info = json.loads((out / "build.json").read_text())
+    del info["embedder"]  # written before builds recorded the embedder
+    (out / "build.json").write_text(json.dumps(info))
+    store = rmod.RAGStore(out, proc)
+    assert not store.has_dense and store.query({"query": "chest bench"}, top_k=1)[0]["id"] == "c1"
+
+
+def test_query_dimension_mismatch_falls_back_to_lexical(tmp_path, monkeypatch):
+    proc, root = tmp_path / "processed", tmp_path / "index"
+    _chunks(proc)
+    monkeypatch.setattr(rmod, "faiss", None)
+    monkeypatch.setattr(rmod, "EMBEDDER", "hashing")
+    out = bmod.build_index(proc, root, encode=HashingEmbedder().encode, embedder_id=HashingEmbedder().id, write_faiss=False)
+    store = rmod.RAGStore(out, proc)
+    assert store.has_dense and store.dim == 384
+    monkeypatch.setattr(rmod.RAGStore, "_encode", lambda self, texts: HashingEmbedder(dim=256).encode(texts))
+    hits = store.query({"query": "chest bench", "mode": "dense"}, top_k=1)
+    assert hits and hits[0]["id"] == "c1"
+    assert not store.has_dense and not store._disabled
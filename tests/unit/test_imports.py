@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+
+def test_importing_plan_does_not_load_llm_sdk_or_need_a_key():
+    # Fresh interpreter: the OpenAI SDK, httpx and dotenv load on the first LLM call, not at import
+    code = "import sys, fitapp_core.plan_v11; print(sorted(m for m in ('openai', 'httpx', 'dotenv') if m in sys.modules))"
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "PERPLEXITY_API_KEY")}
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_client_is_built_once_on_first_use(monkeypatch):
+    from fitapp_core.rag import llm
+
+    monkeypatch.setattr(llm, "_async_client", None)
+    monkeypatch.setattr(llm, "_settings_cache", {"base_url": "http://127.0.0.1:9", "model": "m", "api_key": "k"})
+    client = llm._get_client()
+    assert llm._get_client() is client
+    assert str(client.base_url).startswith("http://127.0.0.1:9")
@@ -0,0 +1,61 @@
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from fitapp_core.rag import llm
+from fitapp_core.rag.json_extract import extract_json
+
+LOGS = Path(__file__).resolve().parents[2] / "data" / "logs"
+
+
+def _raw_heads():
+    heads = []
+    for path in sorted(LOGS.glob("*.jsonl")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.startswith("{"):
+                raw = json.loads(line).get("raw_head")
+                if raw:
+                    heads.append(raw)
+    return heads
+
+
+def _corpus():
+    # Logged completions as-is plus the defects we see in practice
+    for raw in _raw_heads():
+        yield raw
+        yield "Here you go:\n```json\n" + raw + "\n```\nHope this helps [1]."
+        yield re.sub(r"(\S)\n(\s*[}\]])", r"\1,\n\2", raw)
+        yield re.sub(r"(\S)\n(\s*[}\]])", r"\1,\n\2", raw.replace('": "', "\": \"it's ", 1))
+
+
+def test_single_pass_parses_at_least_as_many_logged_samples(capsys):
+    corpus = list(_corpus())
+    if not corpus:
+        pytest.skip("no raw_head samples in data/logs")
+    legacy = sum(bool(llm._parse_object_text_legacy(t)) for t in corpus)
+    single = sum(bool(llm._parse_object_text(t)) for t in corpus)
+    assert single >= legacy
+    for t in corpus:  # and never a different answer where the old cascade had one
+        old = llm._parse_object_text_legacy(t)
+        if old and "items" not in old:
+            assert llm._parse_object_text(t) == old
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('```json\n{"a": 1,}\n```', {"a": 1}),
+    ("Use {goal} here: {'a': 'don\\'t', \"b\": [1, 2,],}", {"a": "don't", "b": [1, 2]}),
+    ('{"note": "don\'t stop", "x": True, "y": None}', {"note": "don't stop", "x": True, "y": None}),
+    ('{“a”: “say \\"hi\\"”}', {"a": 'say "hi"'}),
+    ('{"a": "line\nbreak"}', {"a": "line\nbreak"}),
+    ('{"a": "{not json}"} trailing }', {"a": "{not json}"}),
+    ("[1, 2, 3]", [1, 2, 3]),
+    ('{"days": [{"day": 1}, {"day"', None),  # truncated: no fragment is returned
+])
+def test_extract_json(text, expected):
+    assert extract_json(text) == expected
+
+
+def test_top_level_array_is_wrapped():
+    assert llm._parse_object_text("Sure: [1, 2]") == {"items": [1, 2]}
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from fitapp_core.rag.json_stream import JSONObjectScanner
+
+PLAN = {
+    "canonical_week": {"days": [
+        {"day": 1, "main": [{"movement": "Squat", "notes": "brace {hard}, \"slow\" down"}]},
+        {"day": 2, "main": [{"movement": "Bench [paused]", "notes": "back\\slash"}]},
+    ]},
+    "progression": {"days": [{"not": "watched"}]},
+}
+
+
+@pytest.mark.parametrize("step", [1, 2, 5, 64, 10_000])
+def test_scanner_yields_days_and_stops_at_object_close(step):
+    text = "Here is your \"plan\":\n```json\n" + json.dumps(PLAN, indent=2) + "\n```\nLet me know {if} you need more!"
+    scanner = JSONObjectScanner(watch=("canonical_week", "days"))
+    days, fed = [], 0
+    for i in range(0, len(text), step):
+        days += scanner.feed(text[i : i + step])
+        fed = i + step
+        if scanner.done:
+            break
+    assert days == PLAN["canonical_week"]["days"]
+    assert json.loads(scanner.object_text) == PLAN
+    assert fed < len(text) or step >= len(text)  # trailing prose never read
+
+
+def test_unfinished_object_is_not_done():
+    scanner = JSONObjectScanner(watch=("canonical_week", "days"))
+    assert scanner.feed('{"canonical_week": {"days": [{"day": 1}, {"day"') == [{"day": 1}]
+    assert not scanner.done and scanner.object_text is None
+    assert scanner.text.startswith('{"canonical_week"')
+
+
+def test_braced_prose_is_skipped_for_the_fenced_object():
+    body = json.dumps(PLAN)
+    text = "Plan for {goal=hypertrophy}:\n```json\n" + body + "\n```\nTrailing {note}"
+    scanner = JSONObjectScanner(watch=("canonical_week", "days"))
+    days = []
+    for i in range(0, len(text), 9):
+        days += scanner.feed(text[i : i + 9])
+        if scanner.done:
+            break
+    assert scanner.done and json.loads(scanner.object_text) == PLAN
+    assert days == PLAN["canonical_week"]["days"]
+
+
+def test_fenced_object_is_preferred_over_an_example_in_prose():
+    scanner = JSONObjectScanner()
+    scanner.feed('Shaped like {"days": []}, here it is:\n```json\n')
+    assert not scanner.done  # could still be followed by a fenced block
+    scanner.feed('{"days": [1]}\n```')
+    assert scanner.done and json.loads(scanner.object_text) == {"days": [1]}
+
+    unfenced = JSONObjectScanner()
+    unfenced.feed('Sure! {"days": [2]} Enjoy.')
+    assert not unfenced.done and json.loads(unfenced.object_text) == {"days": [2]}  # fallback at stream end
@@ -0,0 +1,75 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from fitapp_core.rag import llm
+from fitapp_core.rag import llm_cache
+
+
+def _messages(prompt):
+    return [{"role": "system", "content": "sys"}, {"role": "user", "content": prompt}]
+
+
+def test_cache_key_covers_request_fields():
+    base = llm_cache.cache_key("m", _messages("p"), 0.2, 1000)
+    assert base == llm_cache.cache_key("m", _messages("p"), 0.2, 1000)
+    assert len({
+        base,
+        llm_cache.cache_key("m2", _messages("p"), 0.2, 1000),
+        llm_cache.cache_key("m", _messages("q"), 0.2, 1000),
+        llm_cache.cache_key("m", _messages("p"), 0.1, 1000),
+        llm_cache.cache_key("m", _messages("p"), 0.2, 500),
+    }) == 5
+
+
+def test_size_and_age_eviction(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = llm_cache.LLMResponseCache(tmp_path / "llm.sqlite", max_entries=2, max_age_s=60)
+    cache.put("a", "m", {"v": 1})
+    now[0] += 1
+    cache.put("b", "m", {"v": 2})
+    now[0] += 1
+    assert cache.get("a") == ({"v": 1}, "")  # refreshes a's recency
+    cache.put("c", "m", {"v": 3})
+    assert cache.get("b") is None and len(cache) == 2  # least recently used went first
+    cache.put("empty", "m", {})
+    assert cache.get("empty") is None  # only parsed objects are stored
+    now[0] += 120
+    assert cache.get("a") is None and cache.stats()["expired"] == 1
+    # Survives a restart
+    assert llm_cache.LLMResponseCache(tmp_path / "llm.sqlite", max_age_s=0).get("c") == ({"v": 3}, "")
+
+
+@pytest.fixture
+def fake_client(tmp_path, monkeypatch):
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"ok": true}'))], usage=None)
+
+    monkeypatch.setattr(llm, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(llm_cache, "_CACHE", llm_cache.LLMResponseCache(tmp_path / "llm.sqlite"))
+    monkeypatch.setattr(llm, "LLM_CACHE_BYPASS", False)
+    return calls
+
+
+def test_identical_prompts_hit_the_cache(fake_client, capsys):
+    assert llm.call_llm_json_object_with_log("plan please", {}, {"event": "t"}) == {"ok": True}
+    assert llm.call_llm_json_object_with_log("plan please", {}, {"event": "t"}) == {"ok": True}
+    assert len(fake_client) == 1
+    log = capsys.readouterr().out
+    assert '"cache": "miss"' in log and '"cache": "hit"' in log and '"cache_hits": 1' in log
+    llm.call_llm_json_object_with_log("plan please", {}, {"event": "t"}, bypass_cache=True)
+    assert len(fake_client) == 2
+
+
+def test_cache_io_runs_off_the_event_loop(fake_client, monkeypatch):
+    cache, threads = llm_cache.get_llm_cache(), []
+    get, put = cache.get, cache.put
+    monkeypatch.setattr(cache, "get", lambda *a: (threads.append(threading.current_thread()), get(*a))[1])
+    monkeypatch.setattr(cache, "put", lambda *a: (threads.append(threading.current_thread()), put(*a))[1])
+    assert llm.call_llm_json_object_with_log("off loop", {}, {"event": "t"}) == {"ok": True}
+    assert len(threads) == 2 and not any(t.name == "llm-loop" for t in threads)
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from fitapp_core.rag import llm
+from fitapp_core.rag import llm_cache
+
+
+@pytest.fixture
+def slow_client(monkeypatch):
+    """Fake AsyncOpenAI whose completions take 50 ms and echo the prompt back as JSON."""
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.05)
+        prompt = kwargs["messages"][-1]["content"]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f'{{"prompt": "{prompt}"}}'))], usage=None)
+
+    monkeypatch.setattr(llm, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(llm_cache, "_CACHE", llm_cache.LLMResponseCache(path=None))
+    monkeypatch.setattr(llm, "_stats", {"requests": 0, "coalesced": 0, "in_flight": 0, "max_in_flight": 0})
+    return calls
+
+
+def test_identical_concurrent_calls_share_one_request(slow_client):
+    async def burst():
+        return await asyncio.gather(*(llm.acall_llm_json_object_with_log("same", {}, {"i": i}) for i in range(5)))
+
+    results = asyncio.run(burst())
+    assert len(slow_client) == 1 and llm.llm_stats()["coalesced"] == 4
+    assert all(r == {"prompt": "same"} for r in results)
+    results[1]["prompt"] = "mutated"
+    assert results[2] == {"prompt": "same"}  # each caller gets its own copy
+
+
+def test_first_caller_does_not_get_the_shared_result(slow_client, monkeypatch):
+    produced = []
+    call = llm._call_json_object
+
+    async def tracked(*args):
+        produced.append(await call(*args))
+        return produced[-1]
+
+    monkeypatch.setattr(llm, "_call_json_object", tracked)
+
+    async def burst():
+        return await asyncio.gather(*(llm.acall_llm_json_object_with_log("shared copy", {}, {}) for _ in range(3)))
+
+    results = asyncio.run(burst())
+    # Followers copy on the loop thread; a caller holding the shared object could mutate it meanwhile
+    assert len(produced) == 1 and not any(r is produced[0] for r in results)
+
+
+def test_bypass_caller_does_not_join_a_cached_call(tmp_path, monkeypatch):
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f'{{"n": {len(calls)}}}'))], usage=None)
+
+    monkeypatch.setattr(llm, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(llm_cache, "_CACHE", llm_cache.LLMResponseCache(tmp_path / "llm.sqlite"))
+    monkeypatch.setattr(llm, "LLM_CACHE_BYPASS", False)
+    assert llm.call_llm_json_object_with_log("cached", {}, {}) == {"n": 1}  # fills the cache
+
+    async def both():
+        return await asyncio.gather(
+            llm.acall_llm_json_object_with_log("cached", {}, {}),
+            llm.acall_llm_json_object_with_log("cached", {}, {}, bypass_cache=True),
+        )
+
+    cached, fresh = asyncio.run(both())
+    assert cached == {"n": 1} and fresh == {"n": 2} and len(calls) == 2
+
+
+def test_semaphore_bounds_in_flight_requests(slow_client):
+    async def burst():
+        return await asyncio.gather(*(llm.acall_llm_json_object_with_log(f"p{i}", {}, {}) for i in range(3 * llm.LLM_MAX_CONCURRENCY)))
+
+    results = asyncio.run(burst())
+    assert [r["prompt"] for r in results] == [f"p{i}" for i in range(3 * llm.LLM_MAX_CONCURRENCY)]
+    stats = llm.llm_stats()
+    assert stats["requests"] == 3 * llm.LLM_MAX_CONCURRENCY and stats["max_in_flight"] == llm.LLM_MAX_CONCURRENCY
+
+
+def test_sync_wrappers_from_threads_coalesce(slow_client):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(llm.call_llm_json("shared"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [{"prompt": "shared"}] * 4 and len(slow_client) == 1
+
+
+class _FakeStream:
+    def __init__(self, pieces, usage=None):
+        self.pieces, self.read, self.closed = pieces, 0, False
+        self.usage = usage  # sent as a final chunk without choices, like stream_options.include_usage
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.read >= len(self.pieces) + (self.usage is not None):
+            raise StopAsyncIteration
+        self.read += 1
+        await asyncio.sleep(0)
+        if self.read > len(self.pieces):
+            return SimpleNamespace(choices=[], usage=self.usage)
+        piece = self.pieces[self.read - 1]
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_streaming_reports_days_and_stops_early(monkeypatch):
+    body = '{"canonical_week": {"days": [{"day": 1}, {"day": 2}]}}'
+    stream = _FakeStream([body[i : i + 7] for i in range(0, len(body), 7)] + ["\n\nHope this helps!"] * 50)
+
+    async def create(**kwargs):
+        assert kwargs["stream"] is True
+        return stream
+
+    monkeypatch.setattr(llm, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(llm_cache, "_CACHE", llm_cache.LLMResponseCache(path=None))
+    days = []
+    obj = llm.call_llm_json_object_with_log("stream me", {}, {}, on_day=days.append)
+    assert obj == {"canonical_week": {"days": [{"day": 1}, {"day": 2}]}}
+    assert days == [{"day": 1}, {"day": 2}]
+    assert stream.closed and stream.read < len(stream.pieces)
+
+
+def test_streaming_records_usage_from_the_final_chunk(monkeypatch):
+    body = '{"canonical_week": {"days": [{"day": 1}]}}'
+    stream = _FakeStream(["```json\n", body, "\n```"], usage={"prompt_tokens": 12, "completion_tokens": 9})
+    requests, events = [], []
+
+    async def create(**kwargs):
+        requests.append(kwargs)
+        return stream
+
+    monkeypatch.setattr(llm, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(llm_cache, "_CACHE", llm_cache.LLMResponseCache(path=None))
+    monkeypatch.setattr(llm, "_log_event", events.append)
+    assert llm.call_llm_json_object_with_log("stream usage", {}, {}, stream=True) == {"canonical_week": {"days": [{"day": 1}]}}
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    assert events[-1]["usage"] == {"prompt_tokens": 12, "completion_tokens": 9}
+    assert events[-1]["early_stop"] is False and stream.closed
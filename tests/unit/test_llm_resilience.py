@@ -0,0 +1,160 @@
+import asyncio
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from fitapp_core.rag import breaker as bmod
+from fitapp_core.rag import llm
+from fitapp_core.rag import llm_cache
+
+
+def _reply(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Fake AsyncOpenAI; `behave(kwargs)` is an async function picked per test."""
+    state = SimpleNamespace(calls=[], cancelled=[], behave=None)
+
+    async def create(**kwargs):
+        state.calls.append(kwargs)
+        try:
+            return await state.behave(kwargs)
+        except asyncio.CancelledError:
+            state.cancelled.append(kwargs["temperature"])
+            raise
+
+    monkeypatch.setattr(llm, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(llm_cache, "_CACHE", llm_cache.LLMResponseCache(path=None))
+    monkeypatch.setattr(llm, "_breaker", bmod.CircuitBreaker(failures=2, cooldown_s=60))
+    monkeypatch.setattr(llm, "LLM_HEDGE_AFTER_S", 0.05)
+    monkeypatch.setattr(llm, "_latencies_ms", deque(maxlen=200))
+    return state
+
+
+def _is_hedge(kwargs):
+    return kwargs["temperature"] == 0.1
+
+
+def test_hedge_wins_when_primary_is_slow(client, capsys):
+    async def behave(kwargs):
+        await asyncio.sleep(0.01 if _is_hedge(kwargs) else 5)
+        return _reply('{"from": "hedge"}' if _is_hedge(kwargs) else '{"from": "primary"}')
+
+    client.behave = behave
+    t0 = time.perf_counter()
+    assert llm.call_llm_json_object_with_log("p", {}, {}) == {"from": "hedge"}
+    assert time.perf_counter() - t0 < 1.0
+    time.sleep(0.05)  # let the cancellation land on the loop
+    assert client.cancelled == [0.2]  # the slow primary was cancelled
+    log = capsys.readouterr().out
+    assert '"winner": "hedge"' in log and '"hedged": true' in log
+
+
+def test_unparseable_primary_fires_hedge_immediately(client, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_HEDGE_AFTER_S", 30)
+
+    async def behave(kwargs):
+        return _reply('{"ok": 1}' if _is_hedge(kwargs) else "Sorry, I can't do that.")
+
+    client.behave = behave
+    assert llm.call_llm_json_object_with_log("p", {}, {}) == {"ok": 1}
+    assert [_is_hedge(k) for k in client.calls] == [False, True]
+
+
+def test_deadline_bounds_the_call(client, capsys):
+    async def behave(kwargs):
+        await asyncio.sleep(5)
+
+    client.behave = behave
+    t0 = time.perf_counter()
+    assert llm.call_llm_json_object_with_log("p", {}, {}, deadline_s=0.2) == {}
+    assert time.perf_counter() - t0 < 1.0
+    assert "deadline of 0.2s exceeded" in capsys.readouterr().out
+
+
+def test_breaker_skips_calls_after_consecutive_failures(client, monkeypatch, capsys):
+    async def behave(kwargs):
+        raise ConnectionError("upstream down")
+
+    client.behave = behave
+    for prompt in ("a", "b"):
+        assert llm.call_llm_json_object_with_log(prompt, {}, {}) == {}
+    calls = len(client.calls)
+    assert llm.call_llm_json_object_with_log("c", {}, {}) == {}
+    assert len(client.calls) == calls  # skipped without a request
+    assert '"event": "llm_json_skipped"' in capsys.readouterr().out
+    assert llm.llm_stats()["breaker"]["state"] == "open"
+
+    # After the cool-down one trial goes through and a success closes the breaker
+    later = time.monotonic() + 61
+    monkeypatch.setattr(bmod.time, "monotonic", lambda: later)
+
+    async def healthy(kwargs):
+        return _reply('{"ok": true}')
+
+    client.behave = healthy
+    assert llm.call_llm_json_object_with_log("d", {}, {}) == {"ok": True}
+    assert llm.llm_stats()["breaker"]["state"] == "closed"
+
+
+def test_half_open_breaker_allows_a_single_trial(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(bmod.time, "monotonic", lambda: now[0])
+    b = bmod.CircuitBreaker(failures=1, cooldown_s=10)
+    b.record(False)
+    assert b.state == "open" and not b.allow()
+    now[0] = 11
+    assert b.allow() and not b.allow()  # one trial at a time
+    b.record(False)
+    assert b.state == "open" and b.stats()["opens"] == 2
+
+
+def test_hedge_delay_tracks_p95_once_enough_calls_are_timed(client, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_HEDGE_AFTER_S", 20)
+    monkeypatch.setattr(llm, "LLM_HEDGE_MIN_S", 0.05)
+    monkeypatch.setattr(llm, "LLM_HEDGE_MIN_SAMPLES", 5)
+    llm._latencies_ms.extend([100.0, 120.0, 150.0, 110.0])
+    assert llm._hedge_after_s() == 20  # too few samples: the configured delay
+    llm._latencies_ms.append(300.0)
+    assert llm._hedge_after_s() == pytest.approx(0.3) and llm.llm_stats()["hedge_after_s"] == pytest.approx(0.3)
+    monkeypatch.setattr(llm, "LLM_HEDGE_MIN_S", 2.0)
+    assert llm._hedge_after_s() == 2.0  # floor
+
+    monkeypatch.setattr(llm, "LLM_HEDGE_MIN_S", 0.05)
+    llm._latencies_ms.clear()
+    llm._latencies_ms.extend([50.0] * 5)
+
+    async def behave(kwargs):
+        await asyncio.sleep(0.01 if _is_hedge(kwargs) else 5)
+        return _reply('{"from": "hedge"}' if _is_hedge(kwargs) else '{"from": "primary"}')
+
+    client.behave = behave
+    t0 = time.perf_counter()
+    assert llm.call_llm_json_object_with_log("p95", {}, {}) == {"from": "hedge"}  # not after LLM_HEDGE_AFTER_S
+    assert time.perf_counter() - t0 < 1.0
+
+
+def test_coalesced_follower_keeps_its_own_deadline(client, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_HEDGE_AFTER_S", 0)  # one request, so the call count shows sharing
+
+    async def behave(kwargs):
+        await asyncio.sleep(0.3)
+        return _reply('{"ok": 1}')
+
+    client.behave = behave
+
+    async def timed(**kwargs):
+        t0 = time.perf_counter()
+        obj = await llm.acall_llm_json_object_with_log("shared slow", {}, {}, **kwargs)
+        return obj, time.perf_counter() - t0
+
+    async def both():
+        return await asyncio.gather(timed(deadline_s=5), timed(deadline_s=0.02))
+
+    (leader, _), (follower, waited) = asyncio.run(both())
+    assert follower == {} and waited < 0.2  # gave up at its own deadline
+    assert leader == {"ok": 1} and len(client.calls) == 1  # the shared request kept running
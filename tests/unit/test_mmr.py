@@ -0,0 +1,22 @@
+import numpy as np
+
+from fitapp_core.rag.mmr import mmr_select
+
+
+def _unit(*rows):
+    m = np.asarray(rows, dtype=np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def test_mmr_skips_near_duplicates():
+    vecs = _unit([1, 0, 0], [1, 0.01, 0], [0.6, 0.8, 0], [0, 0, 1])
+    rel = np.array([0.95, 0.94, 0.85, 0.3], dtype=np.float32)
+    assert mmr_select(vecs, rel, 2, lam=1.0).tolist() == [0, 1]  # pure relevance
+    assert mmr_select(vecs, rel, 2, lam=0.5).tolist() == [0, 3]
+    assert mmr_select(vecs, rel, 2, lam=0.7).tolist() == [0, 2]
+
+
+def test_mmr_handles_small_candidate_sets():
+    vecs = _unit([1, 0], [0, 1])
+    assert mmr_select(vecs, np.array([0.1, 0.9]), 5).tolist() == [1, 0]
+    assert mmr_select(vecs, np.array([0.1, 0.9]), 0).size == 0
@@ -0,0 +1,49 @@
+from fitapp_core.rag import prompts
+
+CHUNK = (
+    "mparable global hypertrophy when volume matched. \n"
+    "=== CHUNK START === \n"
+    "chunk_id: HYPO-CH-002 \n"
+    "title: Hypertrophy Rankings — Back \n"
+    "•  \n1. Weighted pull-up: heavy vertical pull with clear load progression. \n"
+    "•  \n2. Lat pulldown: programmable intensity for vertical pulling. \n"
+    "•  \n3. Chest-supported row: stable horizontal pull with low lower-back demand."
+)
+
+
+def test_clean_snippet_drops_chunker_headers_and_leading_fragment():
+    text = prompts.clean_snippet(CHUNK)
+    assert text.startswith("title: Hypertrophy Rankings — Back")
+    assert "CHUNK START" not in text and "chunk_id" not in text and "\n" not in text
+
+
+def test_trim_prefers_sentence_and_bullet_boundaries():
+    text = prompts.clean_snippet(CHUNK)
+    cut = prompts.trim_to_sentence(text, 120)
+    assert len(cut) <= 120 and cut.endswith("clear load progression.")
+    words = prompts.trim_to_sentence("alpha beta gamma delta epsilon zeta", 20)
+    assert words == "alpha beta gamma..." and len(words) <= 20
+
+
+def test_pack_snippets_fits_budget_by_score():
+    long = " ".join(f"Sentence number {i} about training volume." for i in range(40))
+    hits = [
+        {"id": "low", "score": 0.1, "text": long},
+        {"id": "top", "score": 0.9, "text": long.replace("training", "squat")},
+        {"id": "dup", "score": 0.5, "text": long.replace("training", "squat")},
+        {"id": "short", "score": 0.8, "text": "Short note."},
+    ]
+    packed = prompts.pack_snippets(hits, budget_chars=600, min_chars=150)
+    assert [h["id"] for h in packed] == ["top", "short", "low"]  # best first, duplicate text dropped
+    assert sum(len(h["text"]) for h in packed) <= 600
+    assert all(h["text"].endswith(".") for h in packed)
+    assert len(packed[2]["text"]) > 200  # room the short snippet left goes to later ones
+    assert hits[0]["text"] == long  # inputs are not modified
+
+    assert [h["id"] for h in prompts.pack_snippets(hits, budget_chars=300, min_chars=150)] == ["top", "short"]
+
+
+def test_renderers_keep_fixed_cut_by_default():
+    text = "x" * 500
+    assert prompts.render_numbered_snippets([text]) == "[1] " + "x" * 397 + "..."
+    assert prompts.render_snippets_for_v11([text], max_chars=None) == "- [1] " + text
@@ -0,0 +1,280 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fitapp_core.rag import retriever as rmod
+
+
+# ----- Tiny on-disk index + deterministic stub encoder -----
+
+DIM = 8
+
+def _vec(seed: int) -> np.ndarray:
+    v = np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+def _write_index(index_dir, n=12, seed=0):
+    index_dir.mkdir(parents=True, exist_ok=True)
+    emb = np.stack([_vec(seed * 1000 + i) for i in range(n)])
+    np.save(index_dir / "embeddings.npy", emb)
+    meta = pd.DataFrame({
+        "id": [f"c{i}" for i in range(n)],
+        "doc_id": [f"d{i // 4}" for i in range(n)],
+        "text": [f"chunk {i} text" for i in range(n)],
+        "tags": [["evidence:evidence", f"domain:{'strength' if i % 2 else 'hypertrophy'}"] for i in range(n)],
+    })
+    meta.to_parquet(index_dir / "meta.parquet")
+    return emb
+
+@pytest.fixture
+def rag_dirs(tmp_path, monkeypatch):
+    index_dir = tmp_path / "index" / "v1"
+    proc_dir = tmp_path / "processed"
+    proc_dir.mkdir(parents=True)
+    emb = _write_index(index_dir)
+    monkeypatch.setattr(rmod, "faiss", None)
+    monkeypatch.setattr(rmod, "INDEX_DIR", index_dir)
+    monkeypatch.setattr(rmod, "PROC_DIR", proc_dir)
+    # Query vector == stored vector of the chunk named in the query ("c3" -> row 3)
+    monkeypatch.setattr(
+        rmod.RAGStore, "_encode",
+        lambda self, texts: np.stack([emb[int(t.split()[0][1:])] for t in texts]).astype(np.float32),
+    )
+    rmod._REGISTRY.clear()
+    yield index_dir, proc_dir, emb
+    rmod._REGISTRY.clear()
+
+
+# ----- Shared store registry -----
+
+def test_get_store_is_shared_and_loaded_once(rag_dirs):
+    index_dir, proc_dir, _ = rag_dirs
+    before = rmod.store_stats()["load_count"]
+    s1 = rmod.get_store(index_dir, proc_dir)
+    s2 = rmod.get_store(index_dir, proc_dir)
+    assert s1 is s2
+    stats = rmod.store_stats()
+    assert stats["load_count"] == before + 1
+    assert stats["resident_bytes"] > 0
+
+
+def test_get_store_hot_swaps_on_index_change(rag_dirs, monkeypatch):
+    index_dir, proc_dir, _ = rag_dirs
+    monkeypatch.setattr(rmod, "_RELOAD_CHECK_S", 0.0)
+    s1 = rmod.get_store(index_dir, proc_dir)
+    assert rmod.get_store(index_dir, proc_dir) is s1  # unchanged files -> same store
+    _write_index(index_dir, n=16, seed=1)
+    s2 = rmod.get_store(index_dir, proc_dir)
+    assert s2 is not s1
+    assert len(s2.columns) == 16
+
+
+def test_retrieve_snippets_uses_shared_store(rag_dirs):
+    hits = rmod.retrieve_snippets({"query": "c3 query", "top_k": 2})
+    assert hits and hits[0]["id"] == "c3"
+    assert rmod.store_stats()["load_count"] >= 1
+    first = rmod.get_store()
+    rmod.retrieve_snippets({"query": "c5 query", "top_k": 2})
+    assert rmod.get_store() is first
+
+
+# ----- Query embedding cache -----
+
+def test_encode_reuses_cached_query_vectors(monkeypatch):
+    from fitapp_core.rag import embed_cache
+
+    calls = []
+
+    class _Model:
+        def encode(self, texts, normalize_embeddings=True):
+            calls.append(list(texts))
+            return np.stack([_vec(len(t)) for t in texts])
+
+    monkeypatch.setattr(embed_cache, "_CACHE", embed_cache.QueryEmbeddingCache(capacity=16, path=None))
+    store = rmod.RAGStore.__new__(rmod.RAGStore)
+    store._embedder = _Model()
+    v1 = store._encode(["hypertrophy, 5 days/week", "strength", "strength"])
+    v2 = store._encode(["hypertrophy,  5 days/week"])
+    assert calls == [["hypertrophy, 5 days/week", "strength"]]
+    np.testing.assert_allclose(v1[0], v2[0])
+    assert embed_cache.get_query_cache().stats()["hits"] == 1
+
+
+# ----- Tag-filtered retrieval -----
+
+def _expected_ids(emb, qi, allowed_rows, k):
+    sims = emb[allowed_rows] @ emb[qi]
+    return [f"c{allowed_rows[j]}" for j in np.argsort(-sims)[:k]]
+
+def test_domain_filter_returns_exact_top_k(rag_dirs):
+    index_dir, proc_dir, emb = rag_dirs
+    store = rmod.get_store(index_dir, proc_dir)
+    hits = store.query({"query": "c3 q"}, top_k=5, domains=["hypertrophy"], evidence="evidence")
+    # Filter is applied before search, so selective filters still fill top_k
+    assert len(hits) == 5
+    assert all("domain:hypertrophy" in h["tags"] for h in hits)
+    assert [h["id"] for h in hits] == _expected_ids(emb, 3, np.arange(0, 12, 2), 5)
+
+
+def test_unknown_tag_filter_returns_nothing(rag_dirs):
+    index_dir, proc_dir, _ = rag_dirs
+    store = rmod.get_store(index_dir, proc_dir)
+    assert store.query({"query": "c3 q"}, top_k=3, domains=["yoga"]) == []
+    assert store.query({"query": "c3 q"}, top_k=3, evidence="anecdote") == []
+
+
+def test_faiss_filter_matches_numpy(rag_dirs, monkeypatch):
+    faiss = pytest.importorskip("faiss")
+    index_dir, proc_dir, emb = rag_dirs
+    index = faiss.IndexFlatIP(DIM)
+    index.add(emb)
+    faiss.write_index(index, str(index_dir / "faiss.index"))
+    monkeypatch.setattr(rmod, "faiss", faiss)
+    store = rmod.RAGStore(index_dir, proc_dir)
+    assert store._use_faiss
+    hits = store.query({"query": "c4 q"}, top_k=4, domains=["strength"])
+    assert [h["id"] for h in hits] == _expected_ids(emb, 4, np.arange(1, 12, 2), 4)
+
+
+# ----- Batched retrieval -----
+
+def test_retrieve_snippets_many_matches_single_calls(rag_dirs, monkeypatch):
+    index_dir, proc_dir, emb = rag_dirs
+    encoded = []
+    orig = rmod.RAGStore._encode
+    monkeypatch.setattr(rmod.RAGStore, "_encode", lambda self, texts: (encoded.append(list(texts)), orig(self, texts))[1])
+    batch = [
+        {"query": "c3 q", "top_k": 2},
+        {"query": "c5 q", "top_k": 4, "domains": ["strength"]},
+        {"query": "c3 q", "top_k": 2},
+        {"query": "   "},
+        {"query": "c8 q", "top_k": 3, "evidence": "evidence"},
+    ]
+    many = rmod.retrieve_snippets_many(batch)
+    assert encoded == [["c3 q", "c5 q", "c8 q"]]  # deduped, one encode call
+    assert len(many) == len(batch) and many[3] == ()
+    for inputs, hits in zip(batch, many):
+        if inputs["query"].strip():
+            single = rmod.get_store().query(inputs, top_k=inputs["top_k"], domains=inputs.get("domains"), evidence=inputs.get("evidence"))
+            assert [(h["id"], h["score"]) for h in hits] == [(h["id"], h["score"]) for h in single]
+
+
+def test_store_prefers_prenormalized_mmap_vectors(rag_dirs, monkeypatch):
+    from fitapp_core.rag.vectors import write_vectors
+
+    index_dir, proc_dir, emb = rag_dirs
+    write_vectors(emb, index_dir, dtype="int8")
+    monkeypatch.setattr(rmod, "EMB_DTYPE", "int8")
+    store = rmod.RAGStore(index_dir, proc_dir)
+    assert store.emb.dtype == "int8" and store.emb.mapped
+    assert store.query({"query": "c6 q"}, top_k=1)[0]["id"] == "c6"
+
+
+# ----- Lexical / hybrid retrieval -----
+
+def test_embedder_failure_falls_back_to_bm25(rag_dirs, monkeypatch):
+    index_dir, proc_dir, _ = rag_dirs
+
+    def _boom(self, texts):
+        raise ImportError("No module named 'sentence_transformers'")
+
+    monkeypatch.setattr(rmod.RAGStore, "_encode", _boom)
+    store = rmod.RAGStore(index_dir, proc_dir)
+    hits = store.query({"query": "chunk 7"}, top_k=3)
+    assert hits and hits[0]["id"] == "c7"
+
+
+def test_lexical_only_store_without_vectors(tmp_path):
+    proc = tmp_path / "processed"
+    proc.mkdir()
+    pd.DataFrame({
+        "id": ["a", "b"], "doc_id": ["d", "d"],
+        "text": ["deadlift hinge pattern", "bench press for chest"],
+        "tags": [["evidence:evidence"], ["evidence:evidence"]],
+    }).to_json(proc / "chunks.jsonl", orient="records", lines=True)
+    store = rmod.RAGStore(tmp_path / "missing-index", proc)
+    assert not store._disabled and not store.has_dense
+    assert [h["id"] for h in store.query({"query": "bench press"}, evidence="evidence")] == ["b"]
+
+
+def test_hybrid_mode_fuses_dense_and_lexical(rag_dirs):
+    index_dir, proc_dir, _ = rag_dirs
+    store = rmod.get_store(index_dir, proc_dir)
+    q = {"query": "c3 chunk 9"}
+    dense = store.query({**q, "mode": "dense"}, top_k=3)
+    lexical = store.query({**q, "mode": "lexical"}, top_k=3)
+    hybrid = store.query({**q, "mode": "hybrid"}, top_k=3)
+    weighted = store.query({**q, "mode": "hybrid", "fusion": "weighted", "alpha": 0.0}, top_k=3)
+    assert dense[0]["id"] == "c3" and lexical[0]["id"] == "c9"
+    assert hybrid[0]["id"] in {"c3", "c9"} and len(hybrid) == 3
+    assert weighted[0]["id"] == "c9"  # alpha=0: lexical ordering wins
+
+
+# ----- Result cache -----
+
+def test_retrieve_snippets_caches_frozen_results(rag_dirs, monkeypatch):
+    calls = []
+    orig = rmod.RAGStore.query
+    monkeypatch.setattr(rmod.RAGStore, "query", lambda self, *a, **kw: (calls.append(1), orig(self, *a, **kw))[1])
+    h1 = rmod.retrieve_snippets({"query": "c3   query", "top_k": 2})
+    h2 = rmod.retrieve_snippets({"query": "c3 query", "top_k": 2})
+    assert h1 is h2 and len(calls) == 1  # whitespace-normalized key
+    rmod.retrieve_snippets({"query": "c3 query", "top_k": 3})
+    assert len(calls) == 2  # top_k is part of the key
+    with pytest.raises(TypeError):
+        h1[0]["id"] = "tampered"
+    assert isinstance(h1[0]["tags"], tuple)
+    assert rmod.store_stats()["result_cache"]["hits"] == 1
+
+
+def test_result_cache_invalidated_on_hot_swap(rag_dirs, monkeypatch):
+    index_dir, _, _ = rag_dirs
+    monkeypatch.setattr(rmod, "_RELOAD_CHECK_S", 0.0)
+    before = rmod.retrieve_snippets({"query": "c3 query", "top_k": 2})
+    assert rmod.store_stats()["result_cache"]["size"] == 1
+    emb = _write_index(index_dir, n=16, seed=1)
+    monkeypatch.setattr(
+        rmod.RAGStore, "_encode",
+        lambda self, texts: np.stack([emb[int(t.split()[0][1:])] for t in texts]).astype(np.float32),
+    )
+    after = rmod.retrieve_snippets({"query": "c3 query", "top_k": 2})
+    assert after is not before
+    assert rmod.store_stats()["result_cache"]["size"] == 1  # old version dropped
+
+
+def test_result_cache_ttl_expires(monkeypatch):
+    from fitapp_core.rag import result_cache
+
+    cache = result_cache.ResultCache(capacity=2, ttl_s=10)
+    now = [100.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    key = result_cache.result_key("v", {"query": "q", "top_k": 6})
+    cache.put(key, [{"id": "a", "tags": ["x"]}])
+    assert cache.get(key)[0]["id"] == "a"
+    now[0] += 11
+    assert cache.get(key) is None and cache.stats()["expired"] == 1
+    for i in range(3):
+        cache.put(result_cache.result_key("v", {"query": f"q{i}"}), [{"id": i}])
+    assert cache.stats()["size"] == 2  # LRU bound
+
+
+# ----- MMR diversification -----
+
+@pytest.mark.parametrize("use_faiss", [False, True])
+def test_mmr_lambda_diversifies_top_k(rag_dirs, monkeypatch, use_faiss):
+    index_dir, proc_dir, emb = rag_dirs
+    dup = emb.copy()
+    dup[5] = emb[3] + 1e-3 * emb[5]  # row 5 is a near-copy of row 3
+    dup /= np.linalg.norm(dup, axis=1, keepdims=True)
+    np.save(index_dir / "embeddings.npy", dup)
+    if use_faiss:
+        faiss = pytest.importorskip("faiss")
+        index = faiss.IndexFlatIP(DIM)
+        index.add(dup)
+        faiss.write_index(index, str(index_dir / "faiss.index"))
+        monkeypatch.setattr(rmod, "faiss", faiss)
+    store = rmod.RAGStore(index_dir, proc_dir)
+    plain = store.query({"query": "c3 q"}, top_k=3)
+    diverse = store.query({"query": "c3 q", "mmr_lambda": 0.3}, top_k=3)
+    assert [h["id"] for h in plain[:2]] == ["c3", "c5"]
+    assert diverse[0]["id"] == "c3" and "c5" not in [h["id"] for h in diverse] and len(diverse) == 3
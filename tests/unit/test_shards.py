@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pytest
+
+from fitapp_core.rag import build as bmod
+from fitapp_core.rag import retriever as rmod
+
+
+def _unit(text):
+    v = np.random.default_rng(sum(map(ord, text))).standard_normal(8).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+@pytest.fixture
+def sharded(tmp_path, monkeypatch):
+    proc, root = tmp_path / "processed", tmp_path / "index"
+    proc.mkdir(parents=True)
+    with open(proc / "chunks.jsonl", "w", encoding="utf-8") as f:
+        for i in range(12):
+            domain = ("strength", "hypertrophy", "endurance")[i % 3]
+            text = f"chunk {i} about {domain}" + " notes" * i  # distinct lengths: no BM25 score ties
+            f.write(json.dumps({"id": f"c{i}", "doc_id": f"d{i // 2}", "text": text,
+                                "tags": ["evidence:evidence", f"domain:{domain}"]}) + "\n")
+    encode = lambda texts: np.stack([_unit(t) for t in texts])
+    monkeypatch.setattr(rmod, "faiss", None)
+    monkeypatch.setattr(rmod.RAGStore, "_encode", lambda self, texts: encode(texts))
+    flat = bmod.build_index(proc, root, version="flat", encode=encode, write_faiss=False)
+    shards = bmod.build_index(proc, root, version="sharded", encode=encode, write_faiss=False, shard_by="domain")
+    return flat, shards, proc
+
+
+def test_manifest_lists_shards_with_tags(sharded):
+    _, out, _ = sharded
+    manifest = json.loads((out / "shards.json").read_text())
+    assert [s["name"] for s in manifest["shards"]] == ["endurance", "hypertrophy", "strength"]
+    assert all(s["rows"] == 4 and s["evidence"] == ["evidence"] for s in manifest["shards"])
+    assert manifest["shards"][0]["domains"] == ["endurance"]
+
+
+@pytest.mark.parametrize("mode", ["dense", "lexical", "hybrid"])
+@pytest.mark.parametrize("mmr_lambda", [None, 0.5])
+def test_sharded_results_match_single_index(sharded, mode, mmr_lambda):
+    flat_dir, shard_dir, proc = sharded
+    flat, sharded_store = rmod.open_store(flat_dir, proc), rmod.open_store(shard_dir, proc)
+    assert isinstance(sharded_store, rmod.ShardedStore) and len(sharded_store) == 12
+    for q in ("chunk 4 about strength", "hypertrophy", "chunk 9", "endurance notes"):
+        request = {"query": q, "mode": mode, "mmr_lambda": mmr_lambda}
+        a = flat.query(request, top_k=4)
+        b = sharded_store.query(request, top_k=4)
+        assert [h["id"] for h in b] == [h["id"] for h in a]
+        assert [h["score"] for h in b] == pytest.approx([h["score"] for h in a], rel=1e-5)
+
+
+def test_domain_filter_skips_other_shards(sharded, monkeypatch):
+    _, shard_dir, proc = sharded
+    store = rmod.open_store(shard_dir, proc)
+    searched = []
+    orig = rmod.RAGStore._rank_many
+    monkeypatch.setattr(rmod.RAGStore, "_rank_many", lambda self, reqs, query_vectors=None: (searched.append(self), orig(self, reqs, query_vectors))[1])
+    hits = store.query({"query": "chunk 1"}, top_k=3, domains=["hypertrophy"])
+    assert len(searched) == 1 and len(hits) == 3
+    assert all("domain:hypertrophy" in h["tags"] for h in hits)
+    assert store.query({"query": "chunk 1"}, top_k=3, domains=["yoga"]) == []
+
+
+def test_registry_serves_and_reports_sharded_index(sharded):
+    _, shard_dir, proc = sharded
+    rmod._REGISTRY.clear()
+    try:
+        assert rmod.get_store(shard_dir, proc).query({"query": "chunk 2"}, top_k=1)
+        stats = rmod.store_stats()["stores"][0]
+        assert stats["backend"] == "sharded:numpy" and stats["resident_bytes"] > 0
+    finally:
+        rmod._REGISTRY.clear()
+
+
+def test_doc_sharding_keeps_documents_whole():
+    groups = bmod.shard_rows(["b", "a", "a", "c", "b", "d"], [[]] * 6, "doc", n_shards=2)
+    assert groups == {"docs-000": [0, 1, 2, 4], "docs-001": [3, 5]}
@@ -0,0 +1,81 @@
+import json
+import threading
+
+from fitapp_core.rag import llm
+from fitapp_core.rag import telemetry
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_writer_batches_and_rotates_daily(tmp_path, monkeypatch):
+    day = ["2025-10-06"]
+    monkeypatch.setattr(telemetry, "_utc_day", lambda: day[0])
+    writer = telemetry.TelemetryWriter(tmp_path, flush_s=0.05)
+    for i in range(3):
+        assert writer.emit("llm", {"event": "llm_json_ok", "i": i})
+    writer.emit("rag", {"event": "rag_query", "elapsed_ms": 1.5})
+    assert writer.flush()
+    day[0] = "2025-10-07"
+    writer.emit("llm", {"event": "llm_json_ok", "i": 3})
+    writer.close()
+
+    assert [e["i"] for e in _lines(tmp_path / "llm_2025-10-06.jsonl")] == [0, 1, 2]
+    assert [e["i"] for e in _lines(tmp_path / "llm_2025-10-07.jsonl")] == [3]
+    assert _lines(tmp_path / "rag_2025-10-06.jsonl")[0]["event"] == "rag_query"
+    assert writer.stats()["written"] == 5 and not writer.emit("llm", {})  # closed
+
+
+def test_emit_drops_instead_of_blocking_when_queue_is_full(tmp_path):
+    writer = telemetry.TelemetryWriter(tmp_path, flush_s=0.05, queue_size=2)
+    entered, release = threading.Event(), threading.Event()
+    write = writer._write
+
+    def slow_write(batch):
+        entered.set()
+        release.wait(5)
+        write(batch)
+
+    writer._write = slow_write
+    writer.emit("llm", {"n": 0})
+    assert entered.wait(5)  # the writer holds event 0 and is stuck on disk
+    results = [writer.emit("llm", {"n": n}) for n in (1, 2, 3)]
+    assert results == [True, True, False]
+    assert writer.stats()["dropped"] == 1
+    release.set()
+    writer.close()
+    assert [e["n"] for e in _lines(next(tmp_path.glob("llm_*.jsonl")))] == [0, 1, 2]
+
+
+def test_report_percentiles_parse_failures_and_tokens(tmp_path, capsys):
+    log = tmp_path / "llm_2025-10-06.jsonl"
+    events = [
+        {"event": "llm_json_ok", "model": "m", "elapsed_ms": ms, "parse_ok": True,
+         "usage": {"prompt_tokens": 10, "completion_tokens": 5}}
+        for ms in range(1, 101)
+    ]
+    events.append({"event": "llm_json_fail", "model": "m", "elapsed_ms": 900, "parse_ok": False,
+                   "usage": {"prompt_tokens": 10, "retry_prompt_tokens": 12}})
+    lines = [json.dumps(e) for e in events] + ["not json", "[LLM-LOG] " + json.dumps(events[-1])]
+    log.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    telemetry.main(["report", str(tmp_path / "*.jsonl"), "--json"])
+    rows = {r["event"]: r for r in json.loads(capsys.readouterr().out)}
+    ok, fail = rows["llm_json_ok"], rows["llm_json_fail"]
+    assert (ok["count"], ok["p50_ms"], ok["p95_ms"], ok["p99_ms"]) == (100, 50, 95, 99)
+    assert ok["parse_fail_rate"] == 0 and ok["tokens"] == {"prompt_tokens": 1000, "completion_tokens": 500}
+    assert fail["count"] == 2 and fail["parse_fail_rate"] == 1.0
+    assert fail["tokens"] == {"prompt_tokens": 20, "retry_prompt_tokens": 24}
+
+
+def test_llm_events_go_to_telemetry_instead_of_stdout(monkeypatch, capsys):
+    sent = []
+    monkeypatch.setattr(llm, "emit_telemetry", lambda stream, event: sent.append((stream, event)) or True)
+    llm._log_event({"event": "llm_json_ok", "elapsed_ms": 3})
+    assert sent == [("llm", {"event": "llm_json_ok", "elapsed_ms": 3})]
+    assert "[LLM-LOG]" not in capsys.readouterr().out
+
+    monkeypatch.setattr(llm, "emit_telemetry", lambda stream, event: False)  # sink off
+    llm._log_event({"event": "llm_json_ok", "elapsed_ms": 3})
+    assert "[LLM-LOG]" in capsys.readouterr().out
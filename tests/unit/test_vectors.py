@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from fitapp_core.rag.vectors import EmbeddingMatrix, load_vectors, normalize_rows, write_vectors
+
+
+@pytest.fixture
+def emb():
+    return np.random.default_rng(7).standard_normal((300, 32)).astype(np.float32)
+
+
+@pytest.mark.parametrize("dtype,atol", [("float32", 1e-5), ("float16", 2e-3), ("int8", 2e-2)])
+def test_mmap_vectors_score_close_to_float32(tmp_path, emb, dtype, atol):
+    write_vectors(emb, tmp_path, dtype=dtype)
+    mat = load_vectors(tmp_path, dtype)
+    assert mat.mapped and mat.dtype == dtype and mat.shape == emb.shape
+    ref = normalize_rows(emb)
+    qv = ref[:3]
+    np.testing.assert_allclose(mat.scores(qv), qv @ ref.T, atol=atol)
+    rows = np.array([5, 17, 250])
+    np.testing.assert_allclose(mat.scores(qv, rows), qv @ ref[rows].T, atol=atol)
+    np.testing.assert_allclose(mat.take(rows), ref[rows], atol=atol)
+
+
+def test_block_scoring_matches_single_pass(emb):
+    ref = normalize_rows(emb)
+    small = EmbeddingMatrix(ref.astype(np.float16), block_rows=7)
+    np.testing.assert_allclose(small.scores(ref[:2]), ref[:2] @ ref.T, atol=2e-3)
+
+
+def test_normalize_rows_leaves_input_untouched(emb):
+    before = emb.copy()
+    normalize_rows(emb)
+    np.testing.assert_array_equal(emb, before)
+
+
+def test_missing_prenormalized_file_returns_none(tmp_path):
+    assert load_vectors(tmp_path, "int8") is None
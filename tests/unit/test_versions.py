@@ -0,0 +1,101 @@
+import json
+
+import numpy as np
+import pytest
+
+from fitapp_core.rag import build as bmod
+from fitapp_core.rag import retriever as rmod
+from fitapp_core.rag import versions
+
+
+def _unit(text):
+    v = np.random.default_rng(sum(map(ord, text))).standard_normal(8).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+def _write_chunks(proc, n):
+    with open(proc / "chunks.jsonl", "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": f"c{i}", "doc_id": f"d{i}", "text": f"chunk {i} text",
+                                "tags": ["evidence:evidence"]}) + "\n")
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    proc, root = tmp_path / "processed", tmp_path / "index"
+    proc.mkdir(parents=True)
+    encode = lambda texts: np.stack([_unit(t) for t in texts])
+    monkeypatch.setattr(rmod, "faiss", None)
+    monkeypatch.setattr(rmod.RAGStore, "_encode", lambda self, texts: encode(texts))
+    monkeypatch.setattr(versions, "_VERIFIED", {})
+    _write_chunks(proc, 6)
+    bmod.build_index(proc, root, version="v1", encode=encode, write_faiss=False)
+    _write_chunks(proc, 9)
+    bmod.build_index(proc, root, version="v2", encode=encode, write_faiss=False)
+    rmod._REGISTRY.clear()
+    yield root, proc
+    rmod._REGISTRY.clear()
+
+
+def test_build_writes_manifest_and_verification_is_cached(root, monkeypatch):
+    root, _ = root
+    manifest = versions.read_manifest(root / "v2")
+    assert manifest["version"] == "v2" and manifest["rows"] == 9
+    assert "meta.parquet" in manifest["files"] and "build.json" in manifest["files"]
+    assert versions.verify_version(root / "v2") is True
+    # A fresh process trusts .verified.json while the files' stat signature is unchanged
+    monkeypatch.setattr(versions, "_VERIFIED", {})
+    monkeypatch.setattr(versions, "_sha1", lambda path: pytest.fail("re-hashed a verified file"))
+    assert versions.verify_version(root / "v2") is True
+    assert versions.verify_version(root / "missing") is None
+
+
+def test_tampered_version_fails_verification_and_promotion(root):
+    root, _ = root
+    with open(root / "v2" / "meta.parquet", "ab") as f:
+        f.write(b"\0")
+    assert versions.verify_version(root / "v2") is False
+    with pytest.raises(ValueError):
+        versions.set_current(root, "v2")
+    assert versions.read_current(root) is None
+
+
+def test_promote_and_rollback(root):
+    root, _ = root
+    with pytest.raises(ValueError):
+        versions.rollback(root)
+    versions.set_current(root, "v1")
+    versions.set_current(root, "v2")
+    assert versions.read_current(root) == "v2"
+    assert versions.resolve_index_dir(root / "current") == root / "v2"
+    assert versions.rollback(root).name == "v1"
+    assert versions.read_current(root) == "v1"
+    assert versions.history(root) == ["v1", "v2", "v1"]
+
+
+def test_registry_follows_current_pointer(root, monkeypatch):
+    root, proc = root
+    monkeypatch.setattr(rmod, "_RELOAD_CHECK_S", 0.0)
+    pointer = root / "current"
+    versions.set_current(root, "v1")
+    store = rmod.get_store(pointer, proc)
+    assert len(store.columns) == 6
+    versions.set_current(root, "v2")
+    swapped = rmod.get_store(pointer, proc)
+    assert swapped is not store and len(swapped.columns) == 9
+    assert rmod.store_stats()["stores"][0]["version_dir"] == str(root / "v2")
+    # A corrupted snapshot is refused: the registry keeps serving the last good one
+    with open(root / "v1" / "meta.parquet", "ab") as f:
+        f.write(b"\0")
+    (root / "current").write_text("v1\n", encoding="utf-8")
+    assert rmod.get_store(pointer, proc) is swapped
+
+
+def test_direct_store_follows_current_pointer_like_registry(root, monkeypatch):
+    root, proc = root
+    versions.set_current(root, "v2")
+    monkeypatch.setattr(rmod, "INDEX_DIR", root / "current")
+    monkeypatch.setattr(rmod, "PROC_DIR", proc)
+    direct, opened, shared = rmod.RAGStore(), rmod.open_store(), rmod.get_store()
+    assert direct.backend == opened.backend == shared.backend == "numpy"
+    assert len(direct.columns) == len(opened.columns) == len(shared.columns) == 9